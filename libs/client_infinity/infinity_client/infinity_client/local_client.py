@@ -0,0 +1,178 @@
+"""client for the local transport of infinity_emb (`infinity_emb v2 --local-transport-path`).
+
+Inputs and embeddings are exchanged through a shared-memory ring buffer,
+control messages through a unix domain socket. Only usable on the same host.
+"""
+
+import json
+import os
+import socket
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence, Tuple, Type
+
+HAS_IMPORTS = True
+try:
+    import numpy as np
+except ImportError:
+    HAS_IMPORTS = False
+
+_HEADER = struct.Struct("<I")
+_ALIGNMENT = 64
+
+
+class ModelNotDeployedError(Exception):
+    """the model does not exist or does not support the requested task"""
+
+
+class MatryoshkaDimError(Exception):
+    """the requested `matryoshka_dim` is not supported by the model"""
+
+
+# exceptions of the server, re-raised with the same type
+_REMOTE_EXCEPTIONS: Dict[str, Type[Exception]] = {
+    ex.__name__: ex
+    for ex in [ModelNotDeployedError, MatryoshkaDimError, PermissionError, IndexError, ValueError]
+}
+
+
+def _ring_position(offset: int, nbytes: int, ring_size: int) -> int:
+    if nbytes > ring_size:
+        raise ValueError(
+            f"payload of {nbytes} bytes does not fit into the ring buffer of {ring_size} bytes"
+        )
+    position = (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+    if position + nbytes > ring_size:
+        return 0
+    return position
+
+
+class InfinityLocalClient:
+    def __init__(self, path: str, ring_size: int = 64 * 1024 * 1024, api_key: str = "") -> None:
+        """client for a co-located infinity server, connected via `--local-transport-path`.
+
+        Args:
+            path (str): path of the unix domain socket of the server.
+            ring_size (int, optional): bytes of the shared memory ring buffer. Must fit the
+                inputs and embeddings of one request. Defaults to 64MB.
+            api_key (str, optional): the `--api-key` of the server, if set.
+
+        Raises:
+            PermissionError: if the server rejects the `api_key`.
+        """
+        if not HAS_IMPORTS:
+            raise ImportError("numpy is required for InfinityLocalClient. `pip install numpy`")
+        self.ring_size = ring_size
+        self._lock = threading.Lock()
+        self._head = 0
+        self._shm = shared_memory.SharedMemory(create=True, size=ring_size)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(path)
+            reply = self._request(
+                dict(
+                    op="hello",
+                    shm=self._shm.name,
+                    size=ring_size,
+                    pid=os.getpid(),
+                    api_key=api_key,
+                )
+            )
+        except Exception:
+            self.close()
+            raise
+        self.models: List[str] = reply["models"]
+
+    def close(self) -> None:
+        self._sock.close()
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # zero-copy results are still referenced
+                pass
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "InfinityLocalClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _recv_exactly(self, n: int) -> bytes:
+        chunks = []
+        while n:
+            chunk = self._sock.recv(n)
+            if not chunk:
+                raise ConnectionError("local transport closed the connection")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def _request(self, message: dict) -> dict:
+        payload = json.dumps(message).encode("utf-8")
+        self._sock.sendall(_HEADER.pack(len(payload)) + payload)
+        (length,) = _HEADER.unpack(self._recv_exactly(_HEADER.size))
+        reply = json.loads(self._recv_exactly(length))
+        if not reply.get("ok"):
+            error_type = reply.get("type")
+            if error_type in _REMOTE_EXCEPTIONS:
+                raise _REMOTE_EXCEPTIONS[error_type](reply.get("error"))
+            raise RuntimeError(f"{error_type}: {reply.get('error')}")
+        return reply
+
+    def _request_texts(self, op: str, model: str, texts: Sequence[str], **kwargs) -> dict:
+        encoded = [t.encode("utf-8") for t in texts]
+        lengths = np.array([len(e) for e in encoded], dtype=np.uint32)
+        nbytes = lengths.nbytes + int(lengths.sum())
+        with self._lock:
+            buf = self._shm.buf
+            offset = _ring_position(self._head, nbytes, self.ring_size)
+            buf[offset : offset + lengths.nbytes] = lengths.tobytes()
+            buf[offset + lengths.nbytes : offset + nbytes] = b"".join(encoded)
+            self._head = offset + nbytes
+            reply = self._request(
+                dict(op=op, model=model, offset=offset, count=len(texts), kwargs=kwargs)
+            )
+            if "nbytes" in reply:
+                self._head = reply["offset"] + reply["nbytes"]
+            return reply
+
+    def models_list(self) -> List[str]:
+        with self._lock:
+            return self._request(dict(op="models"))["models"]
+
+    def embed(
+        self, model: str, sentences: Sequence[str], copy: bool = True, **kwargs
+    ) -> Tuple[List["np.ndarray"], int]:
+        """embed sentences, returns (embeddings, usage).
+
+        Args:
+            copy (bool): if False, returns zero-copy views into the ring buffer,
+                which are overwritten by later requests once the ring buffer wraps around.
+        """
+        reply = self._request_texts("embed", model, sentences, **kwargs)
+        dtype = np.dtype(reply["dtype"])
+        offset = reply["offset"]
+        arrays = []
+        for shape in reply["shapes"]:
+            array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            offset += array.nbytes
+            arrays.append(array.copy() if copy else array)
+        return arrays, reply["usage"]
+
+    def rerank(
+        self, model: str, query: str, docs: Sequence[str], **kwargs
+    ) -> Tuple[List[Dict], int]:
+        """rerank docs for a query, returns (results, usage)"""
+        reply = self._request_texts("rerank", model, [query, *docs], **kwargs)
+        return reply["results"], reply["usage"]
+
+    def classify(
+        self, model: str, sentences: Sequence[str], **kwargs
+    ) -> Tuple[List[List[Dict]], int]:
+        """classify sentences, returns (results, usage)"""
+        reply = self._request_texts("classify", model, sentences, **kwargs)
+        return reply["results"], reply["usage"]
@@ -40,5 +40,6 @@ python -m pip install openapi-python-client==0.21.1 && \
 
 # copy the readme to docs
 cp ./template/vision_client.py ./infinity_client/infinity_client/vision_client.py
+cp ./template/local_client.py ./infinity_client/infinity_client/local_client.py
 cp ./infinity_client/README.md ./../../docs/docs/client_infinity.md
 # Cleanup will be called due to the trap
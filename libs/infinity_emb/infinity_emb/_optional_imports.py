@@ -62,6 +62,7 @@ CHECK_COLPALI_ENGINE = OptionalImports("colpali_engine", "vision")
 CHECK_CTRANSLATE2 = OptionalImports("ctranslate2", "ctranslate2")
 CHECK_DISKCACHE = OptionalImports("diskcache", "cache")
 CHECK_FASTAPI = OptionalImports("fastapi", "server")
+CHECK_GRPC = OptionalImports("grpc", "grpc", dependencies=["google.protobuf"])
 CHECK_ONNXRUNTIME = OptionalImports("optimum.onnxruntime", "optimum")
 CHECK_OPTIMUM = OptionalImports("optimum", "optimum")
 CHECK_OPTIMUM_AMD = OptionalImports("optimum.amd", "optimum")
@@ -72,6 +73,7 @@ CHECK_OPTIMUM_NEURON = OptionalImports(
 CHECK_PIL = OptionalImports("PIL", "vision")
 CHECK_POSTHOG = OptionalImports("posthog", "server")
 CHECK_PYDANTIC = OptionalImports("pydantic", "server")
+CHECK_SCIPY = OptionalImports("scipy", "torch")
 CHECK_SENTENCE_TRANSFORMERS = OptionalImports("sentence_transformers", "torch")
 CHECK_SOUNDFILE = OptionalImports("soundfile", "audio")
 CHECK_TORCH = OptionalImports("torch.nn", "torch")
@@ -16,6 +16,7 @@ from infinity_emb.primitives import (
     Dtype,
     EmbeddingDtype,
     InferenceEngine,
+    OnnxSessionProfile,
     PoolingMethod,
     LoadingStrategy,
 )
@@ -45,11 +46,29 @@ class EngineArgs:
         device_id, DeviceID or str: device index to use for inference.
             Defaults to [], no preferred placement.
         compile, bool: compile model for better performance. Defaults to False.
-        bettertransformer, bool: use bettertransformer. Defaults to True.
+        bettertransformer, bool: use bettertransformer for models without sdpa attention.
+            Defaults to True.
+        pad_to_multiple_of, int: pad the token ids of a batch to a multiple of this length,
+            e.g. 8 for tensor cores or 64 to bound the shapes of `compile`. Defaults to 1.
+        preprocessing_workers, int: threads per model replica that tokenize / preprocess
+            batches in parallel, in order. Text models only, others use 1. Defaults to 1.
+        cpu_replicas, int: number of model replicas on cpu, each pinned to a disjoint set of
+            cores (grouped by NUMA node), fed by the same batch queue. Defaults to 1.
+        sequence_packing, bool: pack several inputs into one row of the batch for the
+            forward pass of the torch engine, instead of padding them. Defaults to False.
         dtype, Dtype or str: data type to use for inference. Defaults to Dtype.auto.
         pooling_method, PoolingMethod or str: pooling method to use. Defaults to PoolingMethod.auto.
         lengths_via_tokenize, bool: schedule by token usage. Defaults to False.
         served_model_name, str: Defaults to readable name of model_name_or_path.
+        onnx_session_profile, OnnxSessionProfile or str: onnxruntime session options of the
+            optimum engine. `latency` for one replica per host, `throughput` for several
+            replicas sharing the cores, `auto` to pick the fastest thread count at startup.
+            Defaults to OnnxSessionProfile.default, the onnxruntime defaults.
+        onnx_num_threads, int: intra-op threads of the onnxruntime session.
+            Defaults to 0, the cpus available to the process.
+        token_pool_factor, int: for multi-vector models (ColBERT, ColPali), cluster and
+            mean-pool the token vectors of each input (of each image for ColPali)
+            by this factor. Defaults to 1, no pooling.
     """
 
     model_name_or_path: str = MANAGER.model_id[0]
@@ -63,6 +82,10 @@ class EngineArgs:
     device_id: DeviceID = field(default_factory=lambda: DeviceID(MANAGER.device_id[0]))
     compile: bool = MANAGER.compile[0]
     bettertransformer: bool = MANAGER.bettertransformer[0]
+    pad_to_multiple_of: int = MANAGER.pad_to_multiple_of[0]
+    preprocessing_workers: int = MANAGER.preprocessing_workers[0]
+    cpu_replicas: int = MANAGER.cpu_replicas[0]
+    sequence_packing: bool = MANAGER.sequence_packing[0]
     dtype: Dtype = Dtype[MANAGER.dtype[0]]
     pooling_method: PoolingMethod = PoolingMethod[MANAGER.pooling_method[0]]
     lengths_via_tokenize: bool = MANAGER.lengths_via_tokenize[0]
@@ -70,6 +93,9 @@ class EngineArgs:
     served_model_name: str = MANAGER.served_model_name[0]
     onnx_disable_optimize: bool = MANAGER.onnx_disable_optimize[0]
     onnx_do_not_prefer_quantized: bool = MANAGER.onnx_do_not_prefer_quantized[0]
+    onnx_session_profile: OnnxSessionProfile = OnnxSessionProfile[MANAGER.onnx_session_profile[0]]
+    onnx_num_threads: int = MANAGER.onnx_num_threads[0]
+    token_pool_factor: int = MANAGER.token_pool_factor[0]
 
     _loading_strategy: Optional[LoadingStrategy] = None
 
@@ -91,12 +117,28 @@ class EngineArgs:
             object.__setattr__(self, "pooling_method", PoolingMethod[self.pooling_method])
         if not isinstance(self.embedding_dtype, EmbeddingDtype):
             object.__setattr__(self, "embedding_dtype", EmbeddingDtype[self.embedding_dtype])
+        if not isinstance(self.onnx_session_profile, OnnxSessionProfile):
+            object.__setattr__(
+                self, "onnx_session_profile", OnnxSessionProfile[self.onnx_session_profile]
+            )
         if not self.served_model_name:
             object.__setattr__(
                 self,
                 "served_model_name",
                 "/".join(self.model_name_or_path.split("/")[-2:]),
             )
+        if self.pad_to_multiple_of < 1:
+            raise ValueError(f"pad_to_multiple_of must be >= 1, got {self.pad_to_multiple_of}")
+        if self.preprocessing_workers < 1:
+            raise ValueError(
+                f"preprocessing_workers must be >= 1, got {self.preprocessing_workers}"
+            )
+        if self.cpu_replicas < 1:
+            raise ValueError(f"cpu_replicas must be >= 1, got {self.cpu_replicas}")
+        if self.onnx_num_threads < 0:
+            raise ValueError(f"onnx_num_threads must be >= 0, got {self.onnx_num_threads}")
+        if self.token_pool_factor < 1:
+            raise ValueError(f"token_pool_factor must be >= 1, got {self.token_pool_factor}")
         if self.revision is not None and self.revision == "":
             object.__setattr__(self, "revision", None)
         if isinstance(self.vector_disk_cache_path, bool):
@@ -157,15 +199,22 @@ class EngineArgs:
                 device=device,
                 compile=compile,
                 bettertransformer=bettertransformer,
+                pad_to_multiple_of=pad_to_multiple_of,
+                preprocessing_workers=preprocessing_workers,
+                cpu_replicas=cpu_replicas,
+                sequence_packing=sequence_packing,
                 dtype=dtype,
                 pooling_method=pooling_method,
                 lengths_via_tokenize=lengths_via_tokenize,
                 embedding_dtype=embedding_dtype,
                 served_model_name=served_model_name,
                 onnx_disable_optimize=onnx_disable_optimize,
-                onnx_do_not_prefer_quantized=onnx_do_not_prefer_quantized
+                onnx_do_not_prefer_quantized=onnx_do_not_prefer_quantized,
+                onnx_session_profile=onnx_session_profile,
+                onnx_num_threads=onnx_num_threads,
+                token_pool_factor=token_pool_factor,
             )
-            for model_name_or_path, batch_size, revision, trust_remote_code, engine, model_warmup, device, compile, bettertransformer, dtype, pooling_method, lengths_via_tokenize, embedding_dtype, served_model_name,onnx_disable_optimize,onnx_do_not_prefer_quantized in zip_longest(
+            for model_name_or_path, batch_size, revision, trust_remote_code, engine, model_warmup, device, compile, bettertransformer, pad_to_multiple_of, preprocessing_workers, cpu_replicas, sequence_packing, dtype, pooling_method, lengths_via_tokenize, embedding_dtype, served_model_name,onnx_disable_optimize,onnx_do_not_prefer_quantized,onnx_session_profile,onnx_num_threads,token_pool_factor in zip_longest(
                 MANAGER.model_id,
                 MANAGER.batch_size,
                 MANAGER.revision,
@@ -175,12 +224,19 @@ class EngineArgs:
                 MANAGER.device,
                 MANAGER.compile,
                 MANAGER.bettertransformer,
+                MANAGER.pad_to_multiple_of,
+                MANAGER.preprocessing_workers,
+                MANAGER.cpu_replicas,
+                MANAGER.sequence_packing,
                 MANAGER.dtype,
                 MANAGER.pooling_method,
                 MANAGER.lengths_via_tokenize,
                 MANAGER.embedding_dtype,
                 MANAGER.served_model_name,
                 MANAGER.onnx_disable_optimize,
-                MANAGER.onnx_do_not_prefer_quantized
+                MANAGER.onnx_do_not_prefer_quantized,
+                MANAGER.onnx_session_profile,
+                MANAGER.onnx_num_threads,
+                MANAGER.token_pool_factor,
             )
         ]
@@ -2,8 +2,14 @@
 # Copyright (c) 2023-now michaelfeil
 
 import asyncio
+import functools
+import multiprocessing
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
 
 
 import infinity_emb
@@ -17,9 +23,10 @@ from infinity_emb.primitives import (
     Dtype,
     EmbeddingDtype,
     InferenceEngine,
+    OnnxSessionProfile,
     PoolingMethod,
 )
-from infinity_emb.infinity_server import create_server
+from infinity_emb.infinity_server import create_server, run_engine_process
 
 
 # helper functions for the CLI
@@ -105,6 +112,75 @@ if CHECK_TYPER.is_available:
             # Windows does not support uvloop
             pass
 
+    def _run_with_workers(
+        *,
+        workers: int,
+        engine_args_list: list[EngineArgs],
+        host: str,
+        port: int,
+        log_level: "UVICORN_LOG_LEVELS",
+        grpc_port: int,
+        local_transport_path: str,
+        **server_kwargs,
+    ):
+        """one engine process owning the models, `workers` uvicorn processes serving http"""
+        from uvicorn.supervisors import Multiprocess
+
+        tmpdir = ""
+        if not local_transport_path:
+            tmpdir = tempfile.mkdtemp(prefix="infinity_")
+            local_transport_path = os.path.join(tmpdir, "engine.sock")
+        if os.path.exists(local_transport_path):
+            os.unlink(local_transport_path)
+        engine_process = multiprocessing.get_context("spawn").Process(
+            target=run_engine_process,
+            kwargs=dict(
+                engine_args_list=engine_args_list,
+                local_transport_path=local_transport_path,
+                grpc_address=f"{host}:{grpc_port}" if grpc_port else "",
+                api_key=server_kwargs.get("api_key", ""),
+                log_level=log_level.to_int(),
+            ),
+            name="infinity-engine",
+        )
+        engine_process.start()
+        try:
+            # wait until the models are loaded
+            while not os.path.exists(local_transport_path):
+                if not engine_process.is_alive():
+                    raise RuntimeError(
+                        f"engine process exited with code {engine_process.exitcode} during startup"
+                    )
+                time.sleep(0.2)
+            config = uvicorn.Config(
+                functools.partial(
+                    create_server,
+                    engine_args_list=engine_args_list,
+                    engine_process_path=local_transport_path,
+                    grpc_port=0,
+                    local_transport_path="",
+                    # the collections would not be shared between the front-end processes
+                    collections_path="",
+                    **server_kwargs,
+                ),
+                factory=True,
+                host=host,
+                port=port,
+                workers=workers,
+                log_level=log_level.name,
+                http="httptools",
+                loop=loopname,  # type: ignore
+            )
+            Multiprocess(
+                config, target=uvicorn.Server(config).run, sockets=[config.bind_socket()]
+            ).run()
+        finally:
+            engine_process.terminate()
+            engine_process.join(timeout=30)
+            if tmpdir:
+                # the engine process removes its socket, but not the folder
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
     tp = typer.Typer()
 
     @tp.command("v1")
@@ -201,7 +277,7 @@ if CHECK_TYPER.is_available:
         ),
         engine: list[InferenceEngine] = typer.Option(
             **_construct("engine"),
-            help="Which backend to use. `torch` uses Pytorch GPU/CPU, optimum uses ONNX on GPU/CPU/NVIDIA-TensorRT, `CTranslate2` uses torch+ctranslate2 on CPU/GPU.",
+            help="Which backend to use. `torch` uses Pytorch GPU/CPU, optimum uses ONNX on GPU/CPU/NVIDIA-TensorRT, `CTranslate2` uses torch+ctranslate2 on CPU/GPU, `transformers` uses Pytorch via transformers.AutoModel for text embeddings, without sentence-transformers.",
         ),
         model_warmup: list[bool] = typer.Option(
             **_construct("model_warmup"),
@@ -230,6 +306,10 @@ if CHECK_TYPER.is_available:
             **_construct("embedding_dtype"),
             help="dtype post-forward pass. If != `float32`, using Post-Forward Static quantization.",
         ),
+        token_pool_factor: list[int] = typer.Option(
+            **_construct("token_pool_factor"),
+            help="multi-vector models (ColBERT, ColPali) only: reduce the token vectors of each input by this factor, via hierarchical clustering and mean-pooling. 1 to disable.",
+        ),
         pooling_method: list[PoolingMethod] = typer.Option(
             **_construct("pooling_method"),
             help="overwrite the pooling method if inferred incorrectly.",
@@ -240,7 +320,23 @@ if CHECK_TYPER.is_available:
         ),
         bettertransformer: list[bool] = typer.Option(
             **_construct("bettertransformer"),
-            help="Enables varlen flash-attention-2 via the `BetterTransformer` implementation. If available for this model.",
+            help="Fallback for models without native `sdpa` attention in transformers: enables varlen flash-attention-2 via the `BetterTransformer` implementation, if available for this model.",
+        ),
+        sequence_packing: list[bool] = typer.Option(
+            **_construct("sequence_packing"),
+            help="torch engine: pack several inputs into one row of the batch instead of padding them, for encoder models with absolute position embeddings (bert, roberta). Replaces `--bettertransformer`.",
+        ),
+        pad_to_multiple_of: list[int] = typer.Option(
+            **_construct("pad_to_multiple_of"),
+            help="pad the token ids of a batch to a multiple of this length, e.g. 8 for tensor cores or 64 to bound the input shapes of `--compile`.",
+        ),
+        preprocessing_workers: list[int] = typer.Option(
+            **_construct("preprocessing_workers"),
+            help="threads per model replica that tokenize / preprocess batches in parallel, handed to the model in order. Helps if preprocessing, not the model, is the bottleneck.",
+        ),
+        cpu_replicas: list[int] = typer.Option(
+            **_construct("cpu_replicas"),
+            help="number of model replicas on cpu, each pinned to a disjoint set of cores (NUMA node aware) with matching thread counts. All replicas are fed from the same batch queue.",
         ),
         # arguments for uvicorn / server
         preload_only: bool = typer.Option(
@@ -270,6 +366,22 @@ if CHECK_TYPER.is_available:
             **_construct("proxy_root_path"),
             help="Proxy prefix for the application. See: https://fastapi.tiangolo.com/advanced/behind-a-proxy/",
         ),
+        grpc_port: int = typer.Option(
+            **_construct("grpc_port"),
+            help="port of the optional gRPC server, started next to the REST API. 0 to disable. Requires `infinity-emb[grpc]`.",
+        ),
+        workers: int = typer.Option(
+            **_construct("workers"),
+            help="number of http front-end processes. If >1, the models are loaded once in a separate engine process, which the front-ends forward requests to.",
+        ),
+        local_transport_path: str = typer.Option(
+            **_construct("local_transport_path"),
+            help="path of a unix domain socket for co-located clients, using shared memory for inputs and embeddings. Only the owner can connect (0o600), clients need to send the `--api-key` if set. Python client: `InfinityLocalClient` of the `infinity_client` package. Empty string to disable.",
+        ),
+        collections_path: str = typer.Option(
+            **_construct("collections_path"),
+            help="folder of the vector collections, served under `/collections`. Empty string to disable. Not supported with `--workers` > 1.",
+        ),
         onnx_disable_optimize: list[bool] = typer.Option(
             **_construct("onnx_disable_optimize"),
             help="Disable onnx optimization",
@@ -278,6 +390,14 @@ if CHECK_TYPER.is_available:
             **_construct("onnx_do_not_prefer_quantized"),
             help="Do not use quantized onnx models by default if available",
         ),
+        onnx_session_profile: list[OnnxSessionProfile] = typer.Option(
+            **_construct("onnx_session_profile"),
+            help="onnxruntime session options: `latency` for one replica per host, `throughput` (no thread spinning) for several replicas per host, `auto` to pick the fastest thread count at startup.",
+        ),
+        onnx_num_threads: list[int] = typer.Option(
+            **_construct("onnx_num_threads"),
+            help="intra-op threads of the onnxruntime session. 0 for all cpus available to the process.",
+        ),
     ):
         """Infinity API ♾️  cli v2. MIT License. Copyright (c) 2023-now Michael Feil \n
         \n
@@ -310,15 +430,26 @@ if CHECK_TYPER.is_available:
         lengths_via_tokenize: bool: schedule by token usage. Defaults to False.
         dtype, Dtype: data type to use for inference. Defaults to Dtype.auto or "auto"
         embedding_dtype, EmbeddingDtype: data type to use for embeddings. Defaults to EmbeddingDtype.float32 or "float32"
+        token_pool_factor, int: token pooling factor of multi-vector models. Defaults to 1, no pooling.
         pooling_method, PoolingMethod: pooling method to use. Defaults to PoolingMethod.auto or "auto"
         compile, bool: compile model for faster inference. Defaults to False.
-        use_bettertransformer, bool: use bettertransformer. Defaults to True.
+        use_bettertransformer, bool: use bettertransformer for models without sdpa attention. Defaults to True.
+        sequence_packing, bool: pack inputs instead of padding them. Defaults to False.
+        pad_to_multiple_of, int: pad the token ids of a batch to a multiple of this length. Defaults to 1.
+        preprocessing_workers, int: threads per model replica for preprocessing. Defaults to 1.
+        cpu_replicas, int: number of core-pinned model replicas on cpu. Defaults to 1.
         preload_only, bool: only preload the model and exit. Defaults to False.
         permissive_cors, bool: add permissive CORS headers to enable consumption from a browser. Defaults to False.
         api_key, str: optional Bearer token for authentication. Defaults to "", which disables authentication.
         proxy_root_path, str: optional Proxy prefix for the application. See: https://fastapi.tiangolo.com/advanced/behind-a-proxy/
+        grpc_port, int: optional port of the gRPC server. Defaults to 0, which disables it.
+        workers, int: number of http front-end processes, sharing one engine process. Defaults to 1.
+        local_transport_path, str: optional unix domain socket path for the shared-memory local transport, only accessible by the owner. Clients, e.g. `infinity_client.local_client.InfinityLocalClient`, need to send the `api_key` if set. Defaults to "", which disables it.
+        collections_path, str: optional folder of the vector collections. Defaults to "", which disables them.
         onnx_disable_optimize, bool: disable onnx optimization
         onnx_do_not_prefer_quantized, bool: do not prefer quantized onnx model if its available
+        onnx_session_profile, OnnxSessionProfile: onnxruntime session options. Defaults to OnnxSessionProfile.default or "default"
+        onnx_num_threads, int: intra-op threads of the onnxruntime session. Defaults to 0, all available cpus.
         """
         logger.setLevel(log_level.to_int())
         device_id_typed = [DeviceID(d) for d in typer_option_resolve(device_id)]
@@ -336,12 +467,19 @@ if CHECK_TYPER.is_available:
             lengths_via_tokenize=lengths_via_tokenize,
             dtype=dtype,
             embedding_dtype=embedding_dtype,
+            token_pool_factor=token_pool_factor,
             pooling_method=pooling_method,
             compile=compile,
             bettertransformer=bettertransformer,
+            sequence_packing=sequence_packing,
+            pad_to_multiple_of=pad_to_multiple_of,
+            preprocessing_workers=preprocessing_workers,
+            cpu_replicas=cpu_replicas,
             served_model_name=served_model_name,
             onnx_disable_optimize=onnx_disable_optimize,
-            onnx_do_not_prefer_quantized=onnx_do_not_prefer_quantized
+            onnx_do_not_prefer_quantized=onnx_do_not_prefer_quantized,
+            onnx_session_profile=onnx_session_profile,
+            onnx_num_threads=onnx_num_threads,
         )
 
         engine_args = []
@@ -358,6 +496,10 @@ if CHECK_TYPER.is_available:
             permissive_cors,
             api_key,
             proxy_root_path,
+            grpc_port,
+            workers,
+            local_transport_path,
+            collections_path,
         ) = typer_option_resolve(
             url_prefix,
             host,
@@ -368,8 +510,31 @@ if CHECK_TYPER.is_available:
             permissive_cors,
             api_key,
             proxy_root_path,
+            grpc_port,
+            workers,
+            local_transport_path,
+            collections_path,
         )
 
+        if workers > 1 and collections_path:
+            raise ValueError("`--collections-path` is not supported with `--workers` > 1")
+        if workers > 1 and not preload_only:
+            _run_with_workers(
+                workers=workers,
+                engine_args_list=engine_args,
+                host=host,
+                port=port,
+                log_level=log_level,
+                grpc_port=grpc_port,
+                local_transport_path=local_transport_path,
+                url_prefix=url_prefix,
+                redirect_slash=redirect_slash,
+                permissive_cors=permissive_cors,
+                api_key=api_key,
+                proxy_root_path=proxy_root_path,
+            )
+            return
+
         app = create_server(
             engine_args_list=engine_args,
             url_prefix=url_prefix,
@@ -379,6 +544,9 @@ if CHECK_TYPER.is_available:
             permissive_cors=permissive_cors,
             api_key=api_key,
             proxy_root_path=proxy_root_path,
+            grpc_port=grpc_port,
+            local_transport_path=local_transport_path,
+            collections_path=collections_path,
         )
 
         uvicorn.run(
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from asyncio import Semaphore
-from typing import Iterable, Iterator, Optional, Union
+from typing import Iterable, Iterator, Optional, Sequence, Union
 
 from infinity_emb.args import EngineArgs
 
@@ -12,13 +12,17 @@ from infinity_emb.inference import (
     BatchHandler,
     select_model,
 )
+from infinity_emb.inference.cascade import cascade_rerank
 from infinity_emb.log_handler import logger
 from infinity_emb.primitives import (
     ClassifyReturnType,
+    EmbeddingDtype,
     EmbeddingReturnType,
     ImageClassType,
     ModelCapabilites,
+    Modality,
     RerankReturnType,
+    SimilarityReturnType,
 )
 
 
@@ -93,6 +97,8 @@ class AsyncEmbeddingEngine:
                     vector_disk_cache_path=self._engine_args.vector_disk_cache_path,
                     verbose=logger.level <= 10,
                     lengths_via_tokenize=self._engine_args.lengths_via_tokenize,
+                    cpu_core_mapping=self._engine_args._loading_strategy.cpu_core_mapping,  # type: ignore
+                    preprocessing_workers=self._engine_args.preprocessing_workers,
                 )
                 await self._batch_handler.spawn()
 
@@ -132,13 +138,18 @@ class AsyncEmbeddingEngine:
         return self._engine_args
 
     async def embed(
-        self, sentences: list[str], matryoshka_dim: int | None = None
+        self,
+        sentences: list[str],
+        matryoshka_dim: int | None = None,
+        embedding_dtype: EmbeddingDtype | None = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple sentences
 
         Kwargs:
             sentences (list[str]): sentences to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -153,7 +164,7 @@ class AsyncEmbeddingEngine:
 
         self._assert_running()
         embeddings, usage = await self._batch_handler.embed(
-            sentences=sentences, matryoshka_dim=matryoshka_dim
+            sentences=sentences, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
         )
         return embeddings, usage
 
@@ -193,6 +204,80 @@ class AsyncEmbeddingEngine:
 
         return scores, usage
 
+    async def rerank_many(
+        self,
+        *,
+        queries: list[str],
+        docs: list[list[str]],
+        raw_scores: bool = False,
+        top_n: Optional[Sequence[Optional[int]]] = None,
+    ) -> tuple[list[list["RerankReturnType"]], int]:
+        """rerank multiple queries, each with its own documents, in one batch
+
+        Kwargs:
+            queries (list[str]): queries to be reranked
+            docs (list[list[str]]): docs to be reranked, one list per query
+            raw_scores (bool): return raw scores instead of sigmoid
+            top_n (Optional[Sequence[Optional[int]]]): number of top scores to return
+                after reranking, one per query
+
+        Raises:
+            ValueError: raised if engine is not started yet
+            ModelNotDeployedError: If loaded model does not expose `rerank`
+                capabilities
+
+        Returns:
+            list[list[RerankReturnType]]: list of scores, one list per query
+            int: token usage
+        """
+        self._assert_running()
+        scores, usage = await self._batch_handler.rerank_many(
+            queries=queries,
+            docs=docs,
+            raw_scores=raw_scores,
+            top_n=top_n,
+        )
+
+        return scores, usage
+
+    async def similarity(
+        self,
+        *,
+        queries: list[str],
+        documents: list[str],
+        top_k: Optional[int] = None,
+        document_modality: Modality = Modality.text,
+    ) -> tuple[SimilarityReturnType, int]:
+        """embed queries and documents and score them against each other.
+
+        Scores are the cosine similarity, computed on the embeddings of the `embedding_dtype`:
+        integer dot products for int8/uint8, hamming distances for binary/ubinary.
+        Multi-vector models (ColBERT, ColPali) are scored with late interaction (MaxSim).
+
+        Kwargs:
+            queries (list[str]): n sentences, the rows of the score matrix
+            documents (list[str]): m sentences or image urls, the columns of the score matrix
+            top_k (Optional[int]): if set, return only the top_k scores per row and their indices
+            document_modality (Modality): text or image documents, e.g. image for ColPali
+
+        Raises:
+            ValueError: raised if engine is not started yet
+            ModelNotDeployedError: If loaded model does not expose `embed`
+                capabilities, or `image_embed` for image documents
+
+        Returns:
+            SimilarityReturnType: [n, m] scores, or [n, top_k] scores sorted descending and indices
+            int: token usage
+        """
+        self._assert_running()
+        return await self._batch_handler.similarity(
+            queries=queries,
+            documents=documents,
+            embedding_dtype=self._engine_args.embedding_dtype,
+            top_k=top_k,
+            document_modality=document_modality,
+        )
+
     async def classify(
         self, *, sentences: list[str], raw_scores: bool = False
     ) -> tuple[list[ClassifyReturnType], int]:
@@ -223,12 +308,15 @@ class AsyncEmbeddingEngine:
         *,
         images: list[Union[str, "ImageClassType", bytes]],
         matryoshka_dim: int | None = None,
+        embedding_dtype: EmbeddingDtype | None = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple images
 
         Kwargs:
             images (list[Union[str, ImageClassType]]): list of image urls or ImageClassType objects, to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -243,18 +331,24 @@ class AsyncEmbeddingEngine:
 
         self._assert_running()
         embeddings, usage = await self._batch_handler.image_embed(
-            images=images, matryoshka_dim=matryoshka_dim
+            images=images, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
         )
         return embeddings, usage
 
     async def audio_embed(
-        self, *, audios: list[Union[str, bytes]], matryoshka_dim: int | None = None
+        self,
+        *,
+        audios: list[Union[str, bytes]],
+        matryoshka_dim: int | None = None,
+        embedding_dtype: EmbeddingDtype | None = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple audios
 
         Kwargs:
             audios (list[Union[str, Audiobytes]]): list of audio data, to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -269,7 +363,7 @@ class AsyncEmbeddingEngine:
 
         self._assert_running()
         embeddings, usage = await self._batch_handler.audio_embed(
-            audios=audios, matryoshka_dim=matryoshka_dim
+            audios=audios, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
         )
         return embeddings, usage
 
@@ -319,7 +413,12 @@ class AsyncEngineArray:
             await engine.astop()
 
     async def embed(
-        self, *, model: str, sentences: list[str], matryoshka_dim: Optional[int] = None
+        self,
+        *,
+        model: str,
+        sentences: list[str],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple sentences
 
@@ -327,6 +426,8 @@ class AsyncEngineArray:
             model (str): model name to be used
             sentences (list[str]): sentences to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -338,7 +439,9 @@ class AsyncEngineArray:
                 2D list-array of shape( len(sentences),embed_dim )
             int: token usage
         """
-        return await self[model].embed(sentences, matryoshka_dim=matryoshka_dim)
+        return await self[model].embed(
+            sentences, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
 
     def is_running(self) -> bool:
         return all(engine.is_running for engine in self.engines_dict.values())
@@ -351,6 +454,8 @@ class AsyncEngineArray:
         docs: list[str],
         raw_scores: bool = False,
         top_n: Optional[int] = None,
+        prefilter_model: Optional[str] = None,
+        prefilter_top_m: int = 100,
     ) -> tuple[list["RerankReturnType"], int]:
         """rerank multiple sentences
 
@@ -360,18 +465,101 @@ class AsyncEngineArray:
             docs (list[str]): docs to be reranked
             raw_scores (bool): return raw scores instead of sigmoid
             top_n (Optional[int]): number of top scores to return after reranking
+            prefilter_model (Optional[str]): name of an embedding model in this array.
+                If set, only the `prefilter_top_m` docs with the highest cosine similarity
+                to the query are reranked. The others are returned after them,
+                with their cosine similarity as score and `prefilter_only=True`.
+            prefilter_top_m (int): number of docs that are reranked, if `prefilter_model` is set.
 
         Raises:
             ValueError: raised if engine is not started yet
             ModelNotDeployedError: If loaded model does not expose `rerank`
-                capabilities
+                capabilities, or the prefilter model does not expose `embed`
 
         Returns:
             list[float]: list of scores
             int: token usage
         """
+        if prefilter_model is not None:
+            return await cascade_rerank(
+                reranker=self[model],
+                embedder=self[prefilter_model],
+                query=query,
+                docs=docs,
+                top_m=prefilter_top_m,
+                raw_scores=raw_scores,
+                top_n=top_n,
+            )
         return await self[model].rerank(query=query, docs=docs, raw_scores=raw_scores, top_n=top_n)
 
+    async def rerank_many(
+        self,
+        *,
+        model: str,
+        queries: list[str],
+        docs: list[list[str]],
+        raw_scores: bool = False,
+        top_n: Optional[Sequence[Optional[int]]] = None,
+    ) -> tuple[list[list["RerankReturnType"]], int]:
+        """rerank multiple queries, each with its own documents, in one batch
+
+        Kwargs:
+            model (str): model name to be used
+            queries (list[str]): queries to be reranked
+            docs (list[list[str]]): docs to be reranked, one list per query
+            raw_scores (bool): return raw scores instead of sigmoid
+            top_n (Optional[Sequence[Optional[int]]]): number of top scores to return
+                after reranking, one per query
+
+        Raises:
+            ValueError: raised if engine is not started yet
+            ModelNotDeployedError: If loaded model does not expose `rerank`
+                capabilities
+
+        Returns:
+            list[list[RerankReturnType]]: list of scores, one list per query
+            int: token usage
+        """
+        return await self[model].rerank_many(
+            queries=queries, docs=docs, raw_scores=raw_scores, top_n=top_n
+        )
+
+    async def similarity(
+        self,
+        *,
+        model: str,
+        queries: list[str],
+        documents: list[str],
+        top_k: Optional[int] = None,
+        document_modality: Modality = Modality.text,
+    ) -> tuple[SimilarityReturnType, int]:
+        """embed queries and documents and score them against each other.
+
+        Multi-vector models (ColBERT, ColPali) are scored with late interaction (MaxSim).
+
+        Kwargs:
+            model (str): model name to be used
+            queries (list[str]): n sentences, the rows of the score matrix
+            documents (list[str]): m sentences or image urls, the columns of the score matrix
+            top_k (Optional[int]): if set, return only the top_k scores per row and their indices
+            document_modality (Modality): text or image documents, e.g. image for ColPali
+
+        Raises:
+            ValueError: raised if engine is not started yet
+            ModelNotDeployedError: If loaded model does not expose `embed`
+                capabilities, or `image_embed` for image documents
+
+        Returns:
+            SimilarityReturnType: [n, m] scores, or [n, top_k] scores sorted descending and indices
+            int: token usage
+        """
+        return await self[model].similarity(
+            queries=queries,
+            documents=documents,
+            top_k=top_k,
+            document_modality=document_modality,
+        )
+
     async def classify(
         self, *, model: str, sentences: list[str], raw_scores: bool = False
     ) -> tuple[list[ClassifyReturnType], int]:
@@ -399,6 +587,7 @@ class AsyncEngineArray:
         model: str,
         images: list[Union[str, "ImageClassType"]],
         matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple images
 
@@ -406,6 +595,8 @@ class AsyncEngineArray:
             model (str): model name to be used
             images (list[Union[str, ImageClassType]]): list of image urls or ImageClassType objects, to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -417,7 +608,9 @@ class AsyncEngineArray:
                 2D list-array of shape( len(sentences),embed_dim )
             int: token usage
         """
-        return await self[model].image_embed(images=images, matryoshka_dim=matryoshka_dim)
+        return await self[model].image_embed(
+            images=images, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
 
     def __getitem__(self, index_or_name: Union[str, int]) -> "AsyncEmbeddingEngine":
         """resolve engine by model name -> Auto resolve if only one engine is present
@@ -437,7 +630,12 @@ class AsyncEngineArray:
         )
 
     async def audio_embed(
-        self, *, model: str, audios: list[Union[str, bytes]], matryoshka_dim: Optional[int] = None
+        self,
+        *,
+        model: str,
+        audios: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """embed multiple audios
 
@@ -445,6 +643,8 @@ class AsyncEngineArray:
             model (str): model name to be used
             audios (list[Union[str, bytes]]): list of audio data, to be embedded
             matryoshka_dim (int): Length of matryoshka embedding
+            embedding_dtype (EmbeddingDtype): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the engine
 
         Raises:
             ValueError: raised if engine is not started yet
@@ -456,4 +656,6 @@ class AsyncEngineArray:
                 2D list-array of shape( len(sentences),embed_dim )
             int: token usage
         """
-        return await self[model].audio_embed(audios=audios, matryoshka_dim=matryoshka_dim)
+        return await self[model].audio_embed(
+            audios=audios, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
@@ -16,6 +16,7 @@ from infinity_emb.primitives import (
     EmbeddingDtype,
     EnumType,
     InferenceEngine,
+    OnnxSessionProfile,
     PoolingMethod,
 )
 
@@ -147,6 +148,12 @@ class __Infinity_EnvManager:
             self._optional_infinity_var_multiple("bettertransformer", default=["true"])
         )
 
+    @cached_property
+    def sequence_packing(self):
+        return self._to_bool_multiple(
+            self._optional_infinity_var_multiple("sequence_packing", default=["false"])
+        )
+
     @cached_property
     def preload_only(self):
         return self._to_bool(self._optional_infinity_var("preload_only", default="false"))
@@ -193,6 +200,14 @@ class __Infinity_EnvManager:
         assert size > 0, "INFINITY_QUEUE_SIZE must be a positive number"
         return size
 
+    @cached_property
+    def queue_token_budget(self) -> int:
+        size = int(
+            self._optional_infinity_var("queue_token_budget", default=str(self.queue_size * 256))
+        )
+        assert size > 0, "INFINITY_QUEUE_TOKEN_BUDGET must be a positive number"
+        return size
+
     @cached_property
     def max_client_batch_size(self) -> int:
         size = int(self._optional_infinity_var("max_client_batch_size", default="2048"))
@@ -211,6 +226,26 @@ class __Infinity_EnvManager:
     def proxy_root_path(self):
         return self._optional_infinity_var("proxy_root_path", default="")
 
+    @cached_property
+    def workers(self) -> int:
+        workers = int(self._optional_infinity_var("workers", default="1"))
+        assert workers > 0, "INFINITY_WORKERS must be a positive number"
+        return workers
+
+    @cached_property
+    def grpc_port(self) -> int:
+        port = int(self._optional_infinity_var("grpc_port", default="0"))
+        assert port >= 0, "INFINITY_GRPC_PORT must be a positive number, or 0 to disable"
+        return port
+
+    @cached_property
+    def local_transport_path(self):
+        return self._optional_infinity_var("local_transport_path", default="")
+
+    @cached_property
+    def collections_path(self):
+        return self._optional_infinity_var("collections_path", default="")
+
     @cached_property
     def port(self):
         port = self._optional_infinity_var("port", default="7997")
@@ -265,10 +300,46 @@ class __Infinity_EnvManager:
         return self._to_bool_multiple(
             self._optional_infinity_var_multiple("onnx_disable_optimize", default=["false"])
         )
-    
+
     @cached_property
     def onnx_do_not_prefer_quantized(self):
         return self._to_bool_multiple(
             self._optional_infinity_var_multiple("onnx_do_not_prefer_quantized", default=["false"])
         )
+
+    @cached_property
+    def pad_to_multiple_of(self):
+        return self._to_int_multiple(
+            self._optional_infinity_var_multiple("pad_to_multiple_of", default=["1"])
+        )
+
+    @cached_property
+    def preprocessing_workers(self):
+        return self._to_int_multiple(
+            self._optional_infinity_var_multiple("preprocessing_workers", default=["1"])
+        )
+
+    @cached_property
+    def cpu_replicas(self):
+        return self._to_int_multiple(
+            self._optional_infinity_var_multiple("cpu_replicas", default=["1"])
+        )
+
+    @cached_property
+    def onnx_session_profile(self) -> list[str]:
+        return self._typed_multiple("onnx_session_profile", OnnxSessionProfile)
+
+    @cached_property
+    def onnx_num_threads(self):
+        return self._to_int_multiple(
+            self._optional_infinity_var_multiple("onnx_num_threads", default=["0"])
+        )
+
+    @cached_property
+    def token_pool_factor(self):
+        return self._to_int_multiple(
+            self._optional_infinity_var_multiple("token_pool_factor", default=["1"])
+        )
+
+
 MANAGER = __Infinity_EnvManager()
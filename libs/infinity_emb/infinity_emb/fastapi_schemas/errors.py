@@ -23,11 +23,13 @@ class OpenAIException(Exception):
         code: int,
         type: Optional[str] = None,
         param: Optional[str] = None,
+        headers: Optional[dict[str, str]] = None,
     ):
         self.message = message
         self.type = type
         self.param = param
         self.code = code
+        self.headers = headers
 
     def json(self):
         return {
@@ -45,6 +47,7 @@ def openai_exception_handler(request: Request, exc: Exception):
         return ORJSONResponse(
             status_code=exc.code,
             content=exc.json(),
+            headers=exc.headers,
         )
     else:
         return ORJSONResponse(
@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+# IMPORT of this file requires pydantic 2.x
+"""
+Low-overhead parsing of plain text `/embeddings` requests.
+
+`MultiModalOpenAIEmbedding` stays the source of truth for the OpenAPI schema and
+for validation errors. The validator here only accepts the subset of requests it
+can verify with a few type checks and returns `None` for everything else,
+in which case the caller falls back to the full pydantic validation.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import orjson
+
+from infinity_emb.fastapi_schemas.pydantic_v2 import INPUT_STRING, ITEMS_LIMIT
+from infinity_emb.fastapi_schemas.pymodels import _OpenAIEmbeddingInput_Text
+from infinity_emb.primitives import EmbeddingDtype, EmbeddingEncodingFormat, Modality
+
+__all__ = ["TextEmbeddingFastValidator"]
+
+
+class TextEmbeddingFastValidator:
+    """Compiled validator for `_OpenAIEmbeddingInput_Text` request bodies.
+
+    Mirrors the constraints of the pydantic model:
+    strip whitespace of every input string, `max_length` per string,
+    `min_length`/`max_length` of the input list.
+    """
+
+    def __init__(
+        self,
+        max_string_length: int = INPUT_STRING.max_length,  # type: ignore[assignment]
+        min_items: int = ITEMS_LIMIT["min_length"],
+        max_items: int = ITEMS_LIMIT["max_length"],
+    ) -> None:
+        self.max_string_length = max_string_length
+        self.min_items = min_items
+        self.max_items = max_items
+        self._encoding_formats = {e.value: e for e in EmbeddingEncodingFormat}
+        self._embedding_dtypes = {e.value: e for e in EmbeddingDtype}
+        self._defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in _OpenAIEmbeddingInput_Text.model_fields.items()
+            if not field.is_required()
+        }
+
+    def _check_str(self, value: Any) -> Optional[str]:
+        if type(value) is not str:
+            return None
+        value = value.strip()
+        if len(value) > self.max_string_length:
+            return None
+        return value
+
+    def __call__(self, body: bytes) -> Optional[_OpenAIEmbeddingInput_Text]:
+        """parse and validate a raw request body.
+
+        Returns:
+            _OpenAIEmbeddingInput_Text: if the body is a valid text request
+            None: if the body needs the full pydantic validation (other modality or invalid)
+        """
+        try:
+            obj = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return None
+        if type(obj) is not dict:
+            return None
+        if obj.get("modality", Modality.text.value) != Modality.text.value:
+            return None
+
+        fields = dict(self._defaults)
+        fields["modality"] = Modality.text
+
+        inp = obj.get("input")
+        if type(inp) is list:
+            if not (self.min_items <= len(inp) <= self.max_items):
+                return None
+            checked = [self._check_str(s) for s in inp]
+            if None in checked:
+                return None
+            fields["input"] = checked
+        else:
+            checked_single = self._check_str(inp)
+            if checked_single is None:
+                return None
+            fields["input"] = checked_single
+
+        if "model" in obj:
+            if type(obj["model"]) is not str:
+                return None
+            fields["model"] = obj["model"]
+        if "encoding_format" in obj:
+            encoding_format = self._encoding_formats.get(obj["encoding_format"])  # type: ignore
+            if encoding_format is None:
+                return None
+            fields["encoding_format"] = encoding_format
+        if "user" in obj:
+            if obj["user"] is not None and type(obj["user"]) is not str:
+                return None
+            fields["user"] = obj["user"]
+        if "dimensions" in obj:
+            if type(obj["dimensions"]) is not int:
+                return None
+            fields["dimensions"] = obj["dimensions"]
+        if obj.get("embedding_dtype") is not None:
+            if type(obj["embedding_dtype"]) is not str:
+                return None
+            embedding_dtype = self._embedding_dtypes.get(obj["embedding_dtype"])
+            if embedding_dtype is None:
+                return None
+            fields["embedding_dtype"] = embedding_dtype
+        if "packed" in obj:
+            if type(obj["packed"]) is not bool:
+                return None
+            fields["packed"] = obj["packed"]
+
+        return _OpenAIEmbeddingInput_Text.model_construct(**fields)
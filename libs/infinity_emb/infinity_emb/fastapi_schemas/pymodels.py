@@ -13,7 +13,8 @@ import numpy as np
 
 
 from infinity_emb._optional_imports import CHECK_PYDANTIC
-from infinity_emb.primitives import EmbeddingEncodingFormat, Modality
+from infinity_emb.primitives import EmbeddingDtype, EmbeddingEncodingFormat, Modality
+from infinity_emb.transformer.multi_vector import pack_multi_vector
 
 CHECK_PYDANTIC.mark_required()
 # pydantic 2.x is strictly needed starting v0.0.70
@@ -38,8 +39,10 @@ if TYPE_CHECKING:
     from infinity_emb.args import EngineArgs
     from infinity_emb.primitives import (
         ClassifyReturnType,
+        CollectionMatchReturnType,
         EmbeddingReturnType,
         RerankReturnType,
+        SimilarityReturnType,
     )
 
 DataURIorURL = Union[Annotated[DataURI, str], HttpUrl]
@@ -55,6 +58,10 @@ class _OpenAIEmbeddingInput(BaseModel):
     encoding_format: EmbeddingEncodingFormat = EmbeddingEncodingFormat.float
     user: Optional[str] = None
     dimensions: int = 0
+    # per-request output dtype, defaults to the `embedding_dtype` of the model
+    embedding_dtype: Optional[EmbeddingDtype] = None
+    # all embeddings in one buffer, see `_PackedEmbeddingObject`. For multi-vector models.
+    packed: bool = False
 
 
 class _OpenAIEmbeddingInput_Text(_OpenAIEmbeddingInput):
@@ -141,9 +148,31 @@ class _EmbeddingObject(BaseModel):
     index: int
 
 
+class _PackedEmbeddingObject(BaseModel):
+    """The embeddings of all inputs as one row-major [offsets[-1], dim] buffer.
+    Input i are the rows offsets[i]:offsets[i+1], i.e. its token vectors for
+    multi-vector models (ColBERT, ColPali), a single row otherwise.
+
+    `embedding` is the flat buffer as floats, or base64 of its raw bytes in `dtype`
+    (numpy notation, e.g. `<f4`, `|i1`). With bit-packing (binary, ubinary),
+    `dim` is the number of bytes per vector.
+    """
+
+    object: Literal["packed_embedding"] = "packed_embedding"
+    embedding: Union[list[float], bytes]
+    offsets: list[int]
+    dim: int
+    dtype: str
+
+
 class OpenAIEmbeddingResult(BaseModel):
     object: Literal["list"] = "list"
-    data: list[_EmbeddingObject]
+    data: list[
+        Annotated[
+            Union[_EmbeddingObject, _PackedEmbeddingObject],
+            Field(discriminator="object"),
+        ]
+    ]
     model: str
     usage: _Usage
     id: str = Field(default_factory=lambda: f"infinity-{uuid4()}")
@@ -155,14 +184,25 @@ class OpenAIEmbeddingResult(BaseModel):
         engine_args: "EngineArgs",
         usage: int,
         encoding_format: EmbeddingEncodingFormat = EmbeddingEncodingFormat.float,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
+        packed: bool = False,
     ) -> dict[str, Union[str, list[dict], dict]]:
+        if packed:
+            return dict(
+                model=engine_args.served_model_name,
+                data=[OpenAIEmbeddingResult._packed_object(embeddings, encoding_format)],
+                usage=dict(prompt_tokens=usage, total_tokens=usage),
+            )
         if encoding_format == EmbeddingEncodingFormat.base64:
-            if engine_args.embedding_dtype.uses_bitpacking():
+            embedding_dtype = embedding_dtype or engine_args.embedding_dtype
+            if embedding_dtype.uses_bitpacking():
                 raise ValueError(
-                    f"model {engine_args.served_model_name} does not support base64 encoding, as it uses uint8-bitpacking with {engine_args.embedding_dtype}"
+                    f"model {engine_args.served_model_name} does not support base64 encoding, as it uses uint8-bitpacking with {embedding_dtype}"
                 )
             embeddings = [
-                base64.b64encode(np.frombuffer(emb.astype(np.float32), dtype=np.float32))  # type: ignore
+                base64.b64encode(
+                    np.frombuffer(emb.astype(np.float32), dtype=np.float32)  # type: ignore
+                ).decode("utf-8")
                 for emb in embeddings
             ]  # type: ignore
         else:
@@ -180,6 +220,42 @@ class OpenAIEmbeddingResult(BaseModel):
             usage=dict(prompt_tokens=usage, total_tokens=usage),
         )
 
+    @staticmethod
+    def _packed_object(
+        embeddings: Union[Iterable["EmbeddingReturnType"], np.ndarray],
+        encoding_format: EmbeddingEncodingFormat,
+    ) -> dict:
+        """`_PackedEmbeddingObject` of the embeddings, without a copy if the embeddings
+        are consecutive views of one buffer, as returned by the models."""
+        matrices = [np.atleast_2d(e) for e in embeddings]  # type: ignore
+        buffer, lengths = pack_multi_vector(matrices)
+        if buffer.dtype.kind == "f":
+            buffer = buffer.astype(np.float32, copy=False)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if encoding_format == EmbeddingEncodingFormat.base64:
+            embedding: Union[str, list] = base64.b64encode(buffer).decode("utf-8")
+        else:
+            embedding = buffer.ravel().tolist()
+        return dict(
+            object="packed_embedding",
+            embedding=embedding,
+            offsets=offsets.tolist(),
+            dim=buffer.shape[1],
+            dtype=buffer.dtype.str,
+        )
+
+    @staticmethod
+    def with_defaults(response: dict) -> dict:
+        """adds the default fields to a `to_embeddings_response` dict.
+        Needed if the response is not validated via `response_model`."""
+        return dict(
+            object="list",
+            **response,
+            id=f"infinity-{uuid4()}",
+            created=int(time.time()),
+        )
+
 
 class ClassifyInput(BaseModel):
     input: conlist(  # type: ignore
@@ -218,6 +294,53 @@ class ClassifyResult(BaseModel):
         )
 
 
+class SimilarityInput(BaseModel):
+    """Input for a similarity matrix of queries x documents"""
+
+    queries: conlist(  # type: ignore
+        Annotated[str, INPUT_STRING],
+        **ITEMS_LIMIT,
+    )
+    documents: conlist(  # type: ignore
+        Annotated[str, INPUT_STRING],
+        **ITEMS_LIMIT,
+    )
+    model: str = "default/not-specified"
+    top_k: Optional[int] = Field(default=None, gt=0)
+    # `image`: documents are image urls, scored against text queries (e.g. ColPali)
+    document_modality: Literal[Modality.text, Modality.image] = Modality.text  # type: ignore
+
+
+class SimilarityResult(BaseModel):
+    """Similarity scores of queries (rows) x documents (columns).
+
+    Without `top_k`, `scores` is the [n_queries, n_documents] matrix and `indices` is null.
+    With `top_k`, `scores` holds the top_k scores per query, sorted descending,
+    and `indices` the document index of each score.
+    """
+
+    object: Literal["similarity"] = "similarity"
+    scores: list[list[float]]
+    indices: Optional[list[list[int]]] = None
+    model: str
+    usage: _Usage
+    id: str = Field(default_factory=lambda: f"infinity-{uuid4()}")
+    created: int = Field(default_factory=lambda: int(time.time()))
+
+    @staticmethod
+    def to_similarity_response(
+        similarity: "SimilarityReturnType",
+        model: str,
+        usage: int,
+    ) -> dict:
+        return dict(
+            model=model,
+            scores=similarity.scores.tolist(),
+            indices=similarity.indices.tolist() if similarity.indices is not None else None,
+            usage=dict(prompt_tokens=usage, total_tokens=usage),
+        )
+
+
 class RerankInput(BaseModel):
     """Input for reranking"""
 
@@ -230,12 +353,36 @@ class RerankInput(BaseModel):
     raw_scores: bool = False
     model: str = "default/not-specified"
     top_n: Optional[int] = Field(default=None, gt=0)
+    prefilter_model: Optional[str] = None
+    prefilter_top_m: int = Field(default=100, gt=0)
+
+
+class _RerankGroup(BaseModel):
+    query: Annotated[str, INPUT_STRING]
+    documents: conlist(  # type: ignore
+        Annotated[str, INPUT_STRING],
+        **ITEMS_LIMIT,
+    )
+    top_n: Optional[int] = Field(default=None, gt=0)
+
+
+class RerankManyInput(BaseModel):
+    """Input for reranking multiple queries, each with its own documents"""
+
+    groups: conlist(  # type: ignore
+        _RerankGroup,
+        **ITEMS_LIMIT,
+    )
+    return_documents: bool = False
+    raw_scores: bool = False
+    model: str = "default/not-specified"
 
 
 class _ReRankObject(BaseModel):
     relevance_score: float
     index: int
     document: Optional[str] = None
+    prefilter_only: bool = False
 
 
 class ReRankResult(BaseModel):
@@ -259,7 +406,11 @@ class ReRankResult(BaseModel):
             return dict(
                 model=model,
                 results=[
-                    dict(relevance_score=entry.relevance_score, index=entry.index)
+                    dict(
+                        relevance_score=entry.relevance_score,
+                        index=entry.index,
+                        prefilter_only=entry.prefilter_only,
+                    )
                     for entry in scores
                 ],
                 usage=dict(prompt_tokens=usage, total_tokens=usage),
@@ -272,6 +423,7 @@ class ReRankResult(BaseModel):
                         relevance_score=entry.relevance_score,
                         index=entry.index,
                         document=entry.document,
+                        prefilter_only=entry.prefilter_only,
                     )
                     for entry in scores
                 ],
@@ -279,6 +431,38 @@ class ReRankResult(BaseModel):
             )
 
 
+class ReRankManyResult(BaseModel):
+    """Results of reranking multiple queries, one list of results per query."""
+
+    object: Literal["rerank_many"] = "rerank_many"
+    results: list[list[_ReRankObject]]
+    model: str
+    usage: _Usage
+    id: str = Field(default_factory=lambda: f"infinity-{uuid4()}")
+    created: int = Field(default_factory=lambda: int(time.time()))
+
+    @staticmethod
+    def to_rerank_many_response(
+        scores: list[list["RerankReturnType"]],
+        model: str,
+        usage: int,
+        return_documents: bool,
+    ) -> dict:
+        return dict(
+            model=model,
+            results=[
+                ReRankResult.to_rerank_response(
+                    scores=scores_query,
+                    model=model,
+                    usage=usage,
+                    return_documents=return_documents,
+                )["results"]
+                for scores_query in scores
+            ],
+            usage=dict(prompt_tokens=usage, total_tokens=usage),
+        )
+
+
 class ModelInfo(BaseModel):
     id: str
     stats: dict[str, Any]
@@ -292,3 +476,99 @@ class ModelInfo(BaseModel):
 class OpenAIModelInfo(BaseModel):
     data: list[ModelInfo]
     object: str = "list"
+
+
+class CollectionUpsertInput(BaseModel):
+    """Input for embedding texts with `model` and upserting them into a collection by id"""
+
+    ids: conlist(  # type: ignore
+        Annotated[str, Field(min_length=1, max_length=512)],
+        **ITEMS_LIMIT,
+    )
+    input: conlist(  # type: ignore
+        Annotated[str, INPUT_STRING],
+        **ITEMS_LIMIT,
+    )
+    metadata: Optional[list[Optional[dict[str, Any]]]] = None
+    model: str = "default/not-specified"
+
+
+class CollectionDeleteInput(BaseModel):
+    ids: conlist(  # type: ignore
+        Annotated[str, Field(min_length=1, max_length=512)],
+        **ITEMS_LIMIT,
+    )
+
+
+class CollectionSearchInput(BaseModel):
+    """Input for searching a collection with texts, embedded by the model of the collection"""
+
+    input: conlist(  # type: ignore
+        Annotated[str, INPUT_STRING],
+        **ITEMS_LIMIT,
+    )
+    top_k: int = Field(default=10, gt=0, le=1024)
+
+
+class CollectionInfo(BaseModel):
+    name: str
+    model: str
+    embedding_dtype: str
+    count: int
+    object: Literal["collection"] = "collection"
+
+
+class CollectionList(BaseModel):
+    data: list[CollectionInfo]
+    object: str = "list"
+
+
+class CollectionUpsertResult(BaseModel):
+    object: Literal["collection.upsert"] = "collection.upsert"
+    collection: str
+    upserted: int
+    count: int
+    model: str
+    usage: _Usage
+
+
+class CollectionDeleteResult(BaseModel):
+    object: Literal["collection.delete"] = "collection.delete"
+    collection: str
+    deleted: int
+    count: int
+
+
+class _CollectionMatch(BaseModel):
+    id: str
+    score: float
+    metadata: Optional[dict[str, Any]] = None
+
+
+class CollectionSearchResult(BaseModel):
+    """The `top_k` matches of each input, sorted by descending similarity."""
+
+    object: Literal["collection.search"] = "collection.search"
+    collection: str
+    results: list[list[_CollectionMatch]]
+    model: str
+    usage: _Usage
+    id: str = Field(default_factory=lambda: f"infinity-{uuid4()}")
+    created: int = Field(default_factory=lambda: int(time.time()))
+
+    @staticmethod
+    def to_search_response(
+        matches: list[list["CollectionMatchReturnType"]],
+        collection: str,
+        model: str,
+        usage: int,
+    ) -> dict:
+        return dict(
+            collection=collection,
+            results=[
+                [dict(id=m.id, score=m.score, metadata=m.metadata) for m in query_matches]
+                for query_matches in matches
+            ],
+            model=model,
+            usage=dict(prompt_tokens=usage, total_tokens=usage),
+        )
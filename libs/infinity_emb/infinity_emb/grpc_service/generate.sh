@@ -0,0 +1,11 @@
+#!/bin/bash
+# regenerates the python stubs of infinity.proto. Run from any directory.
+set -euo pipefail
+
+cd "$(dirname "$0")/../.."
+python -m grpc_tools.protoc \
+  -I . \
+  --python_out=. \
+  --pyi_out=. \
+  --grpc_python_out=. \
+  infinity_emb/grpc_service/infinity.proto
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: infinity_emb/grpc_service/infinity.proto
+# Protobuf Python Version: 5.27.2
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    27,
+    2,
+    '',
+    'infinity_emb/grpc_service/infinity.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n(infinity_emb/grpc_service/infinity.proto\x12\x0binfinity.v1\"4\n\x06Tensor\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\r\n\x05shape\x18\x02 \x03(\x03\x12\r\n\x05\x64type\x18\x03 \x01(\t\"&\n\x05\x45rror\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x0f\n\rModelsRequest\">\n\tModelInfo\x12\n\n\x02id\x18\x01 \x01(\t\x12\x14\n\x0c\x63\x61pabilities\x18\x02 \x03(\t\x12\x0f\n\x07\x62\x61\x63kend\x18\x03 \x01(\t\"8\n\x0eModelsResponse\x12&\n\x06models\x18\x01 \x03(\x0b\x32\x16.infinity.v1.ModelInfo\"T\n\x0c\x45mbedRequest\x12\r\n\x05model\x18\x01 \x01(\t\x12\r\n\x05input\x18\x02 \x03(\t\x12\x12\n\ndimensions\x18\x03 \x01(\x05\x12\x12\n\nrequest_id\x18\x04 \x01(\t\"\xae\x01\n\rEmbedResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\'\n\nembeddings\x18\x02 \x01(\x0b\x32\x13.infinity.v1.Tensor\x12.\n\x11ragged_embeddings\x18\x03 \x03(\x0b\x32\x13.infinity.v1.Tensor\x12\r\n\x05usage\x18\x04 \x01(\x03\x12!\n\x05\x65rror\x18\x0f \x01(\x0b\x32\x12.infinity.v1.Error\"\x91\x01\n\rRerankRequest\x12\r\n\x05model\x18\x01 \x01(\t\x12\r\n\x05query\x18\x02 \x01(\t\x12\x11\n\tdocuments\x18\x03 \x03(\t\x12\x18\n\x10return_documents\x18\x04 \x01(\x08\x12\x12\n\nraw_scores\x18\x05 \x01(\x08\x12\r\n\x05top_n\x18\x06 \x01(\x05\x12\x12\n\nrequest_id\x18\x07 \x01(\t\"H\n\x0cRerankResult\x12\x17\n\x0frelevance_score\x18\x01 \x01(\x02\x12\r\n\x05index\x18\x02 \x01(\x05\x12\x10\n\x08\x64ocument\x18\x03 \x01(\t\"\x82\x01\n\x0eRerankResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12*\n\x07results\x18\x02 \x03(\x0b\x32\x19.infinity.v1.RerankResult\x12\r\n\x05usage\x18\x03 \x01(\x03\x12!\n\x05\x65rror\x18\x0f \x01(\x0b\x32\x12.infinity.v1.Error\"W\n\x0f\x43lassifyRequest\x12\r\n\x05model\x18\x01 \x01(\t\x12\r\n\x05input\x18\x02 \x03(\t\x12\x12\n\nraw_scores\x18\x03 \x01(\x08\x12\x12\n\nrequest_id\x18\x04 \x01(\t\"-\n\rClassifyLabel\x12\r\n\x05label\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\"<\n\x0e\x43lassifyResult\x12*\n\x06labels\x18\x01 \x03(\x0b\x32\x1a.infinity.v1.ClassifyLabel\"\x86\x01\n\x10\x43lassifyResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12,\n\x07results\x18\x02 \x03(\x0b\x32\x1b.infinity.v1.ClassifyResult\x12\r\n\x05usage\x18\x03 \x01(\x03\x12!\n\x05\x65rror\x18\x0f \x01(\x0b\x32\x12.infinity.v1.Error2\x83\x04\n\x08Infinity\x12\x41\n\x06Models\x12\x1a.infinity.v1.ModelsRequest\x1a\x1b.infinity.v1.ModelsResponse\x12>\n\x05\x45mbed\x12\x19.infinity.v1.EmbedRequest\x1a\x1a.infinity.v1.EmbedResponse\x12H\n\x0b\x45mbedStream\x12\x19.infinity.v1.EmbedRequest\x1a\x1a.infinity.v1.EmbedResponse(\x01\x30\x01\x12\x41\n\x06Rerank\x12\x1a.infinity.v1.RerankRequest\x1a\x1b.infinity.v1.RerankResponse\x12K\n\x0cRerankStream\x12\x1a.infinity.v1.RerankRequest\x1a\x1b.infinity.v1.RerankResponse(\x01\x30\x01\x12G\n\x08\x43lassify\x12\x1c.infinity.v1.ClassifyRequest\x1a\x1d.infinity.v1.ClassifyResponse\x12Q\n\x0e\x43lassifyStream\x12\x1c.infinity.v1.ClassifyRequest\x1a\x1d.infinity.v1.ClassifyResponse(\x01\x30\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'infinity_emb.grpc_service.infinity_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_TENSOR']._serialized_start=57
+  _globals['_TENSOR']._serialized_end=109
+  _globals['_ERROR']._serialized_start=111
+  _globals['_ERROR']._serialized_end=149
+  _globals['_MODELSREQUEST']._serialized_start=151
+  _globals['_MODELSREQUEST']._serialized_end=166
+  _globals['_MODELINFO']._serialized_start=168
+  _globals['_MODELINFO']._serialized_end=230
+  _globals['_MODELSRESPONSE']._serialized_start=232
+  _globals['_MODELSRESPONSE']._serialized_end=288
+  _globals['_EMBEDREQUEST']._serialized_start=290
+  _globals['_EMBEDREQUEST']._serialized_end=374
+  _globals['_EMBEDRESPONSE']._serialized_start=377
+  _globals['_EMBEDRESPONSE']._serialized_end=551
+  _globals['_RERANKREQUEST']._serialized_start=554
+  _globals['_RERANKREQUEST']._serialized_end=699
+  _globals['_RERANKRESULT']._serialized_start=701
+  _globals['_RERANKRESULT']._serialized_end=773
+  _globals['_RERANKRESPONSE']._serialized_start=776
+  _globals['_RERANKRESPONSE']._serialized_end=906
+  _globals['_CLASSIFYREQUEST']._serialized_start=908
+  _globals['_CLASSIFYREQUEST']._serialized_end=995
+  _globals['_CLASSIFYLABEL']._serialized_start=997
+  _globals['_CLASSIFYLABEL']._serialized_end=1042
+  _globals['_CLASSIFYRESULT']._serialized_start=1044
+  _globals['_CLASSIFYRESULT']._serialized_end=1104
+  _globals['_CLASSIFYRESPONSE']._serialized_start=1107
+  _globals['_CLASSIFYRESPONSE']._serialized_end=1241
+  _globals['_INFINITY']._serialized_start=1244
+  _globals['_INFINITY']._serialized_end=1759
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,357 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from infinity_emb.grpc_service import infinity_pb2 as infinity__emb_dot_grpc__service_dot_infinity__pb2
+
+GRPC_GENERATED_VERSION = '1.66.2'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in infinity_emb/grpc_service/infinity_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class InfinityStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Models = channel.unary_unary(
+                '/infinity.v1.Infinity/Models',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsResponse.FromString,
+                _registered_method=True)
+        self.Embed = channel.unary_unary(
+                '/infinity.v1.Infinity/Embed',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.FromString,
+                _registered_method=True)
+        self.EmbedStream = channel.stream_stream(
+                '/infinity.v1.Infinity/EmbedStream',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.FromString,
+                _registered_method=True)
+        self.Rerank = channel.unary_unary(
+                '/infinity.v1.Infinity/Rerank',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.FromString,
+                _registered_method=True)
+        self.RerankStream = channel.stream_stream(
+                '/infinity.v1.Infinity/RerankStream',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.FromString,
+                _registered_method=True)
+        self.Classify = channel.unary_unary(
+                '/infinity.v1.Infinity/Classify',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.FromString,
+                _registered_method=True)
+        self.ClassifyStream = channel.stream_stream(
+                '/infinity.v1.Infinity/ClassifyStream',
+                request_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.SerializeToString,
+                response_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.FromString,
+                _registered_method=True)
+
+
+class InfinityServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def Models(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Embed(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EmbedStream(self, request_iterator, context):
+        """Responses are sent as soon as they are ready and may be out of order.
+        Use `request_id` to correlate them with the requests.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Rerank(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RerankStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Classify(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ClassifyStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_InfinityServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Models': grpc.unary_unary_rpc_method_handler(
+                    servicer.Models,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsResponse.SerializeToString,
+            ),
+            'Embed': grpc.unary_unary_rpc_method_handler(
+                    servicer.Embed,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.SerializeToString,
+            ),
+            'EmbedStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.EmbedStream,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.SerializeToString,
+            ),
+            'Rerank': grpc.unary_unary_rpc_method_handler(
+                    servicer.Rerank,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.SerializeToString,
+            ),
+            'RerankStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.RerankStream,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.SerializeToString,
+            ),
+            'Classify': grpc.unary_unary_rpc_method_handler(
+                    servicer.Classify,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.SerializeToString,
+            ),
+            'ClassifyStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.ClassifyStream,
+                    request_deserializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.FromString,
+                    response_serializer=infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'infinity.v1.Infinity', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('infinity.v1.Infinity', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Infinity(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Models(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/infinity.v1.Infinity/Models',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ModelsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Embed(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/infinity.v1.Infinity/Embed',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EmbedStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/infinity.v1.Infinity/EmbedStream',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.EmbedResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Rerank(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/infinity.v1.Infinity/Rerank',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RerankStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/infinity.v1.Infinity/RerankStream',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.RerankResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Classify(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/infinity.v1.Infinity/Classify',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ClassifyStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/infinity.v1.Infinity/ClassifyStream',
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyRequest.SerializeToString,
+            infinity__emb_dot_grpc__service_dot_infinity__pb2.ClassifyResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,292 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""gRPC server of infinity_emb, sharing the `AsyncEngineArray` with the REST API."""
+
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, TypeVar
+
+import numpy as np
+
+from infinity_emb._optional_imports import CHECK_GRPC
+from infinity_emb.env import MANAGER
+from infinity_emb.log_handler import logger
+from infinity_emb.primitives import MatryoshkaDimError, ModelNotDeployedError
+
+if CHECK_GRPC.is_available:
+    import grpc
+
+    from infinity_emb.grpc_service import infinity_pb2, infinity_pb2_grpc
+
+if TYPE_CHECKING:
+    from infinity_emb.engine import AsyncEmbeddingEngine, AsyncEngineArray
+
+__all__ = ["InfinityServicer", "start_grpc_server"]
+
+RequestT = TypeVar("RequestT")
+ResponseT = TypeVar("ResponseT")
+
+# max number of requests per stream that are processed concurrently
+MAX_INFLIGHT_PER_STREAM = 64
+
+
+class GrpcError(Exception):
+    def __init__(self, code: "grpc.StatusCode", message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def pack_embeddings(embeddings: list, response: "infinity_pb2.EmbedResponse") -> None:
+    """write embeddings as packed tensors into the response"""
+    arrays = [np.asarray(e) for e in embeddings]
+    if arrays and all(a.shape == arrays[0].shape for a in arrays):
+        stacked = np.ascontiguousarray(np.stack(arrays))
+        response.embeddings.data = stacked.tobytes()
+        response.embeddings.shape.extend(stacked.shape)
+        response.embeddings.dtype = stacked.dtype.str
+    else:
+        for a in arrays:
+            a = np.ascontiguousarray(a)
+            response.ragged_embeddings.add(data=a.tobytes(), shape=a.shape, dtype=a.dtype.str)
+
+
+def unpack_tensor(tensor: "infinity_pb2.Tensor") -> np.ndarray:
+    """inverse of `pack_embeddings`, zero-copy view of the tensor data"""
+    return np.frombuffer(tensor.data, dtype=np.dtype(tensor.dtype)).reshape(tuple(tensor.shape))
+
+
+class _AuthInterceptor(grpc.aio.ServerInterceptor if CHECK_GRPC.is_available else object):  # type: ignore
+    """rejects calls without `authorization: Bearer <api_key>` metadata"""
+
+    def __init__(self, api_key: str) -> None:
+        self._expected = f"Bearer {api_key}"
+
+        async def deny(request, context):
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Invalid or missing api key")
+
+        self._deny_unary = grpc.unary_unary_rpc_method_handler(deny)
+        self._deny_stream = grpc.stream_stream_rpc_method_handler(deny)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        metadata = dict(handler_call_details.invocation_metadata or ())
+        if metadata.get("authorization") == self._expected:
+            return await continuation(handler_call_details)
+        if handler_call_details.method.endswith("Stream"):
+            return self._deny_stream
+        return self._deny_unary
+
+
+class InfinityServicer(infinity_pb2_grpc.InfinityServicer if CHECK_GRPC.is_available else object):  # type: ignore
+    def __init__(self, engine_array: "AsyncEngineArray") -> None:
+        self.engine_array = engine_array
+
+    def _resolve_engine(self, model: str) -> "AsyncEmbeddingEngine":
+        try:
+            engine = self.engine_array[model]
+        except IndexError as ex:
+            raise GrpcError(grpc.StatusCode.NOT_FOUND, f"Invalid model: {ex}")
+        if engine.is_overloaded():
+            retry_after = engine.overload_status().retry_after
+            raise GrpcError(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                f"model {model} is currently overloaded, retry after {retry_after}s",
+            )
+        return engine
+
+    @staticmethod
+    def _validate_input(input: list[str]) -> None:
+        if not 1 <= len(input) <= MANAGER.max_client_batch_size:
+            raise GrpcError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"input must contain between 1 and {MANAGER.max_client_batch_size} items, got {len(input)}",
+            )
+
+    async def _embed(self, request: "infinity_pb2.EmbedRequest") -> "infinity_pb2.EmbedResponse":
+        self._validate_input(request.input)
+        engine = self._resolve_engine(request.model)
+        try:
+            embeddings, usage = await engine.embed(
+                sentences=list(request.input), matryoshka_dim=request.dimensions or None
+            )
+        except ModelNotDeployedError as ex:
+            raise GrpcError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"ModelNotDeployedError: model=`{request.model}` does not support `embed`. Reason: {ex}",
+            )
+        except MatryoshkaDimError as ex:
+            raise GrpcError(grpc.StatusCode.INVALID_ARGUMENT, f"MatryoshkaDimError: {ex}")
+        response = infinity_pb2.EmbedResponse(request_id=request.request_id, usage=usage)
+        pack_embeddings(embeddings, response)
+        return response
+
+    async def _rerank(self, request: "infinity_pb2.RerankRequest") -> "infinity_pb2.RerankResponse":
+        self._validate_input(request.documents)
+        engine = self._resolve_engine(request.model)
+        try:
+            scores, usage = await engine.rerank(
+                query=request.query,
+                docs=list(request.documents),
+                raw_scores=request.raw_scores,
+                top_n=request.top_n or None,
+            )
+        except ModelNotDeployedError as ex:
+            raise GrpcError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"ModelNotDeployedError: model=`{request.model}` does not support `rerank`. Reason: {ex}",
+            )
+        response = infinity_pb2.RerankResponse(request_id=request.request_id, usage=usage)
+        for score in scores:
+            response.results.add(
+                relevance_score=score.relevance_score,
+                index=score.index,
+                document=score.document if request.return_documents else "",
+            )
+        return response
+
+    async def _classify(
+        self, request: "infinity_pb2.ClassifyRequest"
+    ) -> "infinity_pb2.ClassifyResponse":
+        self._validate_input(request.input)
+        engine = self._resolve_engine(request.model)
+        try:
+            scores_labels, usage = await engine.classify(
+                sentences=list(request.input), raw_scores=request.raw_scores
+            )
+        except ModelNotDeployedError as ex:
+            raise GrpcError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"ModelNotDeployedError: model=`{request.model}` does not support `classify`. Reason: {ex}",
+            )
+        response = infinity_pb2.ClassifyResponse(request_id=request.request_id, usage=usage)
+        for labels in scores_labels:
+            result = response.results.add()
+            for label in labels:
+                result.labels.add(label=label["label"], score=label["score"])
+        return response
+
+    @staticmethod
+    async def _unary(
+        handler: Callable[[RequestT], Awaitable[ResponseT]], request: RequestT, context
+    ) -> ResponseT:
+        try:
+            return await handler(request)
+        except GrpcError as ex:
+            await context.abort(ex.code, ex.message)
+        except Exception as ex:
+            logger.exception(f"gRPC request failed: {ex}")
+            await context.abort(grpc.StatusCode.INTERNAL, f"InternalServerError: {ex}")
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    async def _stream(
+        handler: Callable[[RequestT], Awaitable[ResponseT]],
+        response_cls: type,
+        request_iterator: AsyncIterator[RequestT],
+    ) -> AsyncIterator[ResponseT]:
+        """processes the requests of a stream concurrently, yields responses once ready"""
+        responses: asyncio.Queue = asyncio.Queue()
+        inflight = asyncio.Semaphore(MAX_INFLIGHT_PER_STREAM)
+
+        async def respond(request):
+            try:
+                response = await handler(request)
+            except GrpcError as ex:
+                response = response_cls(
+                    request_id=request.request_id,
+                    error=infinity_pb2.Error(code=ex.code.value[0], message=ex.message),
+                )
+            except Exception as ex:
+                logger.exception(f"gRPC request failed: {ex}")
+                response = response_cls(
+                    request_id=request.request_id,
+                    error=infinity_pb2.Error(
+                        code=grpc.StatusCode.INTERNAL.value[0],
+                        message=f"InternalServerError: {ex}",
+                    ),
+                )
+            finally:
+                inflight.release()
+            responses.put_nowait(response)
+
+        async def consume():
+            tasks = set()
+            async for request in request_iterator:
+                await inflight.acquire()
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+            responses.put_nowait(None)
+
+        consumer = asyncio.create_task(consume())
+        try:
+            while (response := await responses.get()) is not None:
+                yield response
+        finally:
+            consumer.cancel()
+        # propagate errors of the request iterator
+        if consumer.done() and not consumer.cancelled() and consumer.exception():
+            raise consumer.exception()  # type: ignore[misc]
+
+    async def Models(self, request, context):
+        response = infinity_pb2.ModelsResponse()
+        for engine in self.engine_array:
+            response.models.add(
+                id=engine.engine_args.served_model_name,
+                capabilities=sorted(engine.capabilities),
+                backend=engine.engine_args.engine.name,
+            )
+        return response
+
+    async def Embed(self, request, context):
+        return await self._unary(self._embed, request, context)
+
+    async def EmbedStream(self, request_iterator, context):
+        async for response in self._stream(
+            self._embed, infinity_pb2.EmbedResponse, request_iterator
+        ):
+            yield response
+
+    async def Rerank(self, request, context):
+        return await self._unary(self._rerank, request, context)
+
+    async def RerankStream(self, request_iterator, context):
+        async for response in self._stream(
+            self._rerank, infinity_pb2.RerankResponse, request_iterator
+        ):
+            yield response
+
+    async def Classify(self, request, context):
+        return await self._unary(self._classify, request, context)
+
+    async def ClassifyStream(self, request_iterator, context):
+        async for response in self._stream(
+            self._classify, infinity_pb2.ClassifyResponse, request_iterator
+        ):
+            yield response
+
+
+async def start_grpc_server(
+    engine_array: "AsyncEngineArray",
+    address: str,
+    api_key: str = "",
+) -> "grpc.aio.Server":
+    """starts the gRPC server on `address`, e.g. "0.0.0.0:7998". Stop it via `await server.stop(grace)`."""
+    CHECK_GRPC.mark_required()
+    interceptors = [_AuthInterceptor(api_key)] if api_key else []
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        options=[
+            ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+            ("grpc.max_send_message_length", 64 * 1024 * 1024),
+        ],
+    )
+    infinity_pb2_grpc.add_InfinityServicer_to_server(InfinityServicer(engine_array), server)
+    bound_port = server.add_insecure_port(address)
+    if bound_port == 0:
+        raise RuntimeError(f"gRPC server could not bind to {address}")
+    await server.start()
+    logger.info(f"gRPC server listening on {address}")
+    return server
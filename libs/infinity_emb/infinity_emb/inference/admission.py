@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Admission control of the BatchHandler, based on the queued token budget."""
+
+import math
+import time
+from typing import Optional
+
+
+class TokenAdmission:
+    """Tracks the queued cost (tokens) of a BatchHandler and its measured throughput.
+
+    Cost is the length of an item as used for scheduling, i.e. tokens if
+    `lengths_via_tokenize=True`, otherwise the number of characters.
+
+    Not thread-safe, call all methods from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_queued_tokens: int,
+        ema_alpha: float = 0.3,
+        min_window: float = 0.25,
+    ) -> None:
+        """
+        Args:
+            max_queued_tokens (int): budget of queued tokens, above which requests are rejected.
+            ema_alpha (float, optional): smoothing of the throughput measurement.
+            min_window (float, optional): min seconds of a throughput measurement,
+                unless the queue is fully drained earlier.
+        """
+        if max_queued_tokens <= 0:
+            raise ValueError(f"max_queued_tokens must be positive, got {max_queued_tokens}")
+        self.max_queued_tokens = max_queued_tokens
+        self._ema_alpha = ema_alpha
+        self._min_window = min_window
+        self._queued_tokens = 0
+        self._tokens_per_second: Optional[float] = None
+        self._window_start: Optional[float] = None
+        self._window_tokens = 0
+
+    @property
+    def queued_tokens(self) -> int:
+        return self._queued_tokens
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """measured throughput while busy, None before the first measurement"""
+        return self._tokens_per_second
+
+    def add(self, tokens: int) -> None:
+        """account for tokens that have been queued"""
+        if self._window_start is None:
+            self._window_start = time.perf_counter()
+        self._queued_tokens += tokens
+
+    def complete(self, tokens: int) -> None:
+        """account for tokens that left the queue (completed or cancelled)"""
+        self._queued_tokens = max(0, self._queued_tokens - tokens)
+        self._window_tokens += tokens
+        if self._window_start is None:
+            return
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        drained = self._queued_tokens == 0
+        if elapsed >= self._min_window or (drained and elapsed > 0):
+            rate = self._window_tokens / elapsed
+            if self._tokens_per_second is None:
+                self._tokens_per_second = rate
+            else:
+                self._tokens_per_second = (
+                    self._ema_alpha * rate + (1 - self._ema_alpha) * self._tokens_per_second
+                )
+            self._window_tokens = 0
+            # an idle period does not count towards the throughput
+            self._window_start = None if drained else now
+
+    def is_overloaded(self) -> bool:
+        return self._queued_tokens > self.max_queued_tokens
+
+    def queue_fraction(self) -> float:
+        return self._queued_tokens / self.max_queued_tokens
+
+    def estimated_drain_time(self) -> Optional[float]:
+        """seconds until the current queue is processed, None if the throughput is unknown"""
+        if not self._tokens_per_second:
+            return None
+        return self._queued_tokens / self._tokens_per_second
+
+    def retry_after(self) -> int:
+        """seconds until the queue is expected to be below the budget again. At least 1."""
+        if not self._tokens_per_second:
+            return 1
+        excess = self._queued_tokens - self.max_queued_tokens
+        return max(1, math.ceil(excess / self._tokens_per_second))
@@ -4,39 +4,53 @@
 """This file contains the dynamic batching logic of multiple requests"""
 
 import asyncio
+import os
 import queue
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from queue import Queue
-from typing import Any, Optional, Sequence, Union, TYPE_CHECKING
+from typing import Any, Callable, Optional, Sequence, Union, TYPE_CHECKING
 
 import numpy as np
 
 from infinity_emb.env import MANAGER
+from infinity_emb.inference.admission import TokenAdmission
 from infinity_emb.inference.caching_layer import Cache
+from infinity_emb.inference.loading_strategy import pin_current_thread
 from infinity_emb.inference.queue import CustomFIFOQueue, ResultKVStoreFuture
+from infinity_emb.inference.similarity import score_embeddings
 from infinity_emb.inference.threading_asyncio import to_thread
 from infinity_emb.log_handler import logger
 from infinity_emb.primitives import (
     AbstractSingle,
     ClassifyReturnType,
+    EmbeddingDtype,
     EmbeddingReturnType,
     EmbeddingSingle,
     ImageClassType,
     ModelCapabilites,
     ModelNotDeployedError,
-    MatryoshkaDimError,
+    Modality,
     OverloadStatus,
     PredictSingle,
     PrioritizedQueueItem,
     RerankReturnType,
     ReRankSingle,
+    SimilarityReturnType,
     get_inner_item,
 )
 
 from infinity_emb.transformer.audio.utils import resolve_audios
-from infinity_emb.transformer.utils import get_lengths_with_tokenize
+from infinity_emb.transformer.quantization.interface import (
+    calibration_ranges,
+    quantize_embeddings_to,
+)
+from infinity_emb.transformer.utils import (
+    get_lengths_with_tokenize,
+    get_pair_lengths_with_tokenize,
+)
 from infinity_emb.transformer.vision.utils import resolve_images
 
 if TYPE_CHECKING:
@@ -62,16 +76,23 @@ class ThreadPoolExecutorReadOnly:
         return self._tp.submit(*args, **kwargs)
 
 
-def matryososka_slice(
-    embeddings: list[np.ndarray], matryoshka_dim: Optional[int]
-) -> list[np.ndarray]:
-    if matryoshka_dim:
-        if 1 > matryoshka_dim or matryoshka_dim > len(embeddings[0]):
-            raise MatryoshkaDimError(
-                f"matryoshka_dim={matryoshka_dim} is not in a valid range. Select between 1 and {len(embeddings[0])}."
-            )
-        return [e[:matryoshka_dim] for e in embeddings]
-    return embeddings
+def _to_rerank_results(
+    scores: Sequence[Any], docs: list[str], raw_scores: bool, top_n: Optional[int]
+) -> list[RerankReturnType]:
+    """sorts the scores of one query, highest first"""
+    if not raw_scores:
+        # perform sigmoid on scores
+        scores = 1 / (1 + np.exp(-np.array(scores)))  # type: ignore[assignment]
+
+    results = [
+        RerankReturnType(relevance_score=scores[i], index=i, document=docs[i])
+        for i in range(len(scores))
+    ]
+    results = sorted(results, key=lambda x: x.relevance_score, reverse=True)
+
+    if top_n is not None and top_n > 0:
+        results = results[:top_n]
+    return results
 
 
 class BatchHandler:
@@ -79,11 +100,13 @@ class BatchHandler:
         self,
         model_replicas: list["BaseTypeHint"],
         max_batch_size: int,
-        max_queue_wait: int = MANAGER.queue_size,
+        max_queued_tokens: int = MANAGER.queue_token_budget,
         batch_delay: float = 5e-3,
         vector_disk_cache_path: str = "",
         verbose=False,
         lengths_via_tokenize: bool = False,
+        cpu_core_mapping: Optional[list[list[int]]] = None,
+        preprocessing_workers: int = 1,
     ) -> None:
         """
         performs the scheduling of the dynamic batching around the model.
@@ -92,7 +115,8 @@ class BatchHandler:
         Args:
             model (BaseTransformer): the base class of the model to be used
             max_batch_size (int): max batch size of dynamic batch size
-            max_queue_wait (int, optional): max items to queue in the batch, default 32_000
+            max_queued_tokens (int, optional): budget of queued tokens, above which
+                `is_overloaded()` is True. Default INFINITY_QUEUE_TOKEN_BUDGET.
             batch_delay (float, optional): sleep in seconds, wait time for pre/post methods.
                 Best result: setting to 1/2 the minimal expected
                 time for core_encode method / "gpu inference".
@@ -100,13 +124,20 @@ class BatchHandler:
                 Should not be 0 to not block Python's GIL.
             vector_disk_cache_path (str, optional): path to cache vectors on disk.
             lengths_via_tokenize (bool, optional): if True, use the tokenizer to get the lengths else len()
+            cpu_core_mapping (list[list[int]], optional): cpu ids to pin the forward pass
+                of each model replica to. Defaults to None, no pinning.
+            preprocessing_workers (int, optional): batches preprocessed in parallel threads
+                per model replica. Defaults to 1.
         """
 
-        self._max_queue_wait = max_queue_wait
+        self._admission = TokenAdmission(max_queued_tokens=max_queued_tokens)
         self._lengths_via_tokenize = lengths_via_tokenize
 
         self._shutdown = threading.Event()
-        self._threadpool = ThreadPoolExecutor()
+        # the long-running loops (1 + 3 per ModelWorker) on top of the default size
+        self._threadpool = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) + 4) + 1 + 3 * len(model_replicas)
+        )
         self._queue_prio = CustomFIFOQueue()
         self._publish_to_model_queue: Queue = Queue(8)
         self._result_queue: Queue = Queue(8)
@@ -125,6 +156,8 @@ class BatchHandler:
             else None
         )
         self._result_store = ResultKVStoreFuture(cache)
+        # matryoshka dims with int8 / uint8 calibration ranges
+        self._calibrated: set[Optional[int]] = set()
 
         # model
         self.model_worker = [
@@ -136,26 +169,30 @@ class BatchHandler:
                 output_q=self._result_queue,
                 verbose=self._verbose,
                 batch_delay=batch_delay,
+                cpu_cores=cpu_cores,
+                preprocessing_workers=preprocessing_workers,
+            )
+            for model_replica, cpu_cores in zip(
+                model_replicas, cpu_core_mapping or [None] * len(model_replicas)
             )
-            for model_replica in model_replicas
         ]
 
         if batch_delay > 0.1:
             logger.warning(f"high batch delay of {batch_delay}")
-        if max_batch_size > max_queue_wait * 10:
-            logger.warning(
-                f"queue_size={self._max_queue_wait} to small "
-                f"over batch_size={max_batch_size}."
-                " Consider increasing queue size"
-            )
 
     async def embed(
-        self, sentences: list[str], matryoshka_dim: Optional[int] = None
+        self,
+        sentences: list[str],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """Schedule a sentence to be embedded. Awaits until embedded.
 
         Args:
             sentences (list[str]): Sentences to be embedded
+            matryoshka_dim (Optional[int]): truncate the embeddings to this dimension
+            embedding_dtype (Optional[EmbeddingDtype]): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the model
 
         Raises:
             ModelNotDeployedError: If loaded model does not expose `embed`
@@ -172,7 +209,7 @@ class BatchHandler:
         input_sentences = [EmbeddingSingle(sentence=s) for s in sentences]
 
         embeddings, usage = await self._schedule(input_sentences)
-        return matryososka_slice(embeddings, matryoshka_dim), usage
+        return await self._embeddings_post(embeddings, matryoshka_dim, embedding_dtype), usage
 
     async def rerank(
         self,
@@ -205,21 +242,121 @@ class BatchHandler:
         rerankables = [ReRankSingle(query=query, document=doc) for doc in docs]
         scores, usage = await self._schedule(rerankables)
 
-        if not raw_scores:
-            # perform sigmoid on scores
-            scores = 1 / (1 + np.exp(-np.array(scores)))
+        return _to_rerank_results(scores, docs, raw_scores=raw_scores, top_n=top_n), usage
 
-        results = [
-            RerankReturnType(relevance_score=scores[i], index=i, document=docs[i])
-            for i in range(len(scores))
-        ]
-        results = sorted(results, key=lambda x: x.relevance_score, reverse=True)
+    async def rerank_many(
+        self,
+        queries: list[str],
+        docs: list[list[str]],
+        raw_scores: bool = False,
+        top_n: Optional[Sequence[Optional[int]]] = None,
+    ) -> tuple[list[list[RerankReturnType]], int]:
+        """Schedule multiple queries, each with its own documents, to be reranked.
+        All pairs are scheduled at once. Awaits until all are reranked.
+
+        Args:
+            queries (list[str]): queries for reranking
+            docs (list[list[str]]): documents to be reranked, one list per query
+            raw_scores (bool): return raw scores instead of sigmoid
+            top_n (Optional[Sequence[Optional[int]]]): number of top scores to return, one per query.
+                if top_n is None, <= 0 or out of range, all scores are returned
+
+        Raises:
+            ModelNotDeployedError: If loaded model does not expose `rerank`
+                capabilities
 
-        if top_n is not None and top_n > 0:
-            results = results[:top_n]
+        Returns:
+            list[list[RerankReturnType]]: scores, one list per query
+            int: token usage of all queries
+        """
+        if "rerank" not in self.capabilities:
+            raise ModelNotDeployedError(
+                "the loaded moded cannot fullyfill `rerank`. " f"Options are {self.capabilities}."
+            )
+        if len(queries) != len(docs):
+            raise ValueError(f"got {len(queries)} queries, but {len(docs)} lists of documents.")
+        if top_n is None:
+            top_n = [None] * len(queries)
+        elif len(top_n) != len(queries):
+            raise ValueError(f"got {len(queries)} queries, but {len(top_n)} values of top_n.")
+
+        rerankables = [
+            ReRankSingle(query=query, document=doc)
+            for query, docs_query in zip(queries, docs)
+            for doc in docs_query
+        ]
+        if not rerankables:
+            return [[] for _ in queries], 0
+        scores, usage = await self._schedule(rerankables)
 
+        results = []
+        start = 0
+        for docs_query, top_n_query in zip(docs, top_n):
+            end = start + len(docs_query)
+            results.append(
+                _to_rerank_results(
+                    scores[start:end], docs_query, raw_scores=raw_scores, top_n=top_n_query
+                )
+            )
+            start = end
         return results, usage
 
+    async def similarity(
+        self,
+        queries: list[str],
+        documents: list[str],
+        embedding_dtype: EmbeddingDtype = EmbeddingDtype.float32,
+        top_k: Optional[int] = None,
+        document_modality: Modality = Modality.text,
+    ) -> tuple[SimilarityReturnType, int]:
+        """Schedule queries and documents to be embedded together and score them against
+        each other. Awaits until embedded and scored.
+
+        Multi-vector models (ColBERT, ColPali) are scored with late interaction (MaxSim).
+
+        Args:
+            queries (list[str]): n sentences, the rows of the score matrix
+            documents (list[str]): m sentences or image urls, the columns of the score matrix
+            embedding_dtype (EmbeddingDtype): dtype of the embeddings, selects the score function
+            top_k (Optional[int]): if set, only the top_k scores per row are returned
+            document_modality (Modality): text or image documents
+
+        Raises:
+            ModelNotDeployedError: If loaded model does not expose `embed`
+                capabilities, or `image_embed` for image documents
+
+        Returns:
+            SimilarityReturnType: [n, m] scores, or [n, top_k] scores and indices
+            int: token usage
+        """
+        if document_modality == Modality.image:
+            if not {"embed", "image_embed"} <= self.capabilities:
+                raise ModelNotDeployedError(
+                    "the loaded moded cannot fullyfill `embed` and `image_embed`. "
+                    f"Options are {self.capabilities}."
+                )
+            items: list[AbstractSingle] = [EmbeddingSingle(sentence=q) for q in queries]
+            items.extend(await resolve_images(documents))
+            embeddings, usage = await self._schedule(items)
+            embeddings = await self._embeddings_post(embeddings, None, embedding_dtype)
+        elif document_modality == Modality.text:
+            embeddings, usage = await self.embed(
+                sentences=[*queries, *documents], embedding_dtype=embedding_dtype
+            )
+        else:
+            raise ModelNotDeployedError(
+                f"similarity does not support documents of modality `{document_modality.value}`"
+            )
+        result = await to_thread(
+            score_embeddings,
+            self._threadpool,
+            embeddings[: len(queries)],
+            embeddings[len(queries) :],
+            embedding_dtype=embedding_dtype,
+            top_k=top_k,
+        )
+        return result, usage
+
     async def classify(
         self, *, sentences: list[str], raw_scores: bool = True
     ) -> tuple[list[ClassifyReturnType], int]:
@@ -255,11 +392,15 @@ class BatchHandler:
         *,
         images: list[Union[str, "ImageClassType", bytes]],
         matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """Schedule a images and sentences to be embedded. Awaits until embedded.
 
         Args:
             images (list[Union[str, ImageClassType]]): list of pre-signed urls or ImageClassType objects
+            matryoshka_dim (Optional[int]): truncate the embeddings to this dimension
+            embedding_dtype (Optional[EmbeddingDtype]): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the model
 
         Raises:
             ModelNotDeployedError: If loaded model does not expose `embed`
@@ -278,15 +419,22 @@ class BatchHandler:
 
         items = await resolve_images(images)
         embeddings, usage = await self._schedule(items)
-        return matryososka_slice(embeddings, matryoshka_dim), usage
+        return await self._embeddings_post(embeddings, matryoshka_dim, embedding_dtype), usage
 
     async def audio_embed(
-        self, *, audios: list[Union[str, bytes]], matryoshka_dim: Optional[int] = None
+        self,
+        *,
+        audios: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ) -> tuple[list["EmbeddingReturnType"], int]:
         """Schedule audios and sentences to be embedded. Awaits until embedded.
 
         Args:
             audios (list[NDArray]): list of raw wave data
+            matryoshka_dim (Optional[int]): truncate the embeddings to this dimension
+            embedding_dtype (Optional[EmbeddingDtype]): dtype of the returned embeddings,
+                defaults to the `embedding_dtype` of the model
 
         Raises:
             ModelNotDeployedError: If loaded model does not expose `embed`
@@ -308,7 +456,42 @@ class BatchHandler:
             getattr(self.model_worker[0]._model, "sampling_rate", -42),
         )
         embeddings, usage = await self._schedule(items)
-        return matryososka_slice(embeddings, matryoshka_dim), usage
+        return await self._embeddings_post(embeddings, matryoshka_dim, embedding_dtype), usage
+
+    async def _embeddings_post(
+        self,
+        embeddings: list[np.ndarray],
+        matryoshka_dim: Optional[int],
+        embedding_dtype: Optional[EmbeddingDtype],
+    ) -> list["EmbeddingReturnType"]:
+        """matryoshka truncation and quantization of the float embeddings of one request.
+
+        The model workers return float embeddings, so that one forward pass serves
+        requests of any `matryoshka_dim` and `embedding_dtype`.
+        """
+        model = self.model_worker[0]._model
+        embedding_dtype = EmbeddingDtype(embedding_dtype or model.embedding_dtype)  # type: ignore
+        if embedding_dtype == EmbeddingDtype.float32 and not matryoshka_dim:
+            return embeddings
+        if (
+            embedding_dtype in (EmbeddingDtype.int8, EmbeddingDtype.uint8)
+            and matryoshka_dim not in self._calibrated
+        ):
+            # calibrate once, on the core thread of the model, not in the shared threadpool
+            await asyncio.wrap_future(
+                self.model_worker[0].submit_to_core(
+                    calibration_ranges, model, matryoshka_dim or None
+                )
+            )
+            self._calibrated.add(matryoshka_dim)
+        return await to_thread(
+            quantize_embeddings_to,
+            self._threadpool,
+            model,
+            embeddings,
+            embedding_dtype,
+            matryoshka_dim,
+        )
 
     async def _schedule(self, list_queueitem: Sequence[AbstractSingle]) -> tuple[list[Any], int]:
         """adds list of items to the queue and awaits until these are completed."""
@@ -319,11 +502,14 @@ class BatchHandler:
 
         for re, p in zip(list_queueitem, prios):
             inner = inner_item(content=re, future=self.loop.create_future())  # type: ignore
+            # release the tokens from the budget, once completed or cancelled
+            inner.future.add_done_callback(lambda _, p=p: self._admission.complete(p))
             item = PrioritizedQueueItem(
                 priority=p,
                 item=inner,
             )
             new_prioqueue.append(item)
+        self._admission.add(sum(prios))
         self._queue_prio.extend(new_prioqueue)
 
         result = await asyncio.gather(
@@ -337,20 +523,24 @@ class BatchHandler:
         return self.model_worker[0].capabilities
 
     def is_overloaded(self) -> bool:
-        """checks if more items can be queued.
+        """checks if more items can be queued, based on the budget of queued tokens.
 
         Can be used on API level to reject requests if too many are queued and enable better autoscaling.
         """
-        return len(self._queue_prio) > self._max_queue_wait
+        return self._admission.is_overloaded()
 
     def overload_status(self) -> OverloadStatus:
         """
         returns info about the queue status
         """
         return OverloadStatus(
-            queue_fraction=len(self._queue_prio) / self._max_queue_wait,
+            queue_fraction=self._admission.queue_fraction(),
             queue_absolute=len(self._queue_prio),
             results_absolute=len(self._result_store),
+            queue_tokens=self._admission.queued_tokens,
+            tokens_per_second=self._admission.tokens_per_second,
+            estimated_drain_time=self._admission.estimated_drain_time(),
+            retry_after=self._admission.retry_after(),
         )
 
     async def _get_prios_usage(self, items: Sequence[AbstractSingle]) -> tuple[list[int], int]:
@@ -365,13 +555,30 @@ class BatchHandler:
         """
         if not self._lengths_via_tokenize:
             return get_lengths_with_tokenize([it.str_repr() for it in items])
-        else:
+        elif isinstance(items[0], ReRankSingle):
+            # the query is shared by many pairs, tokenize it once
             return await to_thread(
-                get_lengths_with_tokenize,
+                get_pair_lengths_with_tokenize,
                 self._threadpool,
-                _sentences=[it.str_repr() for it in items],
+                _queries=[it.query for it in items],  # type: ignore[attr-defined]
+                _documents=[it.document for it in items],  # type: ignore[attr-defined]
                 tokenize=self.model_worker[0].tokenize_lengths,
             )
+        else:
+            return await to_thread(self._tokenize_items, self._threadpool, items)
+
+    def _tokenize_items(self, items: Sequence[AbstractSingle]) -> tuple[list[int], int]:
+        """lengths of the items. If the model supports it, the token ids are kept on the
+        items, so that the preprocessing does not tokenize the sentences a second time."""
+        sentences = [it.str_repr() for it in items]
+        tokenized = self.model_worker[0].tokenize_ids(sentences)
+        if tokenized is None:
+            return get_lengths_with_tokenize(
+                sentences, tokenize=self.model_worker[0].tokenize_lengths
+            )
+        for item, input_ids in zip(items, tokenized[0]):
+            item.input_ids = input_ids  # type: ignore[attr-defined]
+        return tokenized[1], sum(tokenized[1])
 
     def _publish_towards_model(
         self,
@@ -492,9 +699,13 @@ class ModelWorker:
         output_q: Queue,
         batch_delay: float = 5e-3,
         verbose=False,
+        cpu_cores: Optional[list[int]] = None,
+        preprocessing_workers: int = 1,
     ) -> None:
         self._shutdown = shutdown
         self._model = model
+        # embedding models return float embeddings, quantized per request afterwards
+        self._quantize_per_request = "embed" in model.capabilities
         self._threadpool = threadpool
         self._feature_queue: Queue = Queue(3)
         self._postprocess_queue: Queue = Queue(5)
@@ -504,6 +715,16 @@ class ModelWorker:
         self._last_inference = time.perf_counter()
         self._verbose = verbose
         self._ready = False
+        self._cpu_cores = cpu_cores
+        self._preprocessing_workers = max(1, preprocessing_workers)
+        # calls that use the model, run by `_core_batch` between batches
+        self._core_tasks: Queue = Queue()
+        if self._preprocessing_workers > 1 and not getattr(model, "encode_pre_threadsafe", False):
+            logger.warning(
+                f"preprocessing of {type(model).__name__} is not thread-safe, "
+                "preprocessing batches in one thread."
+            )
+            self._preprocessing_workers = 1
 
     def spawn(self):
         if self._ready:
@@ -520,14 +741,93 @@ class ModelWorker:
     def tokenize_lengths(self, *args, **kwargs):
         return self._model.tokenize_lengths(*args, **kwargs)
 
+    def submit_to_core(self, fn: Callable, *args) -> Future:
+        """runs `fn(*args)` on the core thread, between two forward passes. For work that
+        calls the model, e.g. calibration, as the model is not safe to call concurrently
+        and the core thread may be pinned to cpu cores."""
+        future: Future = Future()
+        self._core_tasks.put((future, fn, args))
+        return future
+
+    def _run_core_tasks(self):
+        while True:
+            try:
+                future, fn, args = self._core_tasks.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except Exception as ex:
+                    future.set_exception(ex)
+
+    def _calibrate(self):
+        """int8 / uint8 ranges of the default `embedding_dtype`, before the first request"""
+        if self._quantize_per_request and self._model.embedding_dtype in (  # type: ignore
+            EmbeddingDtype.int8,
+            EmbeddingDtype.uint8,
+        ):
+            try:
+                calibration_ranges(self._model)  # type: ignore
+            except Exception as ex:
+                # retried by the first request that needs them
+                logger.warning(f"calibration of the quantization ranges failed: {ex}")
+
+    def tokenize_ids(self, *args, **kwargs):
+        return self._model.tokenize_ids(*args, **kwargs)
+
+    def _encode_pre(self, batch: list):
+        items_for_pre = [item.content.to_input() for item in batch]
+        input_ids = [getattr(item.content, "input_ids", None) for item in batch]
+        if all(ids is not None for ids in input_ids):
+            # tokenized while estimating the lengths, only pad and collate
+            feat = self._model.encode_pre_ids(input_ids)
+        else:
+            feat = self._model.encode_pre(items_for_pre)
+        if self._verbose:
+            logger.debug(
+                "[🏃->🧠] preprocessed %s requests",
+                len(items_for_pre),
+            )
+        return feat
+
+    def _put_features(self, feat, batch: list) -> None:
+        # while-loop just for shutdown
+        while not self._shutdown.is_set():
+            try:
+                self._feature_queue.put((feat, batch), timeout=QUEUE_TIMEOUT)
+                break
+            except queue.Full:
+                continue
+
     def _preprocess_batch(self):
-        """loops and checks if the _core_batch has worked on all items"""
+        """loops and checks if the _core_batch has worked on all items.
+
+        With `preprocessing_workers` > 1, up to that many batches are preprocessed in
+        parallel threads, and handed to `_core_batch` in the order they were received.
+        Only for models with `encode_pre_threadsafe`.
+        """
         logger.info("ready to batch requests.")
         self._ready = True
+        pool = (
+            ThreadPoolExecutor(self._preprocessing_workers, thread_name_prefix="infinity-pre")
+            if self._preprocessing_workers > 1
+            else None
+        )
+        # batches in preprocessing, oldest first
+        pending: deque[tuple[Future, list]] = deque()
         try:
             while not self._shutdown.is_set():
+                if pending and (
+                    pending[0][0].done() or len(pending) >= self._preprocessing_workers
+                ):
+                    future, batch = pending.popleft()
+                    self._put_features(future.result(), batch)
+                    continue
                 try:
-                    batch = self._input_q.get(timeout=QUEUE_TIMEOUT)
+                    batch = self._input_q.get(
+                        timeout=self._batch_delay if pending else QUEUE_TIMEOUT
+                    )
                 except queue.Empty:
                     continue
                 # optimal batch has been selected ->
@@ -537,34 +837,27 @@ class ModelWorker:
                     # add some stochastic delay
                     time.sleep(self._batch_delay * 2)
 
-                items_for_pre = [item.content.to_input() for item in batch]
-                feat = self._model.encode_pre(items_for_pre)
-                if self._verbose:
-                    logger.debug(
-                        "[🏃->🧠] preprocessed %s requests",
-                        len(items_for_pre),
-                    )
-                if self._shutdown.is_set():
-                    break
-                # while-loop just for shutdown
-                while not self._shutdown.is_set():
-                    try:
-                        self._feature_queue.put((feat, batch), timeout=QUEUE_TIMEOUT)
-                        break
-                    except queue.Full:
-                        continue
+                if pool is None:
+                    self._put_features(self._encode_pre(batch), batch)
+                else:
+                    pending.append((pool.submit(self._encode_pre, batch), batch))
         except Exception as ex:
             logger.exception(ex)
             raise ValueError("_preprocess_batch crashed")
         finally:
             self._ready = False
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
 
     def _core_batch(self):
         """waiting for preprocessed batches (on device)
         and do the forward pass / `.encode`
         """
         try:
+            pin_current_thread(self._cpu_cores)
+            self._calibrate()
             while not self._shutdown.is_set():
+                self._run_core_tasks()
                 try:
                     core_batch = self._feature_queue.get(timeout=QUEUE_TIMEOUT)
                 except queue.Empty:
@@ -586,6 +879,10 @@ class ModelWorker:
         except Exception as ex:
             logger.exception(ex)
             raise ValueError("_core_batch crashed.")
+        finally:
+            # nobody runs them anymore
+            while not self._core_tasks.empty():
+                self._core_tasks.get_nowait()[0].cancel()
 
     def _postprocess_batch(self):
         """collecting forward(.encode) results and put them into the output queue store"""
@@ -608,7 +905,11 @@ class ModelWorker:
                     # before proceeding
                     time.sleep(self._batch_delay)
                 embed, batch = post_batch
-                results = self._model.encode_post(embed)
+                if self._quantize_per_request:
+                    # quantized by `BatchHandler._embeddings_post`, per request
+                    results = self._model.encode_post(embed, _internal_skip_quanitzation=True)
+                else:
+                    results = self._model.encode_post(embed)
                 if self._verbose:
                     logger.debug("[🧠->🏁] postprocessed %s requests", len(batch))
                 # while-loop just for shutdown
@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Cascade reranking: an embedding model pre-filters the documents for the reranker."""
+
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from infinity_emb.inference.similarity import score_embeddings
+from infinity_emb.primitives import RerankReturnType
+
+if TYPE_CHECKING:
+    from infinity_emb.engine import AsyncEmbeddingEngine
+
+__all__ = ["cascade_rerank"]
+
+
+async def cascade_rerank(
+    *,
+    reranker: "AsyncEmbeddingEngine",
+    embedder: "AsyncEmbeddingEngine",
+    query: str,
+    docs: list[str],
+    top_m: int,
+    raw_scores: bool = False,
+    top_n: Optional[int] = None,
+) -> tuple[list[RerankReturnType], int]:
+    """rerank only the `top_m` documents that are most similar to the query, according to
+    the cosine similarity of the embeddings of `embedder` (see `similarity_scores`
+    for quantized embedding dtypes).
+
+    All documents are returned: first the reranked ones, sorted by relevance_score,
+    followed by the others, sorted by their similarity and marked with
+    `prefilter_only=True`.
+
+    Returns:
+        list[RerankReturnType]: scores, truncated to `top_n`
+        int: token usage of embedder and reranker
+    """
+    if top_m <= 0:
+        raise ValueError(f"top_m must be positive, got {top_m}")
+    if top_m >= len(docs):
+        return await reranker.rerank(query=query, docs=docs, raw_scores=raw_scores, top_n=top_n)
+
+    embeddings, usage_embed = await embedder.embed(sentences=[query, *docs])
+    # scored in the embedding_dtype of the embedder, e.g. hamming distances of binary embeddings
+    similarity = score_embeddings(
+        embeddings[:1], embeddings[1:], embedder.engine_args.embedding_dtype
+    ).scores[0]
+    order = np.argsort(-similarity, kind="stable")
+    candidates = order[:top_m].tolist()
+
+    scores, usage_rerank = await reranker.rerank(
+        query=query, docs=[docs[i] for i in candidates], raw_scores=raw_scores
+    )
+    results = [
+        RerankReturnType(
+            relevance_score=score.relevance_score,
+            document=score.document,
+            index=candidates[score.index],
+        )
+        for score in scores
+    ]
+    results.extend(
+        RerankReturnType(
+            relevance_score=float(similarity[i]),
+            document=docs[i],
+            index=i,
+            prefilter_only=True,
+        )
+        for i in order[top_m:].tolist()
+    )
+    if top_n is not None and top_n > 0:
+        results = results[:top_n]
+    return results, usage_embed + usage_rerank
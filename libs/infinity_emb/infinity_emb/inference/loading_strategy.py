@@ -1,5 +1,10 @@
+import os
+from pathlib import Path
+from typing import Optional
+
 from infinity_emb._optional_imports import CHECK_TORCH, CHECK_TRANSFORMERS, CHECK_XLA
 from infinity_emb.args import EngineArgs
+from infinity_emb.log_handler import logger
 from infinity_emb.primitives import InferenceEngine, Device, Dtype, DeviceID, LoadingStrategy
 
 
@@ -29,6 +34,60 @@ def _validate_availale_device_ids(
     return [f"{device}:{device_id}" for device_id in used_ids]
 
 
+def _parse_cpulist(cpulist: str) -> list[int]:
+    """e.g. "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in cpulist.strip().split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def _numa_node_of_cpu() -> dict[int, int]:
+    """cpu id -> NUMA node, empty if the topology is not exposed (non-linux)"""
+    node_of_cpu = {}
+    for node in Path("/sys/devices/system/node").glob("node[0-9]*"):
+        try:
+            for cpu in _parse_cpulist((node / "cpulist").read_text()):
+                node_of_cpu[cpu] = int(node.name[len("node") :])
+        except (OSError, ValueError):
+            continue
+    return node_of_cpu
+
+
+def cpu_core_sets(n_replicas: int) -> list[list[int]]:
+    """Splits the cpus available to this process into `n_replicas` disjoint, equally
+    sized sets. Cpus are ordered by NUMA node, so a set only spans several nodes
+    if there are fewer replicas than nodes."""
+    if not hasattr(os, "sched_getaffinity"):
+        raise ValueError("cpu replicas require `os.sched_getaffinity`, which is linux only.")
+    node_of_cpu = _numa_node_of_cpu()
+    cpus = sorted(os.sched_getaffinity(0), key=lambda cpu: (node_of_cpu.get(cpu, 0), cpu))
+    per_replica = len(cpus) // n_replicas
+    if per_replica == 0:
+        raise ValueError(f"cpu_replicas={n_replicas} exceeds the {len(cpus)} available cpus.")
+    if len(cpus) % n_replicas:
+        logger.warning(
+            f"{len(cpus) % n_replicas} of {len(cpus)} cpus are not used by the cpu replicas."
+        )
+    return [cpus[i * per_replica : (i + 1) * per_replica] for i in range(n_replicas)]
+
+
+def pin_current_thread(cpu_cores: Optional[list[int]]) -> None:
+    """Pins the calling thread to `cpu_cores`. Threads it creates afterwards, e.g. the
+    OpenMP team of torch, inherit the affinity. No-op for None."""
+    if not cpu_cores:
+        return
+    # on linux, pid 0 is the calling thread, not the whole process
+    os.sched_setaffinity(0, cpu_cores)
+    if CHECK_TORCH.is_available:
+        # process-wide in torch, but all replicas use equally sized sets
+        torch.set_num_threads(len(cpu_cores))
+
+
 def get_loading_strategy_torch(args: EngineArgs) -> LoadingStrategy:
     CHECK_TORCH.mark_required()
 
@@ -62,14 +121,16 @@ def get_loading_strategy_torch(args: EngineArgs) -> LoadingStrategy:
             "mps", list(range(torch.mps.device_count())), args.device_id
         )
     elif autodevice == "cpu":
-        # spawn multiple processes on CPU. This is useful for debugging, but not for performance.
-        autodevice_string = ["cpu"] * max(len(args.device_id), 1)
+        # multiple replicas on CPU only help if pinned to disjoint cores, see `cpu_replicas`
+        autodevice_string = ["cpu"] * max(len(args.device_id), args.cpu_replicas)
     elif autodevice == "xla":
         autodevice_string = _validate_availale_device_ids(
             "xla", list(range(torch_xla.device_count())), args.device_id
         )
     else:
         raise ValueError(f"Unknown device {autodevice}")
+    if args.cpu_replicas > 1 and autodevice != "cpu":
+        raise ValueError(f"cpu_replicas={args.cpu_replicas} requires device cpu, got {autodevice}")
 
     # automatic dtype
     if args.dtype == Dtype.float32:
@@ -110,12 +171,25 @@ def get_loading_strategy_torch(args: EngineArgs) -> LoadingStrategy:
     )
 
 
+def _with_cpu_replicas(args: EngineArgs, stat: LoadingStrategy) -> LoadingStrategy:
+    if args.cpu_replicas > 1:
+        stat.cpu_core_mapping = cpu_core_sets(len(stat.device_mapping))
+        stat.cpu_core_placement = stat.cpu_core_mapping[0]
+    return stat
+
+
 def get_loading_strategy(args: EngineArgs) -> LoadingStrategy:
-    if args.engine in [InferenceEngine.torch, InferenceEngine.ctranslate2]:
+    if args.engine in [
+        InferenceEngine.torch,
+        InferenceEngine.ctranslate2,
+        InferenceEngine.transformers,
+    ]:
         stat = get_loading_strategy_torch(args)
     else:
         stat = LoadingStrategy(
-            device_mapping=["not-specified"], loading_dtype=None, quantization_dtype=None
+            device_mapping=["not-specified"] * args.cpu_replicas,
+            loading_dtype=None,
+            quantization_dtype=None,
         )
 
-    return stat
+    return _with_cpu_replicas(args, stat)
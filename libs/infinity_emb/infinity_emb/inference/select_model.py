@@ -2,6 +2,7 @@
 # Copyright (c) 2023-now michaelfeil
 
 import json
+from itertools import zip_longest
 from pathlib import Path
 from typing import Union
 
@@ -76,10 +77,13 @@ def select_model(
     min_inference_t = 4e-3
     max_inference_t = 4e-3
 
+    ls = engine_args._loading_strategy
+    assert ls is not None
     # TODO: Can be parallelized
-    for device_map in engine_args._loading_strategy.device_mapping:  # type: ignore
+    for device_map, cpu_cores in zip_longest(ls.device_mapping, ls.cpu_core_mapping or []):
         engine_args_copy = engine_args.copy()
-        engine_args_copy._loading_strategy.device_placement = device_map
+        engine_args_copy._loading_strategy.device_placement = device_map  # type: ignore
+        engine_args_copy._loading_strategy.cpu_core_placement = cpu_cores  # type: ignore
         loaded_engine = unloaded_engine.value(engine_args=engine_args_copy)
 
         if engine_args.model_warmup:
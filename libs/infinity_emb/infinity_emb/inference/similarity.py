@@ -0,0 +1,228 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Vectorized similarity scores between two sets of embeddings, for all embedding dtypes."""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from infinity_emb.primitives import EmbeddingDtype, SimilarityReturnType
+
+__all__ = [
+    "cosine_scores",
+    "hamming_distances",
+    "int8_dot_products",
+    "is_multi_vector",
+    "maxsim_scores",
+    "score_embeddings",
+    "similarity_scores",
+    "top_k_per_row",
+]
+
+# max bytes of the per-chunk intermediates of `hamming_distances` and `int8_dot_products`
+_CHUNK_BYTES = 64 * 1024 * 1024
+# max bytes of the [query tokens, document tokens] intermediate of `maxsim_scores`
+_MAXSIM_CHUNK_BYTES = 64 * 1024 * 1024
+
+# SWAR popcount masks and shifts for uint64 words
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_M8 = np.uint64(0x00FF00FF00FF00FF)
+_H16 = np.uint64(0x0001000100010001)
+_SHIFTS = tuple(np.uint64(i) for i in (1, 2, 4, 8, 48))
+_TOP_BIT = np.int8(-128)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def cosine_scores(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[n, m] cosine similarity of float embeddings a [n, d] and b [m, d]"""
+    a = _normalize(a.astype(np.float32, copy=False))
+    b = _normalize(b.astype(np.float32, copy=False))
+    return a @ b.T
+
+
+def _chunk_rows(row_bytes: int) -> int:
+    return max(1, _CHUNK_BYTES // max(1, row_bytes))
+
+
+def _exact_float_dtype(dim: int) -> type:
+    """float dtype in which sums of `dim` int8 products are exact (below 2**24 or 2**53)"""
+    return np.float32 if 128 * 128 * dim <= 2**24 else np.float64
+
+
+def _int_norms(vectors: np.ndarray) -> np.ndarray:
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def int8_dot_products(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[n, m] exact int32 dot products of int8 embeddings a [n, d] and b [m, d].
+
+    numpy has no BLAS for integers, so the products are computed by a float matrix product
+    per chunk of b, in a float dtype which represents all partial sums exactly.
+    """
+    dtype = _exact_float_dtype(a.shape[1])
+    a_f = a.astype(dtype)
+    dots = np.empty((a.shape[0], b.shape[0]), dtype=np.int32)
+    rows = _chunk_rows(np.dtype(dtype).itemsize * b.shape[1])
+    for start in range(0, b.shape[0], rows):
+        dots[:, start : start + rows] = a_f @ b[start : start + rows].astype(dtype).T
+    return dots
+
+
+def _int_cosine_scores(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[n, m] cosine similarity of int8 embeddings, from exact integer dot products"""
+    dtype = _exact_float_dtype(a.shape[1])
+    a_f = a.astype(dtype)
+    scores = np.empty((a.shape[0], b.shape[0]), dtype=np.float32)
+    rows = _chunk_rows(np.dtype(dtype).itemsize * b.shape[1])
+    for start in range(0, b.shape[0], rows):
+        b_f = b[start : start + rows].astype(dtype)
+        scores[:, start : start + rows] = (a_f @ b_f.T) / _int_norms(b_f)
+    scores /= _int_norms(a_f)[:, None]
+    return scores
+
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """number of set bits of every row of a [rows, n_words] uint64 array, overwrites it"""
+    s1, s2, s4, s8, s48 = _SHIFTS
+    words -= (words >> s1) & _M1
+    words = (words & _M2) + ((words >> s2) & _M2)
+    words += words >> s4
+    words &= _M4
+    # every byte now counts <= 8 bits, so up to 31 words are summed without carries,
+    # before the byte counts are added up in 16-bit lanes.
+    counts = np.zeros(len(words), dtype=np.uint64)
+    for start in range(0, words.shape[1], 31):
+        lanes = words[:, start : start + 31].sum(axis=1, dtype=np.uint64)
+        lanes = (lanes & _M8) + ((lanes >> s8) & _M8)
+        counts += (lanes * _H16) >> s48
+    return counts
+
+
+def _as_words(vectors: np.ndarray) -> np.ndarray:
+    """bit-packed [n, bytes] vectors as [n, ceil(bytes / 8)] uint64, zero-padded"""
+    vectors = vectors.view(np.uint8)
+    if vectors.shape[1] % 8:
+        vectors = np.pad(vectors, ((0, 0), (0, -vectors.shape[1] % 8)))
+    return np.ascontiguousarray(vectors).view(np.uint64)
+
+
+def hamming_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[n, m] number of differing bits of bit-packed uint8 embeddings a [n, d/8] and b [m, d/8]
+
+    The xor of a query and a chunk of b is counted 64 bits at a time (SWAR popcount).
+    """
+    a_words = _as_words(a)
+    b_words = _as_words(b)
+    distances = np.empty((a.shape[0], b.shape[0]), dtype=np.int32)
+    rows = _chunk_rows(8 * b_words.shape[1])
+    for start in range(0, b_words.shape[0], rows):
+        chunk = b_words[start : start + rows]
+        for i, query in enumerate(a_words):
+            distances[i, start : start + rows] = _popcount_rows(np.bitwise_xor(query, chunk))
+    return distances
+
+
+def is_multi_vector(embeddings: Sequence[np.ndarray]) -> bool:
+    """True for late-interaction embeddings, one [tokens, d] matrix per input (ColBERT, ColPali)"""
+    return len(embeddings) > 0 and np.ndim(embeddings[0]) == 2
+
+
+def _segment_starts(lengths: np.ndarray) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.intp)
+
+
+def maxsim_scores(a: Sequence[np.ndarray], b: Sequence[np.ndarray]) -> np.ndarray:
+    """[n, m] late-interaction (MaxSim) scores of multi-vector embeddings
+    a, n x [tokens, d], and b, m x [tokens, d].
+
+    The score of a[i] and b[j] is the sum over the tokens of a[i] of their max dot product
+    with any token of b[j]. All token pairs are computed in one matrix product per chunk of
+    documents, then reduced per document (max) and per query (sum).
+    """
+    a_lengths = np.array([len(e) for e in a], dtype=np.intp)
+    b_lengths = np.array([len(e) for e in b], dtype=np.intp)
+    if (a_lengths == 0).any() or (b_lengths == 0).any():
+        raise ValueError("multi-vector embeddings need at least one token per input")
+    a_tokens = np.concatenate(a).astype(np.float32, copy=False)
+    b_tokens = np.concatenate(b).astype(np.float32, copy=False)
+    a_starts = _segment_starts(a_lengths)
+    b_starts = _segment_starts(b_lengths)
+    b_ends = b_starts + b_lengths
+
+    scores = np.empty((len(a), len(b)), dtype=np.float32)
+    max_tokens = max(1, _MAXSIM_CHUNK_BYTES // (4 * len(a_tokens)))
+    start = 0
+    while start < len(b):
+        # as many documents as fit into the budget, but at least one
+        end = int(np.searchsorted(b_ends, b_starts[start] + max_tokens, side="right"))
+        end = max(end, start + 1)
+        token_scores = a_tokens @ b_tokens[b_starts[start] : b_ends[end - 1]].T
+        per_document = np.maximum.reduceat(
+            token_scores, b_starts[start:end] - b_starts[start], axis=1
+        )
+        scores[:, start:end] = np.add.reduceat(per_document, a_starts, axis=0)
+        start = end
+    return scores
+
+
+def similarity_scores(
+    a: np.ndarray, b: np.ndarray, embedding_dtype: EmbeddingDtype = EmbeddingDtype.float32
+) -> np.ndarray:
+    """[n, m] similarity scores of embeddings a [n, ...] and b [m, ...], in [-1, 1].
+
+    - float32: cosine similarity.
+    - int8 / uint8: cosine similarity of the quantized vectors (uint8 is centered to int8).
+    - binary / ubinary: 1 - 2 * hamming_distance / bits,
+        i.e. the cosine similarity of the {-1, 1} vectors.
+    """
+    if embedding_dtype == EmbeddingDtype.int8:
+        return _int_cosine_scores(a, b)
+    elif embedding_dtype == EmbeddingDtype.uint8:
+        # flipping the top bit of uint8 is the same as subtracting 128 and viewing as int8
+        return _int_cosine_scores(a.view(np.int8) ^ _TOP_BIT, b.view(np.int8) ^ _TOP_BIT)
+    elif embedding_dtype.uses_bitpacking():
+        # binary is ubinary shifted by -128, i.e. with the top bit of every byte flipped,
+        # which does not change the hamming distances.
+        bits = 8 * a.shape[1]
+        return (1 - 2 * hamming_distances(a, b) / bits).astype(np.float32)
+    return cosine_scores(a, b)
+
+
+def top_k_per_row(scores: np.ndarray, k: int) -> SimilarityReturnType:
+    """the k highest scores of each row of a [n, m] matrix, sorted descending."""
+    if k >= scores.shape[1]:
+        indices = np.argsort(-scores, axis=1, kind="stable")
+    else:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=1)
+    return SimilarityReturnType(scores=np.take_along_axis(scores, indices, axis=1), indices=indices)
+
+
+def score_embeddings(
+    a: Sequence[np.ndarray],
+    b: Sequence[np.ndarray],
+    embedding_dtype: EmbeddingDtype = EmbeddingDtype.float32,
+    top_k: Optional[int] = None,
+) -> SimilarityReturnType:
+    """[n, m] `similarity_scores`, or the `top_k_per_row` of them if top_k is set.
+
+    Multi-vector embeddings are scored with `maxsim_scores` instead.
+    """
+    if is_multi_vector(a) or is_multi_vector(b):
+        scores = maxsim_scores(a, b)
+    else:
+        scores = similarity_scores(np.asarray(a), np.asarray(b), embedding_dtype)
+    if top_k is not None:
+        return top_k_per_row(scores, top_k)
+    return SimilarityReturnType(scores=scores)
@@ -15,9 +15,13 @@ from infinity_emb.args import EngineArgs
 from infinity_emb.engine import AsyncEmbeddingEngine, AsyncEngineArray
 from infinity_emb.env import MANAGER
 from infinity_emb.fastapi_schemas import docs, errors
+from infinity_emb.grpc_service.server import start_grpc_server
+from infinity_emb.inference.cascade import cascade_rerank
+from infinity_emb.local_transport import LocalTransportServer, RemoteEngineArray
 from infinity_emb.log_handler import logger
 from infinity_emb.primitives import (
     AudioCorruption,
+    CollectionError,
     ImageCorruption,
     Modality,
     ModelCapabilites,
@@ -25,9 +29,15 @@ from infinity_emb.primitives import (
     ModelNotDeployedError,
 )
 from infinity_emb.telemetry import PostHog, StartupTelemetry, telemetry_log_info
+from infinity_emb.vector_collection import CollectionStore
 
 if TYPE_CHECKING:
-    from infinity_emb.fastapi_schemas.pymodels import DataURIorURL
+    from infinity_emb.fastapi_schemas.pymodels import (
+        DataURIorURL,
+        OpenAIEmbeddingInput_Audio,
+        OpenAIEmbeddingInput_Image,
+        _OpenAIEmbeddingInput_Text,
+    )
 
 
 def send_telemetry_start(
@@ -47,6 +57,48 @@ def send_telemetry_start(
         )
 
 
+def run_engine_process(
+    *,
+    engine_args_list: list[EngineArgs],
+    local_transport_path: str,
+    grpc_address: str = "",
+    api_key: str = "",
+    log_level: Optional[int] = None,
+):
+    """runs the engines in this process and serves them on `local_transport_path`
+    (and optionally gRPC), until SIGTERM or SIGINT.
+
+    Used by `infinity_emb v2 --workers N`, where N front-end processes
+    (`create_server(engine_process_path=...)`) forward their requests to this process.
+    """
+    if log_level is not None:
+        logger.setLevel(log_level)
+
+    async def serve():
+        engine_array = AsyncEngineArray.from_args(engine_args_list)
+        await engine_array.astart()
+        local_transport = LocalTransportServer(engine_array, local_transport_path, api_key=api_key)
+        await local_transport.astart()
+        grpc_server = None
+        if grpc_address:
+            grpc_server = await start_grpc_server(
+                engine_array, address=grpc_address, api_key=api_key
+            )
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+
+        if grpc_server is not None:
+            await grpc_server.stop(grace=5)
+        await local_transport.astop()
+        await engine_array.astop()
+
+    asyncio.run(serve())
+
+
 def create_server(
     *,
     engine_args_list: list[EngineArgs],
@@ -57,30 +109,72 @@ def create_server(
     permissive_cors: bool = MANAGER.permissive_cors,
     api_key: str = MANAGER.api_key,
     proxy_root_path: str = MANAGER.proxy_root_path,
+    grpc_port: int = MANAGER.grpc_port,
+    local_transport_path: str = MANAGER.local_transport_path,
+    collections_path: str = MANAGER.collections_path,
+    engine_process_path: str = "",
 ):
     """
     creates the FastAPI server for a set of EngineArgs.
 
+    if `grpc_port` is set, a gRPC server is started on the same host, sharing the engines.
+    if `local_transport_path` is set, the engines are additionally served
+    over a unix domain socket + shared memory, see `infinity_emb.local_transport`.
+    if `engine_process_path` is set, no models are loaded. Requests are forwarded to the
+    engine process listening on this local transport path, see `run_engine_process`.
+    if `collections_path` is set, vector collections are stored in this folder and served under
+    `/collections`, see `infinity_emb.vector_collection`.
+
     """
-    from fastapi import Depends, FastAPI, HTTPException, responses, status
+    from fastapi import Depends, FastAPI, HTTPException, Request, responses, status
+    from fastapi.routing import APIRoute
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
     from prometheus_fastapi_instrumentator import Instrumentator
+    from infinity_emb.fastapi_schemas.fast_validation import TextEmbeddingFastValidator
     from infinity_emb.fastapi_schemas.pymodels import (
         AudioEmbeddingInput,
         ClassifyInput,
         ClassifyResult,
+        CollectionDeleteInput,
+        CollectionDeleteResult,
+        CollectionList,
+        CollectionSearchInput,
+        CollectionSearchResult,
+        CollectionUpsertInput,
+        CollectionUpsertResult,
         ImageEmbeddingInput,
         MultiModalOpenAIEmbedding,
         OpenAIEmbeddingResult,
         OpenAIModelInfo,
         RerankInput,
+        RerankManyInput,
+        ReRankManyResult,
         ReRankResult,
+        SimilarityInput,
+        SimilarityResult,
     )
 
+    collection_store = CollectionStore(collections_path) if collections_path else None
+
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         instrumentator.expose(app)  # type: ignore
+        if collection_store is not None:
+            collection_store.open()
+        if engine_process_path:
+            # front-end worker, the engines run in the engine process
+            app.engine_array = RemoteEngineArray(  # type: ignore
+                engine_args_list, engine_process_path, api_key=api_key
+            )
+            await app.engine_array.astart()  # type: ignore
+            logger.info(f"Forwarding requests to engine process at unix://{engine_process_path}")
+            yield
+            await app.engine_array.astop()  # type: ignore
+            if collection_store is not None:
+                collection_store.close()
+            return
+
         logger.info(
             f"Creating {len(engine_args_list)} engines: {[e.served_model_name for e in engine_args_list]}"
         )
@@ -94,6 +188,21 @@ def create_server(
         th.start()
         # start in a threadpool
         await app.engine_array.astart()  # type: ignore
+        local_transport = None
+        if local_transport_path:
+            local_transport = LocalTransportServer(
+                app.engine_array,  # type: ignore
+                local_transport_path,
+                api_key=api_key,
+            )
+            await local_transport.astart()
+        grpc_server = None
+        if grpc_port:
+            grpc_server = await start_grpc_server(
+                app.engine_array,  # type: ignore
+                address=f"{doc_extra.get('host') or '0.0.0.0'}:{grpc_port}",
+                api_key=api_key,
+            )
 
         logger.info(
             docs.startup_message(
@@ -113,7 +222,13 @@ def create_server(
             asyncio.create_task(kill_later(3))
 
         yield
+        if grpc_server is not None:
+            await grpc_server.stop(grace=5)
+        if local_transport is not None:
+            await local_transport.astop()
         await app.engine_array.astop()  # type: ignore
+        if collection_store is not None:
+            collection_store.close()
         # shutdown!
 
     app = FastAPI(
@@ -192,14 +307,18 @@ def create_server(
         data = []
         for engine in engine_array:
             engine_args = engine.engine_args
+            overload_status = engine.overload_status()
             data.append(
                 dict(
                     id=engine_args.served_model_name,
                     stats=dict(
-                        queue_fraction=engine.overload_status().queue_fraction,
-                        queue_absolute=engine.overload_status().queue_absolute,
-                        results_pending=engine.overload_status().results_absolute,
+                        queue_fraction=overload_status.queue_fraction,
+                        queue_absolute=overload_status.queue_absolute,
+                        results_pending=overload_status.results_absolute,
                         batch_size=engine_args.batch_size,
+                        queue_tokens=overload_status.queue_tokens,
+                        tokens_per_second=overload_status.tokens_per_second,
+                        estimated_queue_drain_time=overload_status.estimated_drain_time,
                     ),
                     capabilities=engine.capabilities,
                     backend=engine_args.engine.name,
@@ -222,9 +341,11 @@ def create_server(
                 code=status.HTTP_400_BAD_REQUEST,
             )
         if engine.is_overloaded():
+            retry_after = engine.overload_status().retry_after
             raise errors.OpenAIException(
-                f"model {model} is currently overloaded",
+                f"model {model} is currently overloaded, retry after {retry_after}s",
                 code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(retry_after)},
             )
         return engine
 
@@ -244,13 +365,6 @@ def create_server(
             ]
         return urls_or_bytes
 
-    @app.post(
-        f"{url_prefix}/embeddings",
-        response_model=OpenAIEmbeddingResult,
-        response_class=responses.ORJSONResponse,
-        dependencies=route_dependencies,
-        operation_id="embeddings",
-    )
     async def _embeddings(data: MultiModalOpenAIEmbedding):
         """Encode Embeddings. Supports with multimodal inputs. Aligned with OpenAI Embeddings API.
 
@@ -325,14 +439,35 @@ def create_server(
         )
         ```
 
+        ## Multi-vector Embeddings (ColBERT, ColPali)
+        ```python
+        import base64, numpy as np
+        data = requests.post("http://..:7997/embeddings",
+            json={"model": "colbert-ir/colbertv2.0", "input": ["Two cute cats.", "A dog."],
+                  "encoding_format": "base64", "packed": True}).json()["data"][0]
+        # one [total_tokens, dim] buffer, input i are the rows offsets[i]:offsets[i+1]
+        tokens = np.frombuffer(base64.b64decode(data["embedding"]), data["dtype"])
+        tokens = tokens.reshape(-1, data["dim"])
+        per_input = np.split(tokens, data["offsets"][1:-1])
+        ```
+
         ### Hint: Run all the above models on one server:
         ```bash
         infinity_emb v2 --model-id BAAI/bge-small-en-v1.5 --model-id openai/clip-vit-base-patch32 --model-id laion/larger_clap_general
         ```
         """
 
-        modality = data.root.modality
-        data_root = data.root
+        return await _embeddings_root(data.root)
+
+    async def _embeddings_root(
+        data_root: Union[
+            "_OpenAIEmbeddingInput_Text",
+            "OpenAIEmbeddingInput_Audio",
+            "OpenAIEmbeddingInput_Image",
+        ],
+    ) -> dict:
+        """runs the `/embeddings` route for an already validated request"""
+        modality = data_root.modality
         engine = _resolve_engine(data_root.model)
 
         try:
@@ -347,7 +482,9 @@ def create_server(
                     len(input_),  # type: ignore
                 )
                 embedding, usage = await engine.embed(
-                    sentences=input_, matryoshka_dim=data_root.dimensions
+                    sentences=input_,
+                    matryoshka_dim=data_root.dimensions,
+                    embedding_dtype=data_root.embedding_dtype,
                 )
             elif modality == Modality.audio:
                 urls_or_bytes = _resolve_mixed_input(data_root.input)  # type: ignore
@@ -356,7 +493,9 @@ def create_server(
                     len(urls_or_bytes),  # type: ignore
                 )
                 embedding, usage = await engine.audio_embed(
-                    audios=urls_or_bytes, matryoshka_dim=data_root.dimensions
+                    audios=urls_or_bytes,
+                    matryoshka_dim=data_root.dimensions,
+                    embedding_dtype=data_root.embedding_dtype,
                 )
             elif modality == Modality.image:
                 urls_or_bytes = _resolve_mixed_input(data_root.input)  # type: ignore
@@ -365,7 +504,9 @@ def create_server(
                     len(urls_or_bytes),  # type: ignore
                 )
                 embedding, usage = await engine.image_embed(
-                    images=urls_or_bytes, matryoshka_dim=data_root.dimensions
+                    images=urls_or_bytes,
+                    matryoshka_dim=data_root.dimensions,
+                    embedding_dtype=data_root.embedding_dtype,
                 )
 
             duration = (time.perf_counter() - start) * 1000
@@ -376,6 +517,8 @@ def create_server(
                 engine_args=engine.engine_args,
                 encoding_format=data_root.encoding_format,
                 usage=usage,
+                embedding_dtype=data_root.embedding_dtype,
+                packed=data_root.packed,
             )
         except ModelNotDeployedError as ex:
             raise errors.OpenAIException(
@@ -393,6 +536,46 @@ def create_server(
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    text_embedding_validator = TextEmbeddingFastValidator()
+
+    class _EmbeddingsRoute(APIRoute):
+        """Serves text requests to `/embeddings` without the pydantic request model.
+
+        The route keeps `MultiModalOpenAIEmbedding` as its body parameter, so the OpenAPI schema
+        and the error responses are unchanged. Requests the fast path can not validate
+        (other modalities, invalid inputs, missing credentials) take the regular route handler.
+        """
+
+        def get_route_handler(self):
+            route_handler = super().get_route_handler()
+
+            async def fast_route_handler(request: Request) -> responses.Response:
+                if api_key:
+                    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+                    if scheme.lower() != "bearer" or credentials != api_key:
+                        return await route_handler(request)
+                # the body is cached on the request and re-used by `route_handler`
+                data_root = text_embedding_validator(await request.body())
+                if data_root is None:
+                    return await route_handler(request)
+                content = await _embeddings_root(data_root)
+                return responses.ORJSONResponse(
+                    content=OpenAIEmbeddingResult.with_defaults(content)
+                )
+
+            return fast_route_handler
+
+    app.router.add_api_route(
+        f"{url_prefix}/embeddings",
+        _embeddings,
+        methods=["POST"],
+        response_model=OpenAIEmbeddingResult,
+        response_class=responses.ORJSONResponse,
+        dependencies=route_dependencies,
+        operation_id="embeddings",
+        route_class_override=_EmbeddingsRoute,
+    )
+
     @app.post(
         f"{url_prefix}/rerank",
         response_model=ReRankResult,
@@ -412,23 +595,95 @@ def create_server(
                 "documents":["Munich is in Germany.", "The sky is blue."]
             })
         ```
+
+        With `prefilter_model` set to an embedding model, only the `prefilter_top_m` documents
+        most similar to the query are reranked. The others are appended with their cosine
+        similarity as score and `prefilter_only: true`.
         """
         engine = _resolve_engine(data.model)
+        prefilter_engine = (
+            _resolve_engine(data.prefilter_model) if data.prefilter_model is not None else None
+        )
         try:
             logger.debug("[📝] Received request with %s docs ", len(data.documents))
             start = time.perf_counter()
 
-            scores, usage = await engine.rerank(
-                query=data.query,
-                docs=data.documents,
+            if prefilter_engine is not None:
+                scores, usage = await cascade_rerank(
+                    reranker=engine,
+                    embedder=prefilter_engine,
+                    query=data.query,
+                    docs=data.documents,
+                    top_m=data.prefilter_top_m,
+                    raw_scores=data.raw_scores,
+                    top_n=data.top_n,
+                )
+            else:
+                scores, usage = await engine.rerank(
+                    query=data.query,
+                    docs=data.documents,
+                    raw_scores=data.raw_scores,
+                    top_n=data.top_n,
+                )
+
+            duration = (time.perf_counter() - start) * 1000
+            logger.debug("[✅] Done in %s ms", duration)
+
+            return ReRankResult.to_rerank_response(
+                scores=scores,
+                model=engine.engine_args.served_model_name,
+                usage=usage,
+                return_documents=data.return_documents,
+            )
+        except ModelNotDeployedError as ex:
+            raise errors.OpenAIException(
+                f"ModelNotDeployedError: model=`{data.model}` does not support `rerank`. Reason: {ex}",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as ex:
+            raise errors.OpenAIException(
+                f"InternalServerError: {ex}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+    @app.post(
+        f"{url_prefix}/rerank_many",
+        response_model=ReRankManyResult,
+        response_class=responses.ORJSONResponse,
+        dependencies=route_dependencies,
+        operation_id="rerank_many",
+    )
+    async def _rerank_many(data: RerankManyInput):
+        """Rerank documents for multiple queries in one request. Results are grouped per query.
+
+        ```python
+        import requests
+        requests.post("http://..:7997/rerank_many",
+            json={
+                "model":"mixedbread-ai/mxbai-rerank-xsmall-v1",
+                "groups":[
+                    {"query":"Where is Munich?", "documents":["Munich is in Germany.", "The sky is blue."]},
+                    {"query":"What color is the sky?", "documents":["The sky is blue."], "top_n":1}
+                ]
+            })
+        ```
+        """
+        engine = _resolve_engine(data.model)
+        try:
+            logger.debug("[📝] Received request with %s queries ", len(data.groups))
+            start = time.perf_counter()
+
+            scores, usage = await engine.rerank_many(
+                queries=[group.query for group in data.groups],
+                docs=[group.documents for group in data.groups],
                 raw_scores=data.raw_scores,
-                top_n=data.top_n,
+                top_n=[group.top_n for group in data.groups],
             )
 
             duration = (time.perf_counter() - start) * 1000
             logger.debug("[✅] Done in %s ms", duration)
 
-            return ReRankResult.to_rerank_response(
+            return ReRankManyResult.to_rerank_many_response(
                 scores=scores,
                 model=engine.engine_args.served_model_name,
                 usage=usage,
@@ -445,6 +700,69 @@ def create_server(
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @app.post(
+        f"{url_prefix}/similarity",
+        response_model=SimilarityResult,
+        response_class=responses.ORJSONResponse,
+        dependencies=route_dependencies,
+        operation_id="similarity",
+    )
+    async def _similarity(data: SimilarityInput):
+        """Similarity matrix of queries x documents, computed on the server from the embeddings.
+        Returns the top_k documents per query, if `top_k` is set.
+        Multi-vector models (ColBERT, ColPali) are scored with late interaction (MaxSim),
+        set `document_modality` to `image` to score image urls, e.g. for ColPali.
+
+        ```python
+        import requests
+        requests.post("http://..:7997/similarity",
+            json={
+                "model":"BAAI/bge-small-en-v1.5",
+                "queries":["Where is Munich?"],
+                "documents":["Munich is in Germany.", "The sky is blue."]
+            })
+        ```
+        """
+        engine = _resolve_engine(data.model)
+        try:
+            logger.debug(
+                "[📝] Received request with %s x %s sentences",
+                len(data.queries),
+                len(data.documents),
+            )
+            start = time.perf_counter()
+
+            similarity, usage = await engine.similarity(
+                queries=data.queries,
+                documents=data.documents,
+                top_k=data.top_k,
+                document_modality=data.document_modality,
+            )
+
+            duration = (time.perf_counter() - start) * 1000
+            logger.debug("[✅] Done in %s ms", duration)
+
+            return SimilarityResult.to_similarity_response(
+                similarity=similarity,
+                model=engine.engine_args.served_model_name,
+                usage=usage,
+            )
+        except ModelNotDeployedError as ex:
+            raise errors.OpenAIException(
+                f"ModelNotDeployedError: model=`{data.model}` does not support `embed` for modality `{data.document_modality.value}`. Reason: {ex}",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        except ImageCorruption as ex:
+            raise errors.OpenAIException(
+                f"{ex.__class__} -> {ex}",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as ex:
+            raise errors.OpenAIException(
+                f"InternalServerError: {ex}",
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
     @app.post(
         f"{url_prefix}/classify",
         response_class=responses.ORJSONResponse,
@@ -489,6 +807,154 @@ def create_server(
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    if collection_store is not None:
+
+        @app.get(
+            f"{url_prefix}/collections",
+            response_model=CollectionList,
+            response_class=responses.ORJSONResponse,
+            dependencies=route_dependencies,
+            operation_id="collections",
+        )
+        async def _collections():
+            """list the vector collections"""
+            return dict(
+                data=[
+                    dict(
+                        name=collection.name,
+                        model=collection.model,
+                        embedding_dtype=collection.embedding_dtype.value,
+                        count=len(collection),
+                    )
+                    for collection in collection_store.list_collections()
+                ]
+            )
+
+        @app.post(
+            f"{url_prefix}/collections/{{name}}/upsert",
+            response_model=CollectionUpsertResult,
+            response_class=responses.ORJSONResponse,
+            dependencies=route_dependencies,
+            operation_id="collections_upsert",
+        )
+        async def _collections_upsert(name: str, data: CollectionUpsertInput):
+            """Embed texts with `model` and insert or replace them in the collection by id.
+            The collection is created on the first upsert and belongs to this model.
+
+            ```python
+            import requests
+            requests.post("http://..:7997/collections/docs/upsert",
+                json={
+                    "model":"BAAI/bge-small-en-v1.5",
+                    "ids":["munich", "sky"],
+                    "input":["Munich is in Germany.", "The sky is blue."],
+                    "metadata":[{"lang":"en"}, null]
+                })
+            ```
+            """
+            engine = _resolve_engine(data.model)
+            if len(data.ids) != len(data.input) or (
+                data.metadata is not None and len(data.metadata) != len(data.ids)
+            ):
+                raise errors.OpenAIException(
+                    "ids, input and metadata must have the same length",
+                    code=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                embeddings, usage = await engine.embed(sentences=data.input)
+                count = await collection_store.upsert(
+                    name,
+                    model=engine.engine_args.served_model_name,
+                    embedding_dtype=engine.engine_args.embedding_dtype,
+                    ids=data.ids,
+                    embeddings=embeddings,
+                    metadata=data.metadata,
+                )
+            except ModelNotDeployedError as ex:
+                raise errors.OpenAIException(
+                    f"ModelNotDeployedError: model=`{data.model}` does not support `embed`. Reason: {ex}",
+                    code=status.HTTP_400_BAD_REQUEST,
+                )
+            except CollectionError as ex:
+                raise errors.OpenAIException(
+                    f"CollectionError: {ex}", code=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as ex:
+                raise errors.OpenAIException(
+                    f"InternalServerError: {ex}",
+                    code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+            return dict(
+                collection=name,
+                upserted=len(data.ids),
+                count=count,
+                model=engine.engine_args.served_model_name,
+                usage=dict(prompt_tokens=usage, total_tokens=usage),
+            )
+
+        @app.post(
+            f"{url_prefix}/collections/{{name}}/delete",
+            response_model=CollectionDeleteResult,
+            response_class=responses.ORJSONResponse,
+            dependencies=route_dependencies,
+            operation_id="collections_delete",
+        )
+        async def _collections_delete(name: str, data: CollectionDeleteInput):
+            """delete ids from the collection, unknown ids are ignored"""
+            try:
+                deleted, count = await collection_store.delete(name, data.ids)
+            except CollectionError as ex:
+                raise errors.OpenAIException(
+                    f"CollectionError: {ex}", code=status.HTTP_404_NOT_FOUND
+                )
+            return dict(collection=name, deleted=deleted, count=count)
+
+        @app.post(
+            f"{url_prefix}/collections/{{name}}/search",
+            response_model=CollectionSearchResult,
+            response_class=responses.ORJSONResponse,
+            dependencies=route_dependencies,
+            operation_id="collections_search",
+        )
+        async def _collections_search(name: str, data: CollectionSearchInput):
+            """Embed texts with the model of the collection and return the `top_k` most similar
+            ids of each, sorted descending. Small collections and binary embeddings are searched
+            exhaustively, large collections with an approximate IVF index.
+
+            ```python
+            import requests
+            requests.post("http://..:7997/collections/docs/search",
+                json={"input":["Where is Munich?"], "top_k": 5})
+            ```
+            """
+            try:
+                collection = collection_store.get(name)
+            except CollectionError as ex:
+                raise errors.OpenAIException(
+                    f"CollectionError: {ex}", code=status.HTTP_404_NOT_FOUND
+                )
+            engine = _resolve_engine(collection.model)
+            try:
+                embeddings, usage = await engine.embed(sentences=data.input)
+                matches = await collection_store.search(
+                    name, embeddings=embeddings, top_k=data.top_k
+                )
+            except CollectionError as ex:
+                raise errors.OpenAIException(
+                    f"CollectionError: {ex}", code=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as ex:
+                raise errors.OpenAIException(
+                    f"InternalServerError: {ex}",
+                    code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+            return CollectionSearchResult.to_search_response(
+                matches=matches,
+                collection=name,
+                model=collection.model,
+                usage=usage,
+            )
+
     @app.post(
         f"{url_prefix}/embeddings_image",
         response_model=OpenAIEmbeddingResult,
@@ -0,0 +1,720 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""
+Local transport for co-located clients: a Unix domain socket for control messages
+and a shared-memory ring buffer for input texts and output vectors.
+
+Protocol:
+    - every control message is a 4-byte little-endian length, followed by a json object.
+    - the client creates the shared memory ring, and sends
+        `{"op": "hello", "shm": <name>, "size": <bytes>, "pid": <client pid>, "api_key": str}`.
+        If the server has an `api_key`, connections with another `api_key` are closed
+        after an error reply. The socket file is only accessible by the owner (0o600).
+    - requests are `{"op": "embed" | "image_embed" | "audio_embed" | "rerank" | "rerank_many" |
+        "classify", "model": str, "offset": int, "count": int, "binary": list[int], "kwargs": dict}`
+        or `{"op": "models"}`. Inputs are written into the ring at `offset`: `count` uint32
+        byte-lengths, followed by the utf-8 bytes. Items whose index is in `binary` are raw
+        bytes (e.g. images), not text. For `rerank`, the first text is the query.
+        For `rerank_many`, each group is the query followed by its `kwargs["counts"][i]` documents.
+    - embeddings are written by the server into the ring directly after the input
+        (wrapping to offset 0 if needed) and described by
+        `{"ok": true, "offset": int, "dtype": str, "shapes": list[list[int]], "usage": int}`.
+        All other results are returned in the json reply, together with the `status`
+        (`OverloadStatus`) of the model.
+    - errors are returned as `{"ok": false, "error": str, "type": str}`.
+
+`RemoteEngineArray` is a drop-in for `AsyncEngineArray`, used by front-end
+worker processes that forward requests to a single engine process.
+
+Requests on one connection are processed one at a time, in order.
+Open multiple connections for concurrent requests.
+"""
+
+import asyncio
+import json
+import os
+import struct
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from infinity_emb.inference.similarity import score_embeddings
+from infinity_emb.log_handler import logger
+from infinity_emb.primitives import (
+    AudioCorruption,
+    ClassifyReturnType,
+    EmbeddingDtype,
+    ImageCorruption,
+    MatryoshkaDimError,
+    Modality,
+    ModelNotDeployedError,
+    OverloadStatus,
+    RerankReturnType,
+    SimilarityReturnType,
+)
+
+if TYPE_CHECKING:
+    from infinity_emb.args import EngineArgs
+    from infinity_emb.engine import AsyncEngineArray
+
+__all__ = [
+    "LocalTransportServer",
+    "AsyncLocalTransportClient",
+    "RemoteEngine",
+    "RemoteEngineArray",
+]
+
+# exceptions re-raised with the same type by the client
+_REMOTE_EXCEPTIONS: dict[str, type[Exception]] = {
+    ex.__name__: ex
+    for ex in [
+        ModelNotDeployedError,
+        MatryoshkaDimError,
+        ImageCorruption,
+        AudioCorruption,
+        PermissionError,
+        IndexError,
+        ValueError,
+    ]
+}
+
+_HEADER = struct.Struct("<I")
+_ALIGNMENT = 64
+PROTOCOL_VERSION = 1
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _ring_position(offset: int, nbytes: int, ring_size: int) -> int:
+    """aligned position for `nbytes` at or after `offset`, wrapping to 0 if needed"""
+    if nbytes > ring_size:
+        raise ValueError(
+            f"payload of {nbytes} bytes does not fit into the ring buffer of {ring_size} bytes"
+        )
+    position = _align(offset)
+    if position + nbytes > ring_size:
+        return 0
+    return position
+
+
+def write_texts(
+    buf: memoryview, offset: int, texts: Sequence[Union[str, bytes]]
+) -> tuple[int, int]:
+    """writes texts (or raw bytes) into the ring buffer, returns (offset, nbytes)"""
+    encoded = [t if isinstance(t, bytes) else t.encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.uint32, count=len(encoded))
+    nbytes = lengths.nbytes + int(lengths.sum())
+    offset = _ring_position(offset, nbytes, len(buf))
+    buf[offset : offset + lengths.nbytes] = lengths.tobytes()
+    start = offset + lengths.nbytes
+    buf[start : offset + nbytes] = b"".join(encoded)
+    return offset, nbytes
+
+
+def read_texts(
+    buf: memoryview, offset: int, count: int, binary: Sequence[int] = ()
+) -> tuple[list[Any], int]:
+    """reads texts written by `write_texts`, returns (texts, nbytes).
+    Items with an index in `binary` are returned as bytes."""
+    lengths = np.frombuffer(buf, dtype=np.uint32, count=count, offset=offset).tolist()
+    start = offset + 4 * count
+    data = bytes(buf[start : start + sum(lengths)])
+    binary_set = set(binary)
+    texts: list[Any] = []
+    position = 0
+    for i, length in enumerate(lengths):
+        item = data[position : position + length]
+        texts.append(item if i in binary_set else item.decode("utf-8"))
+        position += length
+    return texts, 4 * count + position
+
+
+def write_arrays(buf: memoryview, offset: int, arrays: Sequence[np.ndarray]) -> dict[str, Any]:
+    """writes arrays of the same dtype back to back into the ring buffer"""
+    dtype = arrays[0].dtype
+    shapes = [list(a.shape) for a in arrays]
+    nbytes = sum(a.nbytes for a in arrays)
+    offset = _ring_position(offset, nbytes, len(buf))
+    flat = np.ndarray((nbytes // dtype.itemsize,), dtype=dtype, buffer=buf, offset=offset)
+    position = 0
+    for a in arrays:
+        flat[position : position + a.size] = a.reshape(-1)
+        position += a.size
+    del flat
+    return dict(offset=offset, nbytes=nbytes, dtype=dtype.str, shapes=shapes)
+
+
+def read_arrays(
+    buf: memoryview, offset: int, dtype: str, shapes: list[list[int]]
+) -> list[np.ndarray]:
+    """zero-copy views of arrays written by `write_arrays`"""
+    np_dtype = np.dtype(dtype)
+    arrays = []
+    for shape in shapes:
+        size = int(np.prod(shape)) if shape else 1
+        arrays.append(
+            np.ndarray(shape, dtype=np_dtype, buffer=buf, offset=offset)  # type: ignore[call-overload]
+        )
+        offset += size * np_dtype.itemsize
+    return arrays
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    """reads one control message, None if the connection is closed"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _HEADER.unpack(header)
+    return json.loads(await reader.readexactly(length))
+
+
+def encode_message(message: dict) -> bytes:
+    payload = json.dumps(message).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def attach_shared_memory(name: str, owner_pid: int) -> shared_memory.SharedMemory:
+    """attach to a shared memory segment created by `owner_pid`"""
+    shm = shared_memory.SharedMemory(name=name)
+    if owner_pid != os.getpid():
+        # the creator of the segment is responsible for unlinking it.
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            pass
+    return shm
+
+
+class LocalTransportServer:
+    """Serves an `AsyncEngineArray` over a Unix domain socket and shared memory.
+    If `api_key` is set, clients need to send it in their hello message."""
+
+    def __init__(self, engine_array: "AsyncEngineArray", path: str, api_key: str = "") -> None:
+        self.engine_array = engine_array
+        self.path = path
+        self.api_key = api_key
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def astart(self):
+        """start listening on the unix domain socket"""
+        if os.path.exists(self.path):
+            # stale socket from a previous run
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.path)
+        # other users of the host can neither connect nor read the shared memory names
+        os.chmod(self.path, 0o600)
+        logger.info(f"Local transport listening on unix://{self.path}")
+
+    async def astop(self):
+        """stop listening and remove the socket file"""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        shm: Optional[shared_memory.SharedMemory] = None
+        try:
+            hello = await read_message(reader)
+            if hello is None or hello.get("op") != "hello":
+                writer.write(encode_message(dict(ok=False, error="expected hello")))
+                return
+            if self.api_key and hello.get("api_key") != self.api_key:
+                writer.write(
+                    encode_message(
+                        dict(ok=False, error="Invalid or missing api key", type="PermissionError")
+                    )
+                )
+                await writer.drain()
+                return
+            shm = attach_shared_memory(hello["shm"], hello.get("pid", -1))
+            writer.write(encode_message(dict(ok=True, version=PROTOCOL_VERSION, **self._models())))
+            await writer.drain()
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                try:
+                    response = await self._dispatch(message, shm.buf)
+                except Exception as ex:
+                    response = dict(ok=False, error=str(ex), type=ex.__class__.__name__)
+                writer.write(encode_message(response))
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        except Exception as ex:
+            logger.exception(f"Local transport connection crashed: {ex}")
+        finally:
+            writer.close()
+            if shm is not None:
+                shm.close()
+
+    def _models(self) -> dict:
+        engines = list(self.engine_array)
+        return dict(
+            models=[engine.engine_args.served_model_name for engine in engines],
+            capabilities={
+                engine.engine_args.served_model_name: sorted(engine.capabilities)
+                for engine in engines
+            },
+            status={
+                engine.engine_args.served_model_name: asdict(engine.overload_status())
+                for engine in engines
+            },
+        )
+
+    async def _dispatch(self, message: dict, buf: memoryview) -> dict:
+        op = message.get("op")
+        kwargs = message.get("kwargs", {})
+        if op == "models":
+            return dict(ok=True, **self._models())
+
+        engine = self.engine_array[message["model"]]
+        texts, nbytes = read_texts(
+            buf, message["offset"], message["count"], message.get("binary", ())
+        )
+        if op in ("embed", "image_embed", "audio_embed"):
+            if op == "embed":
+                embeddings, usage = await engine.embed(sentences=texts, **kwargs)
+            elif op == "image_embed":
+                embeddings, usage = await engine.image_embed(images=texts, **kwargs)
+            else:
+                embeddings, usage = await engine.audio_embed(audios=texts, **kwargs)
+            arrays = write_arrays(
+                buf, message["offset"] + nbytes, [np.asarray(e) for e in embeddings]
+            )
+            reply = dict(ok=True, usage=usage, **arrays)
+        elif op == "rerank":
+            scores, usage = await engine.rerank(query=texts[0], docs=texts[1:], **kwargs)
+            results = [
+                dict(relevance_score=float(s.relevance_score), index=s.index) for s in scores
+            ]
+            reply = dict(ok=True, usage=usage, results=results)
+        elif op == "rerank_many":
+            # texts are [query, *docs] per group, with `counts` documents per group
+            queries, docs, start = [], [], 0
+            for count in kwargs.pop("counts"):
+                queries.append(texts[start])
+                docs.append(texts[start + 1 : start + 1 + count])
+                start += 1 + count
+            scores_many, usage = await engine.rerank_many(queries=queries, docs=docs, **kwargs)
+            results_many = [
+                [dict(relevance_score=float(s.relevance_score), index=s.index) for s in scores]
+                for scores in scores_many
+            ]
+            reply = dict(ok=True, usage=usage, results=results_many)
+        elif op == "classify":
+            labels, usage = await engine.classify(sentences=texts, **kwargs)
+            results = [
+                [dict(label=str(c["label"]), score=float(c["score"])) for c in classes]
+                for classes in labels
+            ]
+            reply = dict(ok=True, usage=usage, results=results)
+        else:
+            raise ValueError(f"unknown op `{op}`")
+        reply["status"] = asdict(engine.overload_status())
+        return reply
+
+
+class AsyncLocalTransportClient:
+    """asyncio client for the `LocalTransportServer`. Owns the shared memory ring buffer."""
+
+    def __init__(self, path: str, ring_size: int = 64 * 1024 * 1024, api_key: str = "") -> None:
+        self.path = path
+        self.ring_size = ring_size
+        self.api_key = api_key
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._head = 0
+        self.models: list[str] = []
+        self.capabilities: dict[str, list[str]] = {}
+
+    async def connect(self) -> "AsyncLocalTransportClient":
+        self._shm = shared_memory.SharedMemory(create=True, size=self.ring_size)
+        try:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+            reply = await self._request(
+                dict(
+                    op="hello",
+                    shm=self._shm.name,
+                    size=self.ring_size,
+                    pid=os.getpid(),
+                    api_key=self.api_key,
+                )
+            )
+        except Exception:
+            await self.close()
+            raise
+        self.models = reply["models"]
+        self.capabilities = reply["capabilities"]
+        return self
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # zero-copy results are still referenced
+                pass
+            self._shm.unlink()
+            self._shm = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _request(self, message: dict) -> dict:
+        assert self._reader is not None and self._writer is not None, "not connected"
+        self._writer.write(encode_message(message))
+        await self._writer.drain()
+        reply = await read_message(self._reader)
+        if reply is None:
+            raise ConnectionError("local transport closed the connection")
+        if not reply.get("ok"):
+            error_type = reply.get("type")
+            if error_type in _REMOTE_EXCEPTIONS:
+                raise _REMOTE_EXCEPTIONS[error_type](reply.get("error"))
+            raise RuntimeError(f"{error_type}: {reply.get('error')}")
+        return reply
+
+    async def models_status(self) -> dict:
+        """`{"models": [...], "capabilities": {...}, "status": {model: OverloadStatus as dict}}`"""
+        async with self._lock:
+            return await self._request(dict(op="models"))
+
+    async def request(
+        self, op: str, model: str, items: Sequence[Union[str, bytes]], **kwargs
+    ) -> dict:
+        """sends `items` via the ring buffer, returns the reply of the server"""
+        assert self._shm is not None, "not connected"
+        binary = [i for i, item in enumerate(items) if isinstance(item, bytes)]
+        async with self._lock:
+            offset, nbytes = write_texts(self._shm.buf, self._head, items)
+            self._head = offset + nbytes
+            reply = await self._request(
+                dict(
+                    op=op,
+                    model=model,
+                    offset=offset,
+                    count=len(items),
+                    binary=binary,
+                    kwargs=kwargs,
+                )
+            )
+            if "nbytes" in reply:
+                self._head = reply["offset"] + reply["nbytes"]
+            return reply
+
+    def read_embeddings(self, reply: dict, copy: bool = True) -> list[np.ndarray]:
+        """embeddings of a reply to `request`.
+
+        Args:
+            copy (bool): if False, returns zero-copy views into the ring buffer,
+                which are overwritten once the ring buffer wraps around.
+        """
+        assert self._shm is not None, "not connected"
+        arrays = read_arrays(self._shm.buf, reply["offset"], reply["dtype"], reply["shapes"])
+        if copy:
+            arrays = [a.copy() for a in arrays]
+        return arrays
+
+    async def embed(
+        self, *, model: str, sentences: Sequence[str], copy: bool = True, **kwargs
+    ) -> tuple[list[np.ndarray], int]:
+        """embed sentences, see `read_embeddings` for `copy`."""
+        reply = await self.request("embed", model, sentences, **kwargs)
+        return self.read_embeddings(reply, copy=copy), reply["usage"]
+
+    async def rerank(
+        self, *, model: str, query: str, docs: Sequence[str], **kwargs
+    ) -> tuple[list[dict], int]:
+        reply = await self.request("rerank", model, [query, *docs], **kwargs)
+        return reply["results"], reply["usage"]
+
+    async def classify(
+        self, *, model: str, sentences: Sequence[str], **kwargs
+    ) -> tuple[list[list[dict]], int]:
+        reply = await self.request("classify", model, sentences, **kwargs)
+        return reply["results"], reply["usage"]
+
+
+class RemoteEngine:
+    """Proxy of an `AsyncEmbeddingEngine` in another process, served by a `LocalTransportServer`.
+
+    Mirrors the interface used by the REST API. The overload status is the one
+    reported with the latest reply of the engine process. An overloaded status
+    expires after its `retry_after`, so that requests are forwarded again.
+    """
+
+    def __init__(
+        self,
+        engine_args: "EngineArgs",
+        capabilities: set[str],
+        pool: "_ClientPool",
+    ) -> None:
+        self.engine_args = engine_args
+        self.capabilities = capabilities
+        self._pool = pool
+        self._status = OverloadStatus(queue_fraction=0, queue_absolute=0, results_absolute=0)
+        self._status_time = time.monotonic()
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool.is_running
+
+    def is_overloaded(self) -> bool:
+        if time.monotonic() - self._status_time > self._status.retry_after:
+            return False
+        return self._status.queue_fraction > 1
+
+    def overload_status(self) -> OverloadStatus:
+        return self._status
+
+    def _update_status(self, status: Optional[dict]) -> None:
+        if status is not None:
+            self._status = OverloadStatus(**status)
+            self._status_time = time.monotonic()
+
+    async def _request(self, op: str, items: Sequence[Union[str, bytes]], **kwargs) -> dict:
+        async with self._pool.acquire() as client:
+            reply = await client.request(op, self.engine_args.served_model_name, items, **kwargs)
+            if "dtype" in reply:
+                reply["embeddings"] = client.read_embeddings(reply, copy=True)
+        self._update_status(reply.get("status"))
+        return reply
+
+    async def embed(
+        self,
+        sentences: list[str],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
+    ) -> tuple[list[np.ndarray], int]:
+        reply = await self._request(
+            "embed", sentences, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
+        return reply["embeddings"], reply["usage"]
+
+    async def image_embed(
+        self,
+        *,
+        images: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
+    ) -> tuple[list[np.ndarray], int]:
+        reply = await self._request(
+            "image_embed", images, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
+        return reply["embeddings"], reply["usage"]
+
+    async def audio_embed(
+        self,
+        *,
+        audios: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
+    ) -> tuple[list[np.ndarray], int]:
+        reply = await self._request(
+            "audio_embed", audios, matryoshka_dim=matryoshka_dim, embedding_dtype=embedding_dtype
+        )
+        return reply["embeddings"], reply["usage"]
+
+    async def rerank(
+        self,
+        *,
+        query: str,
+        docs: list[str],
+        raw_scores: bool = False,
+        top_n: Optional[int] = None,
+    ) -> tuple[list[RerankReturnType], int]:
+        reply = await self._request("rerank", [query, *docs], raw_scores=raw_scores, top_n=top_n)
+        scores = [
+            RerankReturnType(
+                relevance_score=r["relevance_score"], document=docs[r["index"]], index=r["index"]
+            )
+            for r in reply["results"]
+        ]
+        return scores, reply["usage"]
+
+    async def rerank_many(
+        self,
+        *,
+        queries: list[str],
+        docs: list[list[str]],
+        raw_scores: bool = False,
+        top_n: Optional[Sequence[Optional[int]]] = None,
+    ) -> tuple[list[list[RerankReturnType]], int]:
+        items = [text for query, docs_query in zip(queries, docs) for text in [query, *docs_query]]
+        reply = await self._request(
+            "rerank_many",
+            items,
+            counts=[len(docs_query) for docs_query in docs],
+            raw_scores=raw_scores,
+            top_n=None if top_n is None else list(top_n),
+        )
+        scores = [
+            [
+                RerankReturnType(
+                    relevance_score=r["relevance_score"],
+                    document=docs_query[r["index"]],
+                    index=r["index"],
+                )
+                for r in results
+            ]
+            for results, docs_query in zip(reply["results"], docs)
+        ]
+        return scores, reply["usage"]
+
+    async def similarity(
+        self,
+        *,
+        queries: list[str],
+        documents: list[str],
+        top_k: Optional[int] = None,
+        document_modality: Modality = Modality.text,
+    ) -> tuple[SimilarityReturnType, int]:
+        if document_modality == Modality.image:
+            (
+                (query_embeddings, query_usage),
+                (document_embeddings, document_usage),
+            ) = await asyncio.gather(self.embed(queries), self.image_embed(images=documents))
+            usage = query_usage + document_usage
+        elif document_modality == Modality.text:
+            embeddings, usage = await self.embed([*queries, *documents])
+            query_embeddings = embeddings[: len(queries)]
+            document_embeddings = embeddings[len(queries) :]
+        else:
+            raise ModelNotDeployedError(
+                f"similarity does not support documents of modality `{document_modality.value}`"
+            )
+        result = score_embeddings(
+            query_embeddings,
+            document_embeddings,
+            embedding_dtype=self.engine_args.embedding_dtype,
+            top_k=top_k,
+        )
+        return result, usage
+
+    async def classify(
+        self, *, sentences: list[str], raw_scores: bool = False
+    ) -> tuple[list[list[ClassifyReturnType]], int]:
+        reply = await self._request("classify", sentences, raw_scores=raw_scores)
+        return reply["results"], reply["usage"]
+
+
+class _ClientPool:
+    """fixed size pool of connections, one request per connection at a time"""
+
+    def __init__(self, path: str, size: int, ring_size: int, api_key: str = "") -> None:
+        self._clients = [
+            AsyncLocalTransportClient(path, ring_size=ring_size, api_key=api_key)
+            for _ in range(size)
+        ]
+        self._idle: Optional[asyncio.Queue] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._idle is not None
+
+    async def astart(self) -> AsyncLocalTransportClient:
+        self._idle = asyncio.Queue()
+        for client in self._clients:
+            await client.connect()
+            self._idle.put_nowait(client)
+        return self._clients[0]
+
+    async def astop(self) -> None:
+        self._idle = None
+        for client in self._clients:
+            await client.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AsyncLocalTransportClient]:
+        if self._idle is None:
+            raise ValueError("RemoteEngineArray is not started")
+        idle = self._idle
+        client = await idle.get()
+        try:
+            yield client
+        finally:
+            idle.put_nowait(client)
+
+
+class RemoteEngineArray:
+    """Drop-in for `AsyncEngineArray`, forwarding all requests to the engine process
+    listening on `path`, e.g. started via `infinity_emb v2 --workers N`."""
+
+    def __init__(
+        self,
+        engine_args_list: list["EngineArgs"],
+        path: str,
+        connections: int = 8,
+        ring_size: int = 16 * 1024 * 1024,
+        api_key: str = "",
+    ) -> None:
+        """
+        Args:
+            engine_args_list (list[EngineArgs]): args of the engines in the engine process.
+            path (str): local transport path of the engine process.
+            connections (int, optional): number of concurrent requests to the engine process.
+            ring_size (int, optional): shared memory ring buffer per connection, in bytes.
+            api_key (str, optional): api key of the engine process.
+        """
+        self.engine_args_list = engine_args_list
+        self.path = path
+        self._pool = _ClientPool(path, size=connections, ring_size=ring_size, api_key=api_key)
+        self.engines_dict: dict[str, RemoteEngine] = {}
+
+    async def astart(self):
+        client = await self._pool.astart()
+        for engine_args in self.engine_args_list:
+            name = engine_args.served_model_name
+            self.engines_dict[name] = RemoteEngine(
+                engine_args, set(client.capabilities.get(name, [])), self._pool
+            )
+        status = (await self.models_status())["status"]
+        for name, engine in self.engines_dict.items():
+            engine._update_status(status.get(name))
+
+    async def astop(self):
+        await self._pool.astop()
+
+    async def models_status(self) -> dict:
+        async with self._pool.acquire() as client:
+            return await client.models_status()
+
+    def is_running(self) -> bool:
+        return self._pool.is_running
+
+    def __iter__(self) -> Iterator[RemoteEngine]:
+        return iter(self.engines_dict.values())
+
+    def __getitem__(self, index_or_name: Union[str, int]) -> RemoteEngine:
+        """resolve engine by model name -> Auto resolve if only one engine is present"""
+        if len(self.engines_dict) == 1:
+            return list(self.engines_dict.values())[0]
+        if isinstance(index_or_name, int):
+            return list(self.engines_dict.values())[index_or_name]
+        if isinstance(index_or_name, str) and index_or_name in self.engines_dict:
+            return self.engines_dict[index_or_name]
+        raise IndexError(
+            f"Engine for model name `{index_or_name}` not found. "
+            f"Available model names are {list(self.engines_dict.keys())}"
+        )
@@ -55,6 +55,24 @@ class RerankReturnType:
     relevance_score: float
     document: str
     index: int
+    # True if the score is the cosine similarity of a cascade prefilter,
+    # the document was not scored by the reranker.
+    prefilter_only: bool = False
+
+
+@dataclass(**dataclass_args)
+class CollectionMatchReturnType:
+    id: str
+    score: float
+    metadata: Optional[dict] = None
+
+
+@dataclass(**dataclass_args)
+class SimilarityReturnType:
+    # [n, m] score matrix, or the [n, top_k] highest scores per row, sorted descending
+    scores: npt.NDArray[np.float32]
+    # [n, top_k] column indices of the scores, None for the full matrix
+    indices: Optional[npt.NDArray[np.intp]] = None
 
 
 class ClassifyReturnType(TypedDict):
@@ -97,6 +115,7 @@ class InferenceEngine(EnumType):
     ctranslate2 = "ctranslate2"
     optimum = "optimum"
     neuron = "neuron"
+    transformers = "transformers"
     debugengine = "debugengine"
 
     @staticmethod
@@ -144,6 +163,7 @@ class Dtype(EnumType):
 
 class EmbeddingDtype(EnumType):
     float32: str = "float32"
+    float16: str = "float16"
     int8: str = "int8"
     uint8: str = "uint8"
     binary: str = "binary"
@@ -161,6 +181,7 @@ class EmbeddingDtype(EnumType):
 class PoolingMethod(EnumType):
     mean: str = "mean"
     cls: str = "cls"
+    last_token: str = "last_token"
     auto: str = "auto"
 
     @staticmethod
@@ -168,6 +189,17 @@ class PoolingMethod(EnumType):
         return PoolingMethod.auto.value
 
 
+class OnnxSessionProfile(EnumType):
+    default: str = "default"
+    latency: str = "latency"
+    throughput: str = "throughput"
+    auto: str = "auto"
+
+    @staticmethod
+    def default_value():
+        return OnnxSessionProfile.default.value
+
+
 class DeviceID(list[int]):
     def __init__(self, ids: Union[list[int], str]):
         if isinstance(ids, str):
@@ -197,6 +229,9 @@ class LoadingStrategy:
     loading_dtype: Union[str, Dtype, Any]
     quantization_dtype: Union[str, Dtype, Any]
     device_placement: Optional[str] = None
+    # cpu replicas: disjoint cpu ids per entry of device_mapping, and of this replica
+    cpu_core_mapping: Optional[list[list[int]]] = None
+    cpu_core_placement: Optional[list[int]] = None
 
 
 @dataclass(**dataclass_args)
@@ -215,6 +250,8 @@ class AbstractSingle(ABC):
 @dataclass(**dataclass_args)
 class EmbeddingSingle(AbstractSingle):
     sentence: str
+    # set by the BatchHandler for models with `tokenize_ids`, see `encode_pre_ids`
+    input_ids: Optional[list[int]] = field(default=None, compare=False, repr=False)
 
     def str_repr(self) -> str:
         return self.sentence
@@ -431,6 +468,10 @@ class OverloadStatus:
     queue_fraction: float
     queue_absolute: int
     results_absolute: int
+    queue_tokens: int = 0
+    tokens_per_second: Optional[float] = None
+    estimated_drain_time: Optional[float] = None
+    retry_after: int = 1
 
 
 class ModelNotDeployedError(Exception):
@@ -449,6 +490,10 @@ class AudioCorruption(Exception):
     pass
 
 
+class CollectionError(Exception):
+    pass
+
+
 ModelCapabilites = Literal["embed", "rerank", "classify", "image_embed", "audio_embed"]
 
 
@@ -13,6 +13,7 @@ from typing import (
     Callable,
     Iterator,
     Optional,
+    Sequence,
     TypeVar,
     Union,
 )
@@ -20,6 +21,7 @@ from typing import (
 
 from infinity_emb.engine import AsyncEmbeddingEngine, AsyncEngineArray, EngineArgs
 from infinity_emb.log_handler import logger
+from infinity_emb.primitives import EmbeddingDtype, Modality
 
 if TYPE_CHECKING:
     from infinity_emb import AsyncEmbeddingEngine
@@ -171,13 +173,21 @@ class SyncEngineArray(WeakAsyncLifeMixin):
         self.async_run(self.async_engine_array.astop).result()
 
     @add_start_docstrings(AsyncEngineArray.embed.__doc__)
-    def embed(self, *, model: str, sentences: list[str], matryoshka_dim: Optional[int] = None):
+    def embed(
+        self,
+        *,
+        model: str,
+        sentences: list[str],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
+    ):
         """sync interface of AsyncEngineArray"""
         return self.async_run(
             self.async_engine_array.embed,
             model=model,
             sentences=sentences,
             matryoshka_dim=matryoshka_dim,
+            embedding_dtype=embedding_dtype,
         )
 
     @add_start_docstrings(AsyncEngineArray.rerank.__doc__)
@@ -189,6 +199,8 @@ class SyncEngineArray(WeakAsyncLifeMixin):
         docs: list[str],
         raw_scores: bool = False,
         top_n: Optional[int] = None,
+        prefilter_model: Optional[str] = None,
+        prefilter_top_m: int = 100,
     ):
         """sync interface of AsyncEngineArray"""
         return self.async_run(
@@ -198,6 +210,48 @@ class SyncEngineArray(WeakAsyncLifeMixin):
             docs=docs,
             raw_scores=raw_scores,
             top_n=top_n,
+            prefilter_model=prefilter_model,
+            prefilter_top_m=prefilter_top_m,
+        )
+
+    @add_start_docstrings(AsyncEngineArray.rerank_many.__doc__)
+    def rerank_many(
+        self,
+        *,
+        model: str,
+        queries: list[str],
+        docs: list[list[str]],
+        raw_scores: bool = False,
+        top_n: Optional[Sequence[Optional[int]]] = None,
+    ):
+        """sync interface of AsyncEngineArray"""
+        return self.async_run(
+            self.async_engine_array.rerank_many,
+            model=model,
+            queries=queries,
+            docs=docs,
+            raw_scores=raw_scores,
+            top_n=top_n,
+        )
+
+    @add_start_docstrings(AsyncEngineArray.similarity.__doc__)
+    def similarity(
+        self,
+        *,
+        model: str,
+        queries: list[str],
+        documents: list[str],
+        top_k: Optional[int] = None,
+        document_modality: Modality = Modality.text,
+    ):
+        """sync interface of AsyncEngineArray"""
+        return self.async_run(
+            self.async_engine_array.similarity,
+            model=model,
+            queries=queries,
+            documents=documents,
+            top_k=top_k,
+            document_modality=document_modality,
         )
 
     @add_start_docstrings(AsyncEngineArray.classify.__doc__)
@@ -212,7 +266,12 @@ class SyncEngineArray(WeakAsyncLifeMixin):
 
     @add_start_docstrings(AsyncEngineArray.image_embed.__doc__)
     def image_embed(
-        self, *, model: str, images: list[Union[str, bytes]], matryoshka_dim: Optional[int] = None
+        self,
+        *,
+        model: str,
+        images: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ):
         """sync interface of AsyncEngineArray"""
         return self.async_run(
@@ -220,11 +279,17 @@ class SyncEngineArray(WeakAsyncLifeMixin):
             model=model,
             images=images,
             matryoshka_dim=matryoshka_dim,
+            embedding_dtype=embedding_dtype,
         )
 
     @add_start_docstrings(AsyncEngineArray.audio_embed.__doc__)
     def audio_embed(
-        self, *, model: str, audios: list[Union[str, bytes]], matryoshka_dim: Optional[int] = None
+        self,
+        *,
+        model: str,
+        audios: list[Union[str, bytes]],
+        matryoshka_dim: Optional[int] = None,
+        embedding_dtype: Optional[EmbeddingDtype] = None,
     ):
         """sync interface of AsyncEngineArray"""
         return self.async_run(
@@ -232,6 +297,7 @@ class SyncEngineArray(WeakAsyncLifeMixin):
             model=model,
             audios=audios,
             matryoshka_dim=matryoshka_dim,
+            embedding_dtype=embedding_dtype,
         )
 
     def __del__(self):
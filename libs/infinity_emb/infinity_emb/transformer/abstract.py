@@ -4,7 +4,7 @@
 import random
 from abc import ABC, abstractmethod
 from time import perf_counter
-from typing import TYPE_CHECKING, Any, Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 from infinity_emb._optional_imports import CHECK_PIL  # , CHECK_SOUNDFILE
 from infinity_emb.primitives import (
@@ -44,6 +44,9 @@ if CHECK_PIL.is_available:
 class BaseTransformer(ABC):  # Inherit from ABC(Abstract base class)
     capabilities: set[ModelCapabilites] = set()
     engine_args: "EngineArgs"
+    # `encode_pre` does not change shared state, e.g. tokenizer settings,
+    # and may run in several threads at once, see `preprocessing_workers`
+    encode_pre_threadsafe: bool = False
 
     @abstractmethod  # Decorator to define an abstract method
     def encode_pre(self, *args, **kwargs) -> Any:
@@ -61,6 +64,15 @@ class BaseTransformer(ABC):  # Inherit from ABC(Abstract base class)
     def tokenize_lengths(self, sentences: list[str]) -> list[int]:
         """gets the lengths of each sentences according to tokenize/len etc."""
 
+    def tokenize_ids(self, sentences: list[str]) -> Optional[tuple[list[list[int]], list[int]]]:
+        """unpadded token ids of each sentence, as `encode_pre` would create them,
+        and the lengths of `tokenize_lengths`. None if `encode_pre_ids` is not supported."""
+        return None
+
+    def encode_pre_ids(self, input_ids: list[list[int]]) -> INPUT_FEATURE:
+        """`encode_pre` for the token ids of `tokenize_ids`, only pads and collates"""
+        raise NotImplementedError
+
     @abstractmethod
     def warmup(self, *, batch_size: int = 64, n_tokens=1) -> tuple[float, float, str]:
         """warmup the model
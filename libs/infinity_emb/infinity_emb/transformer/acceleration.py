@@ -2,7 +2,7 @@
 # Copyright (c) 2023-now michaelfeil
 
 import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from infinity_emb._optional_imports import CHECK_OPTIMUM, CHECK_TORCH, CHECK_TRANSFORMERS
 from infinity_emb.primitives import Device
@@ -21,7 +21,8 @@ if CHECK_TORCH.is_available:
         torch.backends.cuda.matmul.allow_tf32 = True
         torch.backends.cudnn.allow_tf32 = True
 if CHECK_TRANSFORMERS.is_available:
-    from transformers import AutoConfig  # type: ignore[import-untyped]
+    from transformers import AutoConfig, AutoModel  # type: ignore[import-untyped]
+    from transformers.utils import is_flash_attn_2_available  # type: ignore[import-untyped]
 
 
 if TYPE_CHECKING:
@@ -32,18 +33,51 @@ if TYPE_CHECKING:
     from infinity_emb.args import EngineArgs
 
 
-def check_if_bettertransformer_possible(engine_args: "EngineArgs") -> bool:
-    """verifies if attempting conversion to bettertransformers should be checked."""
-    if not engine_args.bettertransformer:
-        return False
+def select_attn_implementation(
+    engine_args: "EngineArgs", auto_class=None, allow_bettertransformer: bool = True
+) -> Optional[str]:
+    """attention implementation to load the model of `engine_args` with, via `auto_class`.
 
+    - "flash_attention_2" for fp16/bf16 models on cuda, if flash-attn is installed.
+    - "sdpa" (torch.nn.functional.scaled_dot_product_attention) if the model supports it.
+    - "eager" if the model should be converted with `to_bettertransformer` instead,
+        i.e. it has no sdpa support, and `engine_args.bettertransformer` is set.
+    - None to keep the default of transformers, e.g. for models with remote code.
+    """
     config = AutoConfig.from_pretrained(
         pretrained_model_name_or_path=engine_args.model_name_or_path,
         revision=engine_args.revision,
         trust_remote_code=engine_args.trust_remote_code,
     )
+    try:
+        model_class = (auto_class or AutoModel)._model_mapping[type(config)]
+    except (KeyError, ValueError):
+        model_class = None
 
-    return config.model_type in BetterTransformerManager.MODEL_MAPPING
+    ls = engine_args._loading_strategy
+    if (
+        model_class is not None
+        and getattr(model_class, "_supports_flash_attn_2", False)
+        and is_flash_attn_2_available()
+        and ls is not None
+        and str(ls.device_placement).startswith("cuda")
+        and ls.loading_dtype in (torch.float16, torch.bfloat16)
+        # packed batches need a [batch, seq, seq] mask, which flash-attn does not take
+        and not engine_args.sequence_packing
+    ):
+        return "flash_attention_2"
+    if model_class is not None and getattr(model_class, "_supports_sdpa", False):
+        return "sdpa"
+    if (
+        allow_bettertransformer
+        and engine_args.bettertransformer
+        # BetterTransformer runs on nested tensors and ignores a packed attention mask
+        and not engine_args.sequence_packing
+        and CHECK_OPTIMUM.is_available
+        and config.model_type in BetterTransformerManager.MODEL_MAPPING
+    ):
+        return "eager"
+    return None
 
 
 def to_bettertransformer(model: "PreTrainedModel", engine_args: "EngineArgs", logger: "Logger"):
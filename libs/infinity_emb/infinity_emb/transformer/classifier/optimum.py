@@ -9,6 +9,7 @@ from infinity_emb.transformer.abstract import BaseClassifer
 from infinity_emb.transformer.utils_optimum import (
     device_to_onnx,
     get_onnx_files,
+    onnx_session_options,
     optimize_model,
 )
 
@@ -26,6 +27,8 @@ if CHECK_TRANSFORMERS.is_available:
 
 
 class OptimumClassifier(BaseClassifer):
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs):
         CHECK_ONNXRUNTIME.mark_required()
         CHECK_TRANSFORMERS.mark_required()
@@ -45,7 +48,12 @@ class OptimumClassifier(BaseClassifer):
             trust_remote_code=engine_args.trust_remote_code,
             execution_provider=provider,
             file_name=onnx_file.as_posix(),
-            optimize_model=not engine_args.onnx_disable_optimize
+            optimize_model=not engine_args.onnx_disable_optimize,
+            session_options=onnx_session_options(
+                engine_args.onnx_session_profile,
+                engine_args.onnx_num_threads,
+                engine_args._loading_strategy.cpu_core_placement,  # type: ignore
+            ),
         )
         model.use_io_binding = False
 
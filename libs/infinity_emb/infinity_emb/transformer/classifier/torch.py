@@ -6,19 +6,25 @@ from infinity_emb.args import EngineArgs
 from infinity_emb.log_handler import logger
 from infinity_emb.transformer.abstract import BaseClassifer
 from infinity_emb.transformer.acceleration import (
+    select_attn_implementation,
     to_bettertransformer,
-    check_if_bettertransformer_possible,
 )
 from infinity_emb.transformer.quantization.interface import quant_interface
 from infinity_emb.primitives import Device
 
 if CHECK_TRANSFORMERS.is_available:
-    from transformers import AutoTokenizer, pipeline  # type: ignore
+    from transformers import (  # type: ignore
+        AutoModelForSequenceClassification,
+        AutoTokenizer,
+        pipeline,
+    )
 if CHECK_TORCH.is_available:
     import torch
 
 
 class SentenceClassifier(BaseClassifer):
+    encode_pre_threadsafe = True
+
     def __init__(
         self,
         *,
@@ -26,9 +32,11 @@ class SentenceClassifier(BaseClassifer):
     ) -> None:
         CHECK_TRANSFORMERS.mark_required()
         model_kwargs = {}
-        attempt_bt = check_if_bettertransformer_possible(engine_args)
-        if engine_args.bettertransformer and attempt_bt:
-            model_kwargs["attn_implementation"] = "eager"
+        attn_implementation = select_attn_implementation(
+            engine_args, AutoModelForSequenceClassification
+        )
+        if attn_implementation is not None:
+            model_kwargs["attn_implementation"] = attn_implementation
         ls = engine_args._loading_strategy
         assert ls is not None
 
@@ -50,7 +58,7 @@ class SentenceClassifier(BaseClassifer):
                 self._pipe.model, engine_args.dtype, device=Device[self._pipe.model.device.type]
             )
 
-        if engine_args.bettertransformer and attempt_bt:
+        if attn_implementation == "eager":
             self._pipe.model = to_bettertransformer(
                 self._pipe.model,  # type: ignore
                 engine_args,
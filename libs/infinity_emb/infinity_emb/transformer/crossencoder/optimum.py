@@ -8,9 +8,11 @@ import numpy as np
 from infinity_emb._optional_imports import CHECK_ONNXRUNTIME
 from infinity_emb.args import EngineArgs
 from infinity_emb.transformer.abstract import BaseCrossEncoder
+from infinity_emb.transformer.token_ids import TokenCollator
 from infinity_emb.transformer.utils_optimum import (
     device_to_onnx,
     get_onnx_files,
+    onnx_session_options,
     optimize_model,
 )
 
@@ -25,6 +27,8 @@ if CHECK_ONNXRUNTIME.is_available:
 
 
 class OptimumCrossEncoder(BaseCrossEncoder):
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs):
         CHECK_ONNXRUNTIME.mark_required()
         provider = device_to_onnx(engine_args.device)
@@ -33,7 +37,8 @@ class OptimumCrossEncoder(BaseCrossEncoder):
             model_name_or_path=engine_args.model_name_or_path,
             revision=engine_args.revision,
             use_auth_token=True,
-            prefer_quantized=("cpu" in provider.lower() or "openvino" in provider.lower()) and not engine_args.onnx_do_not_prefer_quantized,
+            prefer_quantized=("cpu" in provider.lower() or "openvino" in provider.lower())
+            and not engine_args.onnx_do_not_prefer_quantized,
         )
 
         self.model = optimize_model(
@@ -44,6 +49,11 @@ class OptimumCrossEncoder(BaseCrossEncoder):
             model_class=ORTModelForSequenceClassification,
             revision=engine_args.revision,
             trust_remote_code=engine_args.trust_remote_code,
+            session_options=onnx_session_options(
+                engine_args.onnx_session_profile,
+                engine_args.onnx_num_threads,
+                engine_args._loading_strategy.cpu_core_placement,  # type: ignore
+            ),
         )
         self.model.use_io_binding = False
         self.tokenizer = AutoTokenizer.from_pretrained(
@@ -57,19 +67,16 @@ class OptimumCrossEncoder(BaseCrossEncoder):
             trust_remote_code=engine_args.trust_remote_code,
         )
         self._infinity_tokenizer = copy.deepcopy(self.tokenizer)
-
-    def encode_pre(self, queries_docs: list[tuple[str, str]]) -> dict[str, np.ndarray]:
-        encoded = self.tokenizer(
-            queries_docs,
+        self._collator = TokenCollator(
+            self.tokenizer,
             max_length=self.config.max_position_embeddings,
-            padding=True,
-            truncation="longest_first",
-            return_tensors="np",
+            pad_to_multiple_of=engine_args.pad_to_multiple_of,
             return_token_type_ids=False,
         )
-        # Windows requires int64
-        encoded = {k: v.astype(np.int64) for k, v in encoded.items()}
-        return encoded
+
+    def encode_pre(self, queries_docs: list[tuple[str, str]]) -> dict[str, np.ndarray]:
+        # int64 features, as Windows requires
+        return self._collator.collate(self._collator.tokenize(queries_docs)[0], return_tensors="np")
 
     def encode_core(self, features: dict[str, np.ndarray]) -> np.ndarray:
         outputs = self.model(**features, return_dict=True)
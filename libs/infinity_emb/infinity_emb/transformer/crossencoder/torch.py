@@ -14,10 +14,12 @@ from infinity_emb.transformer.abstract import BaseCrossEncoder
 from infinity_emb.transformer.quantization.interface import (
     quant_interface,
 )
+from infinity_emb.transformer.token_ids import TokenCollator
 
 if CHECK_TORCH.is_available and CHECK_SENTENCE_TRANSFORMERS.is_available:
     import torch
     from sentence_transformers import CrossEncoder  # type: ignore[import-untyped]
+    from transformers import AutoModelForSequenceClassification  # type: ignore[import-untyped]
 else:
 
     class CrossEncoder:  # type: ignore[no-redef]
@@ -29,8 +31,8 @@ if TYPE_CHECKING:
 
 
 from infinity_emb.transformer.acceleration import (
+    select_attn_implementation,
     to_bettertransformer,
-    check_if_bettertransformer_possible,
 )
 
 __all__ = [
@@ -41,13 +43,17 @@ __all__ = [
 class CrossEncoderPatched(CrossEncoder, BaseCrossEncoder):
     """CrossEncoder with .encode_core() and no microbatching"""
 
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs):
         CHECK_SENTENCE_TRANSFORMERS.mark_required()
 
         model_kwargs = {}
-        attempt_bt = check_if_bettertransformer_possible(engine_args)
-        if engine_args.bettertransformer and attempt_bt:
-            model_kwargs["attn_implementation"] = "eager"
+        attn_implementation = select_attn_implementation(
+            engine_args, AutoModelForSequenceClassification
+        )
+        if attn_implementation is not None:
+            model_kwargs["attn_implementation"] = attn_implementation
 
         ls = engine_args._loading_strategy
         assert ls is not None
@@ -69,8 +75,11 @@ class CrossEncoderPatched(CrossEncoder, BaseCrossEncoder):
         # without corrupting the original.
 
         self._infinity_tokenizer = copy.deepcopy(self.tokenizer)
+        self._collator = TokenCollator(
+            self.tokenizer, pad_to_multiple_of=engine_args.pad_to_multiple_of
+        )
         self.model.eval()  # type: ignore
-        if engine_args.bettertransformer and attempt_bt:
+        if attn_implementation == "eager":
             self.model = to_bettertransformer(
                 self.model,  # type: ignore
                 engine_args,
@@ -88,14 +97,11 @@ class CrossEncoderPatched(CrossEncoder, BaseCrossEncoder):
             logger.info("using torch.compile(dynamic=True)")
             self.model = torch.compile(self.model, dynamic=True)
 
-    def encode_pre(self, input_tuples: list[tuple[str, str]]):
-        # return input_tuples
-        texts = [[t[0].strip(), t[1].strip()] for t in input_tuples]
-
-        tokenized = self.tokenizer(
-            texts, padding=True, truncation="longest_first", return_tensors="pt"
-        )
-        return tokenized
+    def encode_pre(self, input_tuples: list[tuple[str, str]]) -> dict[str, "Tensor"]:
+        """same output as `self.tokenizer(pairs, padding=True, truncation="longest_first")`,
+        but each distinct query is tokenized once per batch, instead of once per document."""
+        texts = [(t[0].strip(), t[1].strip()) for t in input_tuples]
+        return self._collator.collate(*self._collator.tokenize_pairs(texts))
 
     def encode_core(self, features: dict[str, "Tensor"]):
         """
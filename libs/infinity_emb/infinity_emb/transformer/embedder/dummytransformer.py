@@ -12,6 +12,8 @@ from infinity_emb.transformer.quantization.interface import quant_embedding_deco
 class DummyTransformer(BaseEmbedder):
     """fix-13 dimension embedding, filled with length of sentence"""
 
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs) -> None:
         print(f"running DummyTransformer.__init__ with engine_args={engine_args}")
         self.engine_args = engine_args
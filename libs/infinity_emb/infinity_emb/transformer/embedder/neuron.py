@@ -1,22 +1,19 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2023-now michaelfeil
 
-import copy
 import json
 import subprocess
 from typing import Union
 from functools import cache
-import numpy as np
 
 from infinity_emb._optional_imports import CHECK_OPTIMUM_NEURON, CHECK_TORCH
 from infinity_emb.args import EngineArgs
-from infinity_emb.primitives import EmbeddingReturnType, PoolingMethod
+from infinity_emb.primitives import EmbeddingReturnType
 from infinity_emb.transformer.abstract import BaseEmbedder
 from infinity_emb.transformer.quantization.interface import quant_embedding_decorator
+from infinity_emb.transformer.token_ids import TokenCollator
 from infinity_emb.transformer.utils_optimum import (
-    cls_token_pooling,
-    mean_pooling,
-    normalize,
+    pool_and_normalize,
 )
 
 if CHECK_OPTIMUM_NEURON.is_available and CHECK_TORCH.is_available:
@@ -78,12 +75,12 @@ def pad_up_to_size(desired_max_bs: int, input_ids: "torch.Tensor") -> "torch.Ten
 
 
 class NeuronOptimumEmbedder(BaseEmbedder):
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs):
         CHECK_OPTIMUM_NEURON.mark_required()
 
-        self.pooling = (
-            mean_pooling if engine_args.pooling_method == PoolingMethod.mean else cls_token_pooling
-        )
+        self.pooling_method = engine_args.pooling_method
 
         self.tokenizer = AutoTokenizer.from_pretrained(
             engine_args.model_name_or_path,
@@ -95,7 +92,12 @@ class NeuronOptimumEmbedder(BaseEmbedder):
             revision=engine_args.revision,
             trust_remote_code=engine_args.trust_remote_code,
         )
-        self._infinity_tokenizer = copy.deepcopy(self.tokenizer)
+        self._collator = TokenCollator(
+            self.tokenizer,
+            max_length=self.config.max_position_embeddings,
+            pad_to_multiple_of=engine_args.pad_to_multiple_of,
+            return_token_type_ids=False,
+        )
 
         compiler_args = {"num_cores": get_nc_count(), "auto_cast_type": "fp16"}
         input_shapes = {
@@ -118,15 +120,7 @@ class NeuronOptimumEmbedder(BaseEmbedder):
         self.batch_size = self.model.neuron_config.input_shapes["batch_size"]
 
     def encode_pre(self, sentences: list[str]) -> dict[str, "torch.Tensor"]:
-        input_dict = self.tokenizer(
-            sentences,
-            max_length=self.config.max_position_embeddings,
-            padding=True,
-            truncation="longest_first",
-            return_tensors="pt",
-            return_token_type_ids=False,
-        )
-        return input_dict
+        return self._collator.collate(self._collator.tokenize(sentences)[0])
 
     def encode_core(self, input_dict: dict[str, "torch.Tensor"]) -> dict:
         """requires constant batch size, which is a bit of extra work"""
@@ -142,20 +136,11 @@ class NeuronOptimumEmbedder(BaseEmbedder):
 
     @quant_embedding_decorator()
     def encode_post(self, embedding: dict[str, "torch.Tensor"]) -> EmbeddingReturnType:
-        embedding = self.pooling(  # type: ignore
-            embedding["token_embeddings"].numpy(), embedding["attention_mask"].numpy()
+        return pool_and_normalize(
+            embedding["token_embeddings"].numpy(),
+            embedding["attention_mask"].numpy(),
+            self.pooling_method,
         )
 
-        return normalize(embedding).astype(np.float32)
-
     def tokenize_lengths(self, sentences: list[str]) -> list[int]:
-        if hasattr(self._infinity_tokenizer, "encode_batch"):
-            tks = self._infinity_tokenizer.encode_batch(
-                sentences,
-                padding=False,
-                truncation="longest_first",
-            )
-        else:
-            tks = self._infinity_tokenizer(sentences, padding=False, truncation="longest_first")
-
-        return [len(t) for t in tks["input_ids"]]
+        return self._collator.tokenize_ids(sentences, count_special_tokens=True)[1]
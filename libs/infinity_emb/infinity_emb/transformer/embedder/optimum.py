@@ -1,22 +1,23 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2023-now michaelfeil
 
-import copy
-
 import numpy as np
 
 from infinity_emb._optional_imports import CHECK_ONNXRUNTIME, CHECK_TRANSFORMERS
 from infinity_emb.args import EngineArgs
-from infinity_emb.primitives import EmbeddingReturnType, PoolingMethod
+from infinity_emb.primitives import EmbeddingReturnType, OnnxSessionProfile
 from infinity_emb.transformer.abstract import BaseEmbedder
 from infinity_emb.transformer.quantization.interface import quant_embedding_decorator
+from infinity_emb.transformer.token_ids import TokenCollator
 from infinity_emb.transformer.utils_optimum import (
-    cls_token_pooling,
     device_to_onnx,
     get_onnx_files,
-    mean_pooling,
-    normalize,
+    OnnxIOBinding,
+    onnx_input_dtypes,
+    onnx_session_options,
     optimize_model,
+    pool_and_normalize,
+    tune_session_threads,
 )
 
 if CHECK_ONNXRUNTIME.is_available:
@@ -33,6 +34,8 @@ if CHECK_TRANSFORMERS.is_available:
 
 
 class OptimumEmbedder(BaseEmbedder):
+    encode_pre_threadsafe = True
+
     def __init__(self, *, engine_args: EngineArgs):
         CHECK_ONNXRUNTIME.mark_required()
         provider = device_to_onnx(engine_args.device)
@@ -44,9 +47,7 @@ class OptimumEmbedder(BaseEmbedder):
             prefer_quantized=("cpu" in provider.lower() or "openvino" in provider.lower()) and not engine_args.onnx_do_not_prefer_quantized,
         )
 
-        self.pooling = (
-            mean_pooling if engine_args.pooling_method == PoolingMethod.mean else cls_token_pooling
-        )
+        self.pooling_method = engine_args.pooling_method
 
         self.model = optimize_model(
             model_name_or_path=engine_args.model_name_or_path,
@@ -56,8 +57,14 @@ class OptimumEmbedder(BaseEmbedder):
             file_name=onnx_file.as_posix(),
             optimize_model=not engine_args.onnx_disable_optimize,
             model_class=ORTModelForFeatureExtraction,
+            session_options=onnx_session_options(
+                engine_args.onnx_session_profile,
+                engine_args.onnx_num_threads,
+                engine_args._loading_strategy.cpu_core_placement,  # type: ignore
+            ),
         )
         self.model.use_io_binding = False
+        self._input_dtypes = onnx_input_dtypes(self.model.model)
 
         self.tokenizer = AutoTokenizer.from_pretrained(
             engine_args.model_name_or_path,
@@ -69,44 +76,57 @@ class OptimumEmbedder(BaseEmbedder):
             revision=engine_args.revision,
             trust_remote_code=engine_args.trust_remote_code,
         )
-        self._infinity_tokenizer = copy.deepcopy(self.tokenizer)
+        self._collator = TokenCollator(
+            self.tokenizer,
+            max_length=self.config.max_position_embeddings,
+            pad_to_multiple_of=engine_args.pad_to_multiple_of,
+        )
         self.engine_args = engine_args
 
-    def encode_pre(self, sentences: list[str]) -> dict[str, np.ndarray]:
-        encoded = self.tokenizer(
-            sentences,
-            max_length=self.config.max_position_embeddings,
-            padding=True,
-            truncation="longest_first",
-            return_tensors="np",
+        if (
+            engine_args.onnx_session_profile == OnnxSessionProfile.auto
+            and provider == "CPUExecutionProvider"
+            and not engine_args.onnx_num_threads
+            and engine_args.cpu_replicas == 1
+        ):
+            # tune on a full batch of medium length inputs
+            self.model.model, _ = tune_session_threads(
+                self.model.model_path,
+                self.encode_pre(["infinity " * 64] * engine_args.batch_size),
+            )
+        # on cpu, bind inputs and a reused output buffer ourselves
+        self._io_binding = (
+            OnnxIOBinding(self.model.model) if provider == "CPUExecutionProvider" else None
         )
-        # int64 is required for onnxruntime on Windows
-        encoded = {k: v.astype(np.int64) for k, v in encoded.items()}
-        return encoded
 
-    def encode_core(self, onnx_input: dict[str, np.ndarray]) -> dict:
-        outputs = self.model(**onnx_input)
-        return {
-            "token_embeddings": outputs["last_hidden_state"],
-            "attention_mask": onnx_input["attention_mask"],
-        }
+    def encode_pre(self, sentences: list[str]) -> dict[str, np.ndarray]:
+        return self.encode_pre_ids(self.tokenize_ids(sentences)[0])
 
-    @quant_embedding_decorator()
-    def encode_post(self, embedding: dict) -> EmbeddingReturnType:
-        embedding = self.pooling(  # type: ignore
-            embedding["token_embeddings"], embedding["attention_mask"]
-        )
+    def tokenize_ids(self, sentences: list[str]) -> tuple[list[list[int]], list[int]]:
+        return self._collator.tokenize_ids(sentences, count_special_tokens=True)
 
-        return normalize(embedding).astype(np.float32)
+    def encode_pre_ids(self, input_ids: list[list[int]]) -> dict[str, np.ndarray]:
+        encoded = self._collator.collate(input_ids, return_tensors="np")
+        # cast to the input dtypes of the graph (int64 on Windows), without copy if they match
+        encoded = {
+            k: v.astype(self._input_dtypes.get(k, np.int64), copy=False) for k, v in encoded.items()
+        }
+        return encoded
 
-    def tokenize_lengths(self, sentences: list[str]) -> list[int]:
-        if hasattr(self._infinity_tokenizer, "encode_batch"):
-            tks = self._infinity_tokenizer.encode_batch(
-                sentences,
-                padding=False,
-                truncation="longest_first",
+    def encode_core(self, onnx_input: dict[str, np.ndarray]) -> np.ndarray:
+        def _pool(token_embeddings: np.ndarray) -> np.ndarray:
+            return pool_and_normalize(
+                token_embeddings, onnx_input["attention_mask"], self.pooling_method
             )
-        else:
-            tks = self._infinity_tokenizer(sentences, padding=False, truncation="longest_first")
 
-        return [len(t) for t in tks["input_ids"]]
+        if self._io_binding is not None:
+            # pool while holding the io binding, its output buffer is reused by the next call
+            return self._io_binding(onnx_input, reduce=_pool)
+        return _pool(self.model(**onnx_input)["last_hidden_state"])
+
+    @quant_embedding_decorator()
+    def encode_post(self, embedding: np.ndarray) -> EmbeddingReturnType:
+        return embedding
+
+    def tokenize_lengths(self, sentences: list[str]) -> list[int]:
+        return self.tokenize_ids(sentences)[1]
@@ -4,7 +4,7 @@
 from __future__ import annotations
 
 import copy
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
 
 import numpy as np
 
@@ -17,13 +17,21 @@ from infinity_emb.log_handler import logger
 from infinity_emb.primitives import Device
 from infinity_emb.transformer.abstract import BaseEmbedder
 from infinity_emb.transformer.acceleration import (
+    select_attn_implementation,
     to_bettertransformer,
-    check_if_bettertransformer_possible,
 )
+from infinity_emb.transformer.multi_vector import pool_multi_vector, unpack_multi_vector
 from infinity_emb.transformer.quantization.interface import (
     quant_embedding_decorator,
     quant_interface,
 )
+from infinity_emb.transformer.sequence_packing import (
+    PackedFeatures,
+    pack_features,
+    supports_sequence_packing,
+    unpack_token_embeddings,
+)
+from infinity_emb.transformer.token_ids import TokenCollator
 
 if TYPE_CHECKING:
     from torch import Tensor
@@ -32,6 +40,7 @@ if TYPE_CHECKING:
 
 if CHECK_SENTENCE_TRANSFORMERS.is_available:
     from sentence_transformers import SentenceTransformer, util  # type: ignore
+    from sentence_transformers.models import Transformer  # type: ignore
 else:
 
     class SentenceTransformer:  # type: ignore[no-redef]
@@ -59,9 +68,9 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
         CHECK_SENTENCE_TRANSFORMERS.mark_required()
 
         model_kwargs = {}
-        attempt_bt = check_if_bettertransformer_possible(engine_args)
-        if engine_args.bettertransformer and attempt_bt:
-            model_kwargs["attn_implementation"] = "eager"
+        attn_implementation = select_attn_implementation(engine_args)
+        if attn_implementation is not None:
+            model_kwargs["attn_implementation"] = attn_implementation
 
         ls = engine_args._loading_strategy
         assert ls is not None
@@ -77,9 +86,6 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
             model_kwargs=model_kwargs,
         )
         self.to(ls.device_placement)
-        # make a copy of the tokenizer,
-        # to be able to could the tokens in another thread
-        # without corrupting the original.
         fm = self._first_module()
 
         self.normalize_embeddings = True
@@ -89,10 +95,35 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
             self.mode_colbert = True
             self.normalize_embeddings = False
 
-        self._infinity_tokenizer = copy.deepcopy(fm.tokenizer)
+        self._sequence_packing = engine_args.sequence_packing
+        if self._sequence_packing and not supports_sequence_packing(fm.auto_model.config):
+            logger.warning(
+                f"sequence packing is not supported for {fm.auto_model.config.model_type} models,"
+                " continue with padded batches."
+            )
+            self._sequence_packing = False
+
+        # tokenize once for the `Transformer` module: the same tokenizer settings
+        # for all calls, so no copy of the tokenizer is needed to count tokens.
+        self._tokenize_once = isinstance(fm, Transformer)
+        # other first modules, e.g. CLIP, tokenize via their own, mutable tokenizer
+        self.encode_pre_threadsafe = self._tokenize_once
+        if self._tokenize_once:
+            self._collator = TokenCollator(
+                fm.tokenizer,
+                max_length=fm.max_seq_length,
+                pad_to_multiple_of=engine_args.pad_to_multiple_of,
+            )
+            # kept here, subclasses may replace the first module (ct2)
+            self._do_lower_case = fm.do_lower_case
+        else:
+            # make a copy of the tokenizer,
+            # to be able to could the tokens in another thread
+            # without corrupting the original.
+            self._infinity_tokenizer = copy.deepcopy(fm.tokenizer)
         self.eval()
         self.engine_args = engine_args
-        if engine_args.bettertransformer and attempt_bt:
+        if attn_implementation == "eager":
             fm.auto_model = to_bettertransformer(
                 fm.auto_model,
                 engine_args,
@@ -110,18 +141,44 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
             logger.info("using torch.compile(dynamic=True)")
             fm.auto_model = torch.compile(fm.auto_model, dynamic=True)
 
-    def encode_pre(self, sentences) -> dict[str, "Tensor"]:
-        features = self.tokenize(sentences)
+    def encode_pre(self, sentences) -> Union[dict[str, "Tensor"], PackedFeatures]:
+        if self._tokenize_once:
+            return self.encode_pre_ids(self.tokenize_ids(sentences)[0])  # type: ignore
+        return self._pack(self.tokenize(sentences))
+
+    def tokenize_ids(self, sentences: list[str]) -> Optional[tuple[list[list[int]], list[int]]]:
+        if not self._tokenize_once:
+            return None
+        # as `Transformer.tokenize`
+        sentences = [str(s).strip() for s in sentences]
+        if self._do_lower_case:
+            sentences = [s.lower() for s in sentences]
+        return self._collator.tokenize_ids(sentences)
+
+    def encode_pre_ids(
+        self, input_ids: list[list[int]]
+    ) -> Union[dict[str, "Tensor"], PackedFeatures]:
+        return self._pack(self._collator.collate(input_ids))
+
+    def _pack(self, features: dict[str, "Tensor"]) -> Union[dict[str, "Tensor"], PackedFeatures]:
+        if self._sequence_packing:
+            packed = pack_features(features, self._first_module().auto_model.config)
+            if packed is not None:
+                return packed
         return features
 
-    def encode_core(self, features: dict[str, "Tensor"]) -> "Tensor":
+    def encode_core(self, features: Union[dict[str, "Tensor"], PackedFeatures]) -> "Tensor":
         """
         Computes sentence embeddings
         """
 
         with torch.no_grad():
-            features = util.batch_to_device(features, self.device)  # type: ignore
-            out: dict[str, "Tensor"] = self.forward(features)
+            out: dict[str, "Tensor"]
+            if isinstance(features, PackedFeatures):
+                out = self._forward_packed(features)
+            else:
+                features = util.batch_to_device(features, self.device)  # type: ignore
+                out = self.forward(features)
             if not self.mode_colbert:
                 out_features = out["sentence_embedding"].detach().cpu()
             else:
@@ -132,6 +189,19 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
 
         return out_features
 
+    def _forward_packed(self, packed: PackedFeatures) -> dict[str, "Tensor"]:
+        """forward pass of the packed rows through the transformer, then the
+        token embeddings of each input through the remaining modules (pooling, ..)"""
+        model_inputs = util.batch_to_device(packed.model_inputs, self.device)  # type: ignore
+        hidden_states = self._first_module().auto_model(**model_inputs, return_dict=True)[0]
+        features = {
+            "token_embeddings": unpack_token_embeddings(packed, hidden_states),
+            "attention_mask": packed.attention_mask.to(self.device),
+        }
+        for module in list(self)[1:]:
+            features = module(features)
+        return features
+
     @quant_embedding_decorator()
     def encode_post(
         self,
@@ -145,18 +215,19 @@ class SentenceTransformerPatched(SentenceTransformer, BaseEmbedder):
                 embeddings_np: np.ndarray = embeddings.numpy()
             else:
                 # remove the attention mask for two inputs with 5 and 3 tokens that's [[1,1,1,1,1],[1,1,1,0,0]]
-                # and convert to list of numpy arrays
-                embeddings_np = [  # type: ignore # noqa
-                    z[m].numpy()
-                    for z, m in zip(
-                        out_features["token_embeddings"].to(torch.float32),  # type: ignore
-                        out_features["attention_mask"].bool(),  # type: ignore
-                    )
-                ]
+                # in one copy into a packed [8, dim] buffer, and split it into per-input views
+                mask = out_features["attention_mask"].bool()  # type: ignore
+                tokens = out_features["token_embeddings"].to(torch.float32)[mask]  # type: ignore
+                embeddings_np = pool_multi_vector(  # type: ignore
+                    unpack_multi_vector(tokens.numpy(), mask.sum(dim=1).numpy()),
+                    self.engine_args.token_pool_factor,
+                )
 
         return embeddings_np
 
     def tokenize_lengths(self, sentences: list[str]) -> list[int]:
+        if self._tokenize_once:
+            return self.tokenize_ids(sentences)[1]  # type: ignore
         tks = self._infinity_tokenizer.batch_encode_plus(
             sentences,
             add_special_tokens=False,
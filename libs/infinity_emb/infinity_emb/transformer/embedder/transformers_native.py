@@ -0,0 +1,231 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from infinity_emb._optional_imports import CHECK_TORCH, CHECK_TRANSFORMERS
+from infinity_emb.args import EngineArgs
+from infinity_emb.log_handler import logger
+from infinity_emb.primitives import Device, PoolingMethod
+from infinity_emb.transformer.abstract import BaseEmbedder
+from infinity_emb.transformer.acceleration import select_attn_implementation
+from infinity_emb.transformer.quantization.interface import (
+    quant_embedding_decorator,
+    quant_interface,
+)
+from infinity_emb.transformer.sequence_packing import (
+    PackedFeatures,
+    pack_features,
+    supports_sequence_packing,
+    unpack_token_embeddings,
+)
+from infinity_emb.transformer.token_ids import TokenCollator
+
+if CHECK_TORCH.is_available:
+    import torch
+
+if CHECK_TRANSFORMERS.is_available:
+    from transformers import AutoConfig, AutoModel, AutoTokenizer  # type: ignore
+    from transformers.utils import cached_file  # type: ignore
+
+if TYPE_CHECKING:
+    from torch import Tensor
+
+    from infinity_emb.primitives import EmbeddingReturnType
+
+__all__ = [
+    "TransformersEmbedder",
+    "pool_and_normalize",
+]
+
+# sentence-transformers modules that are reproduced by `pool_and_normalize`
+_SUPPORTED_MODULES = {
+    "sentence_transformers.models.Transformer",
+    "sentence_transformers.models.Pooling",
+    "sentence_transformers.models.Normalize",
+}
+_ST_POOLING_MODES = {
+    "pooling_mode_mean_tokens": PoolingMethod.mean,
+    "pooling_mode_cls_token": PoolingMethod.cls,
+    "pooling_mode_lasttoken": PoolingMethod.last_token,
+}
+
+
+def pool_and_normalize(
+    token_embeddings: "Tensor", attention_mask: "Tensor", pooling_method: PoolingMethod
+) -> "Tensor":
+    """[n, seq, d] token embeddings to [n, d] unit-norm float32 sentence embeddings"""
+    if pooling_method == PoolingMethod.cls:
+        pooled = token_embeddings[:, 0]
+    elif pooling_method == PoolingMethod.last_token:
+        # last non-padding token, for left and right padding
+        last = attention_mask.shape[1] - 1 - attention_mask.flip(1).argmax(1)
+        pooled = token_embeddings[torch.arange(len(last), device=last.device), last]
+    else:
+        # masked mean as one [n, 1, seq] @ [n, seq, d] matmul
+        mask = attention_mask.to(token_embeddings.dtype)
+        pooled = torch.bmm(mask.unsqueeze(1), token_embeddings).squeeze(1)
+        pooled = pooled / mask.sum(dim=1, keepdim=True).clamp(min=1e-9)
+    return torch.nn.functional.normalize(pooled.to(torch.float32), p=2, dim=1)
+
+
+def _load_json(engine_args: EngineArgs, filename: str) -> Optional[Union[dict, list]]:
+    """json file of the model repo / folder, None if it does not exist"""
+    path = cached_file(
+        engine_args.model_name_or_path,
+        filename,
+        revision=engine_args.revision,
+        _raise_exceptions_for_missing_entries=False,
+    )
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _sentence_transformers_config(engine_args: EngineArgs) -> tuple[PoolingMethod, dict]:
+    """pooling method and tokenizer settings of the sentence-transformers config of the model,
+    mean pooling for plain transformers models like SentenceTransformer would use."""
+    modules = _load_json(engine_args, "modules.json")
+    if modules is None:
+        return PoolingMethod.mean, {}
+    pooling_method = PoolingMethod.mean
+    for module in modules:
+        if module["type"] not in _SUPPORTED_MODULES:
+            raise ValueError(
+                f"{engine_args.model_name_or_path} uses the sentence-transformers module "
+                f"{module['type']}, which is not supported by the `transformers` engine. "
+                "Use the `torch` engine instead."
+            )
+        if module["type"] == "sentence_transformers.models.Pooling":
+            pooling_config = _load_json(engine_args, f"{module['path']}/config.json") or {}
+            modes = [k for k, v in pooling_config.items() if k.startswith("pooling_mode") and v]
+            if len(modes) != 1 or modes[0] not in _ST_POOLING_MODES:
+                raise ValueError(
+                    f"pooling {modes} of {engine_args.model_name_or_path} is not supported "
+                    "by the `transformers` engine. Use the `torch` engine instead."
+                )
+            pooling_method = _ST_POOLING_MODES[modes[0]]
+    return pooling_method, _load_json(engine_args, "sentence_bert_config.json") or {}  # type: ignore
+
+
+class TransformersEmbedder(BaseEmbedder):
+    """Embedding models via transformers.AutoModel, without the sentence-transformers
+    wrapper. Pooling and normalization follow the sentence-transformers config of the
+    model, or `EngineArgs.pooling_method` if set."""
+
+    encode_pre_threadsafe = True
+
+    def __init__(self, *, engine_args: EngineArgs):
+        CHECK_TORCH.mark_required()
+        CHECK_TRANSFORMERS.mark_required()
+        ls = engine_args._loading_strategy
+        assert ls is not None
+
+        config = AutoConfig.from_pretrained(
+            engine_args.model_name_or_path,
+            revision=engine_args.revision,
+            trust_remote_code=engine_args.trust_remote_code,
+        )
+        if config.is_encoder_decoder or "colbert" in (config.architectures or [""])[0].lower():
+            raise ValueError(
+                f"{config.model_type} models are not supported by the `transformers` engine. "
+                "Use the `torch` engine instead."
+            )
+        pooling_method, st_config = _sentence_transformers_config(engine_args)
+        if engine_args.pooling_method != PoolingMethod.auto:
+            pooling_method = engine_args.pooling_method
+        self.pooling_method = pooling_method
+
+        self.model = AutoModel.from_pretrained(
+            engine_args.model_name_or_path,
+            config=config,
+            revision=engine_args.revision,
+            trust_remote_code=engine_args.trust_remote_code,
+            torch_dtype=ls.loading_dtype,
+            attn_implementation=select_attn_implementation(
+                engine_args, AutoModel, allow_bettertransformer=False
+            ),
+        )
+        self.model.to(ls.device_placement)
+        self.model.eval()
+        self.device = self.model.device
+
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            engine_args.model_name_or_path,
+            revision=engine_args.revision,
+            trust_remote_code=engine_args.trust_remote_code,
+        )
+        self.max_length = st_config.get("max_seq_length") or min(
+            getattr(config, "max_position_embeddings", self.tokenizer.model_max_length),
+            self.tokenizer.model_max_length,
+        )
+        self.do_lower_case = st_config.get("do_lower_case", False)
+        self._collator = TokenCollator(
+            self.tokenizer,
+            max_length=self.max_length,
+            pad_to_multiple_of=engine_args.pad_to_multiple_of,
+        )
+
+        self._sequence_packing = engine_args.sequence_packing
+        if self._sequence_packing and not supports_sequence_packing(config):
+            logger.warning(
+                f"sequence packing is not supported for {config.model_type} models,"
+                " continue with padded batches."
+            )
+            self._sequence_packing = False
+        self.engine_args = engine_args
+
+        if ls.quantization_dtype is not None:
+            self.model = quant_interface(
+                self.model, engine_args.dtype, device=Device[self.device.type]
+            )
+        if engine_args.compile:
+            logger.info("using torch.compile(dynamic=True)")
+            self.model = torch.compile(self.model, dynamic=True)
+
+    def encode_pre(self, sentences: list[str]) -> Union[dict[str, "Tensor"], PackedFeatures]:
+        return self.encode_pre_ids(self.tokenize_ids(sentences)[0])
+
+    def tokenize_ids(self, sentences: list[str]) -> tuple[list[list[int]], list[int]]:
+        sentences = [str(s).strip() for s in sentences]
+        if self.do_lower_case:
+            sentences = [s.lower() for s in sentences]
+        return self._collator.tokenize_ids(sentences)
+
+    def encode_pre_ids(
+        self, input_ids: list[list[int]]
+    ) -> Union[dict[str, "Tensor"], PackedFeatures]:
+        features = self._collator.collate(input_ids)
+        if self._sequence_packing:
+            packed = pack_features(features, self.model.config)
+            if packed is not None:
+                return packed
+        return features
+
+    def encode_core(self, features: Union[dict[str, "Tensor"], PackedFeatures]) -> "Tensor":
+        with torch.inference_mode():
+            if isinstance(features, PackedFeatures):
+                model_inputs = {k: v.to(self.device) for k, v in features.model_inputs.items()}
+                hidden_states = self.model(**model_inputs, return_dict=False)[0]
+                token_embeddings = unpack_token_embeddings(features, hidden_states)
+                attention_mask = features.attention_mask.to(self.device)
+            else:
+                model_inputs = {k: v.to(self.device) for k, v in features.items()}
+                token_embeddings = self.model(**model_inputs, return_dict=False)[0]
+                attention_mask = model_inputs["attention_mask"]
+            embeddings = pool_and_normalize(token_embeddings, attention_mask, self.pooling_method)
+        return embeddings.cpu()
+
+    @quant_embedding_decorator()
+    def encode_post(self, embeddings: "Tensor") -> "EmbeddingReturnType":
+        embeddings_np: np.ndarray = embeddings.numpy()
+        return embeddings_np
+
+    def tokenize_lengths(self, sentences: list[str]) -> list[int]:
+        return self.tokenize_ids(sentences)[1]
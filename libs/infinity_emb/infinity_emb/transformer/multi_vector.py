@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Packed storage and token pooling of multi-vector (late-interaction) embeddings,
+i.e. one [tokens, d] matrix per input, as produced by ColBERT and ColPali."""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from infinity_emb._optional_imports import CHECK_SCIPY
+
+if CHECK_SCIPY.is_available:
+    from scipy.cluster import hierarchy  # type: ignore
+
+__all__ = [
+    "pack_multi_vector",
+    "pool_multi_vector",
+    "pool_tokens",
+    "unpack_multi_vector",
+]
+
+
+def _consecutive_view(embeddings: Sequence[np.ndarray]) -> Optional[np.ndarray]:
+    """[sum(tokens_i), d] view of the matrices, if they are back to back in one buffer,
+    e.g. the views of `unpack_multi_vector`. None otherwise."""
+    first = embeddings[0]
+    base = first.base
+    if not isinstance(base, np.ndarray) or not base.flags.c_contiguous:
+        return None
+    address = first.__array_interface__["data"][0]
+    offset = address - base.__array_interface__["data"][0]
+    for e in embeddings:
+        if (
+            e.base is not base
+            or e.dtype != first.dtype
+            or e.shape[1:] != first.shape[1:]
+            or not e.flags.c_contiguous
+            or e.__array_interface__["data"][0] != address
+        ):
+            return None
+        address += e.nbytes
+    shape = (sum(len(e) for e in embeddings), *first.shape[1:])
+    return np.ndarray(shape, dtype=first.dtype, buffer=base, offset=offset)
+
+
+def pack_multi_vector(embeddings: Sequence[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """packs n [tokens_i, d] matrices into one [sum(tokens_i), d] buffer and n lengths.
+    Without a copy, if the matrices are already back to back in one buffer."""
+    lengths = np.array([len(e) for e in embeddings], dtype=np.intp)
+    packed = _consecutive_view(embeddings)
+    if packed is None:
+        packed = np.concatenate(embeddings)
+    return packed, lengths
+
+
+def unpack_multi_vector(tokens: np.ndarray, lengths: np.ndarray) -> list[np.ndarray]:
+    """splits a packed [sum(lengths), d] buffer into zero-copy [length, d] views"""
+    return np.split(tokens, np.cumsum(lengths)[:-1])
+
+
+def pool_tokens(tokens: np.ndarray, pool_factor: int) -> np.ndarray:
+    """Reduces [tokens, d] to [max(tokens // pool_factor, 1), d] vectors by
+    hierarchical (ward) clustering of the token directions and mean-pooling each cluster.
+    """
+    n_clusters = max(len(tokens) // pool_factor, 1)
+    if n_clusters >= len(tokens):
+        return tokens
+    CHECK_SCIPY.mark_required()
+    norms = np.linalg.norm(tokens, axis=1, keepdims=True)
+    directions = tokens / np.where(norms == 0, 1.0, norms)
+    labels = hierarchy.fcluster(
+        hierarchy.linkage(directions, method="ward"), t=n_clusters, criterion="maxclust"
+    )
+    # labels are 1..n_found, sort the tokens by cluster and sum each segment.
+    order = np.argsort(labels, kind="stable")
+    starts = np.flatnonzero(np.diff(labels[order], prepend=0))
+    counts = np.diff(np.append(starts, len(tokens)))
+    pooled = np.add.reduceat(tokens[order].astype(np.float32, copy=False), starts, axis=0)
+    pooled /= counts[:, None]
+    return pooled
+
+
+def pool_multi_vector(embeddings: Sequence[np.ndarray], pool_factor: int) -> list[np.ndarray]:
+    """`pool_tokens` of each [tokens, d] matrix, returned as views of one packed buffer"""
+    if pool_factor <= 1:
+        return list(embeddings)
+    pooled = [pool_tokens(e, pool_factor) for e in embeddings]
+    return unpack_multi_vector(*pack_multi_vector(pooled))
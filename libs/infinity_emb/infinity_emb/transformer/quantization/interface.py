@@ -1,17 +1,19 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2023-now michaelfeil
 
+import threading
 from functools import cache, wraps
 from hashlib import md5
-from typing import TYPE_CHECKING, Any, Union
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
 
 import numpy as np
 import requests  # type: ignore
 
-from infinity_emb._optional_imports import CHECK_SENTENCE_TRANSFORMERS, CHECK_TORCH
+from infinity_emb._optional_imports import CHECK_TORCH
 from infinity_emb.env import MANAGER
 from infinity_emb.log_handler import logger
-from infinity_emb.primitives import Device, Dtype, EmbeddingDtype
+from infinity_emb.primitives import Device, Dtype, EmbeddingDtype, MatryoshkaDimError
+from infinity_emb.transformer.multi_vector import pack_multi_vector, unpack_multi_vector
 from infinity_emb.transformer.quantization.quant import quantize
 
 if TYPE_CHECKING:
@@ -21,9 +23,6 @@ if TYPE_CHECKING:
 if CHECK_TORCH.is_available:
     import torch
 
-if CHECK_SENTENCE_TRANSFORMERS.is_available:
-    from sentence_transformers.quantization import quantize_embeddings  # type: ignore
-
 
 def quant_interface(model: Any, dtype: Union[Dtype] = Dtype.int8, device: Device = Device.cpu):
     """Quantize a model to a specific dtype and device.
@@ -93,18 +92,22 @@ def _get_text_calibration_dataset() -> list[str]:
 
 
 @cache
-def _create_statistics_embedding(model: "BaseEmbedder", percentile=100) -> np.ndarray:
-    """returns `ranges`, the min and max values of the embeddings for quantization."""
+def _calibration_embeddings(model: "BaseEmbedder") -> np.ndarray:
+    """float embeddings of the calibration dataset, [n, d]. Token vectors for multi-vector."""
 
     def _encode(model, dataset, batch_size=8):
         """batched encoding of the dataset"""
         for i in range(0, len(dataset), batch_size):
-            yield model.encode_post(
+            embeddings = model.encode_post(
                 model.encode_core(model.encode_pre(dataset[i : i + batch_size])),
                 # _internal_skip_quanitzation is a hack to skip quantization
                 # and avoid infinite recursion
                 _internal_skip_quanitzation=True,
             )
+            if np.ndim(embeddings[0]) == 2:
+                # multi-vector: calibrate on the token vectors
+                embeddings, _ = pack_multi_vector(embeddings)
+            yield embeddings
 
     if "image_embed" in model.capabilities:
         # TODO: implement calibration for vision models
@@ -116,11 +119,110 @@ def _create_statistics_embedding(model: "BaseEmbedder", percentile=100) -> np.nd
 
     logger.info(f"Creating calibration dataset for model using {len(dataset)} sentences.")
 
-    calibration_embeddings = np.concatenate(list(_encode(model, dataset)))
+    return np.concatenate(list(_encode(model, dataset)))
+
+
+@cache
+def _create_statistics_embedding(
+    model: "BaseEmbedder", percentile=100, matryoshka_dim: Optional[int] = None
+) -> np.ndarray:
+    """returns `ranges`, the min and max values of the embeddings for quantization.
+
+    With `matryoshka_dim`, the ranges of the calibration embeddings truncated
+    (and renormalized) like the requests, see `truncate_embeddings`.
+    """
     assert percentile > 50 and percentile <= 100, "percentile should be between 50 and 100"
+    calibration_embeddings = _calibration_embeddings(model)
+    if matryoshka_dim:
+        calibration_embeddings = truncate_embeddings(calibration_embeddings, matryoshka_dim)
     return np.percentile(calibration_embeddings, [100 - percentile, percentile], axis=0)
 
 
+_calibration_lock = threading.Lock()
+
+
+def calibration_ranges(model: "BaseEmbedder", matryoshka_dim: Optional[int] = None) -> np.ndarray:
+    """`_create_statistics_embedding`, computed once per model and `matryoshka_dim`:
+    concurrent first calls wait for the running calibration instead of repeating it."""
+    with _calibration_lock:
+        return _create_statistics_embedding(model, matryoshka_dim=matryoshka_dim)
+
+
+def truncate_embeddings(embeddings: np.ndarray, matryoshka_dim: int) -> np.ndarray:
+    """the first `matryoshka_dim` dimensions of [n, d] float embeddings.
+
+    Rows that were unit-norm are renormalized, so that truncated embeddings of
+    normalizing models stay usable for cosine / dot-product search.
+    """
+    if not 1 <= matryoshka_dim <= embeddings.shape[1]:
+        raise MatryoshkaDimError(
+            f"matryoshka_dim={matryoshka_dim} is not in a valid range. "
+            f"Select between 1 and {embeddings.shape[1]}."
+        )
+    truncated = embeddings[:, :matryoshka_dim].astype(np.float32)
+    full_norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings))
+    norms = np.sqrt(np.einsum("ij,ij->i", truncated, truncated))
+    renormalize = (np.abs(full_norms - 1) < 1e-3) & (norms > 0)
+    truncated[renormalize] /= norms[renormalize, None]
+    return truncated
+
+
+def _quantize_array(
+    embeddings: np.ndarray, embedding_dtype: EmbeddingDtype, ranges: Optional[np.ndarray]
+) -> np.ndarray:
+    """vectorized quantization of float [n, d] embeddings.
+
+    Same buckets as `sentence_transformers.quantization.quantize_embeddings`,
+    but values outside of the calibration `ranges` are clipped instead of overflowing.
+    """
+    if embedding_dtype == EmbeddingDtype.float16:
+        return embeddings.astype(np.float16)
+    elif embedding_dtype in (EmbeddingDtype.int8, EmbeddingDtype.uint8):
+        assert ranges is not None
+        starts, ends = ranges[:, : embeddings.shape[-1]]
+        steps = (ends - starts) / 255
+        buckets = np.clip((embeddings - starts) / np.where(steps == 0, 1, steps), 0, 255)
+        if embedding_dtype == EmbeddingDtype.uint8:
+            return buckets.astype(np.uint8)
+        return (buckets - 128).astype(np.int8)
+    packed = np.packbits(embeddings > 0, axis=-1)
+    if embedding_dtype == EmbeddingDtype.binary:
+        # binary is ubinary shifted by -128
+        return (packed ^ np.uint8(128)).view(np.int8)
+    return packed
+
+
+def quantize_embeddings_to(
+    model: "BaseEmbedder",
+    embeddings: Sequence[np.ndarray],
+    embedding_dtype: EmbeddingDtype,
+    matryoshka_dim: Optional[int] = None,
+) -> Sequence[np.ndarray]:
+    """truncates the float embeddings of `model` to `matryoshka_dim` (see
+    `truncate_embeddings`) and quantizes them to `embedding_dtype`, all at once.
+
+    int8/uint8 use the calibration ranges of the model at this dimension,
+    created on first use. Multi-vector embeddings are processed as packed token vectors.
+    """
+    if (embedding_dtype == EmbeddingDtype.float32 and not matryoshka_dim) or not len(embeddings):
+        return embeddings
+    multi_vector = np.ndim(embeddings[0]) == 2
+    if multi_vector:
+        array, lengths = pack_multi_vector(embeddings)
+    else:
+        array = np.asarray(embeddings)
+    if matryoshka_dim:
+        array = truncate_embeddings(array, matryoshka_dim)
+    if embedding_dtype != EmbeddingDtype.float32:
+        ranges = None
+        if embedding_dtype in (EmbeddingDtype.int8, EmbeddingDtype.uint8):
+            ranges = calibration_ranges(model, matryoshka_dim=matryoshka_dim or None)
+        array = _quantize_array(array, embedding_dtype, ranges)
+    if multi_vector:
+        return unpack_multi_vector(array, lengths)
+    return array
+
+
 def quant_embedding_decorator():
     def decorator(func):
         @wraps(func)
@@ -130,24 +232,14 @@ def quant_embedding_decorator():
 
             Special:
                 self has embedding_dtype: EmbeddingDtype
-                _internal_skip_quanitzation=True skips quantization
+                _internal_skip_quanitzation=True skips quantization, e.g. when the
+                    BatchHandler quantizes per request via `quantize_embeddings_to`.
             """
             skip_quanitzation = kwargs.pop("_internal_skip_quanitzation", False)
             embeddings = func(self, *args, **kwargs)
-            if self.embedding_dtype == EmbeddingDtype.float32 or skip_quanitzation:
+            if skip_quanitzation:
                 return embeddings
-            elif (
-                self.embedding_dtype == EmbeddingDtype.int8
-                or self.embedding_dtype == EmbeddingDtype.uint8
-            ):
-                calibration_ranges = _create_statistics_embedding(self)
-            else:
-                calibration_ranges = None
-            return quantize_embeddings(
-                embeddings,
-                precision=self.embedding_dtype.value,
-                ranges=calibration_ranges,
-            )
+            return quantize_embeddings_to(self, embeddings, self.embedding_dtype)
 
         return wrapper
 
@@ -0,0 +1,142 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Sequence packing for encoder models: several short inputs share one row of the
+batch, separated by a block-diagonal attention mask, so that the forward pass
+runs on (mostly) real tokens instead of padding."""
+
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from infinity_emb._optional_imports import CHECK_TORCH
+
+if CHECK_TORCH.is_available:
+    import torch
+
+if TYPE_CHECKING:
+    from torch import Tensor
+
+__all__ = [
+    "PackedFeatures",
+    "pack_features",
+    "unpack_token_embeddings",
+    "supports_sequence_packing",
+]
+
+# model types with absolute position ids, that accept a [batch, seq, seq] attention mask
+_POSITION_OFFSET = {
+    "bert": 0,
+    "electra": 0,
+    # roberta-like models count positions from padding_idx + 1
+    "roberta": None,
+    "xlm-roberta": None,
+    "camembert": None,
+}
+
+
+class PackedFeatures(NamedTuple):
+    """model inputs of packed rows, and the indices to scatter the tokens back"""
+
+    # [rows, seq] input_ids, token_type_ids, position_ids, [rows, seq, seq] attention_mask
+    model_inputs: dict[str, "Tensor"]
+    # flat indices of the real tokens in the [rows * seq] packed layout
+    packed_index: "Tensor"
+    # flat indices of the same tokens in the [n, seq] padded layout
+    padded_index: "Tensor"
+    # [n, seq] attention_mask of the padded layout
+    attention_mask: "Tensor"
+
+
+def supports_sequence_packing(config) -> bool:
+    """if `config` is of a model type that `pack_features` can produce inputs for"""
+    return (
+        config.model_type in _POSITION_OFFSET
+        and getattr(config, "position_embedding_type", "absolute") == "absolute"
+        and not getattr(config, "is_decoder", False)
+    )
+
+
+def _position_offset(config) -> int:
+    offset = _POSITION_OFFSET[config.model_type]
+    if offset is None:
+        offset = config.pad_token_id + 1
+    return offset
+
+
+def _first_fit_decreasing(lengths: list[int], capacity: int) -> list[list[int]]:
+    """bins of indices into `lengths`, each summing to at most `capacity`"""
+    bins: list[list[int]] = []
+    free: list[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        for b, space in enumerate(free):
+            if lengths[i] <= space:
+                bins[b].append(i)
+                free[b] -= lengths[i]
+                break
+        else:
+            bins.append([i])
+            free.append(capacity - lengths[i])
+    return bins
+
+
+def pack_features(features: dict[str, "Tensor"], config) -> Optional[PackedFeatures]:
+    """packs tokenized, padded `features` ([n, seq] tensors) into fewer rows of length seq.
+
+    Every row holds whole inputs, first-fit-decreasing by length. Each input only
+    attends to itself and keeps its own position ids, so the model outputs match
+    the padded forward pass. Returns None if packing would not save a row.
+    """
+    attention_mask = features["attention_mask"]
+    n, seq = attention_mask.shape
+    lengths = attention_mask.sum(dim=1).tolist()
+    bins = _first_fit_decreasing(lengths, seq)
+    if len(bins) == n:
+        return None
+    rows = len(bins)
+
+    # segment id of every packed position, -1 for padding
+    segments = torch.full((rows, seq), -1, dtype=torch.long)
+    positions = torch.zeros((rows, seq), dtype=torch.long)
+    packed_index = []
+    for row, members in enumerate(bins):
+        start = 0
+        for i in members:
+            length = lengths[i]
+            segments[row, start : start + length] = i
+            positions[row, start : start + length] = torch.arange(length)
+            packed_index.append(torch.arange(row * seq + start, row * seq + start + length))
+            start += length
+    # the tokenizer pads on the right, so the real tokens of input i are i * seq + arange(length)
+    padded_index = torch.cat([torch.arange(i * seq, i * seq + lengths[i]) for i in range(n)])
+    # sort the packed tokens by input, to line them up with `padded_index`
+    packed_index_t = torch.cat(packed_index)
+    order = torch.argsort(segments.flatten()[packed_index_t], stable=True)
+    packed_index_t = packed_index_t[order]
+
+    model_inputs = {}
+    for key in ("input_ids", "token_type_ids"):
+        if key in features:
+            packed = torch.zeros(rows * seq, dtype=features[key].dtype)
+            packed[packed_index_t] = features[key].flatten()[padded_index]
+            model_inputs[key] = packed.view(rows, seq)
+    model_inputs["position_ids"] = positions + _position_offset(config)
+    # block-diagonal: attend within the same input. padding attends to padding.
+    model_inputs["attention_mask"] = (segments[:, :, None] == segments[:, None, :]).to(
+        attention_mask.dtype
+    )
+    return PackedFeatures(
+        model_inputs=model_inputs,
+        packed_index=packed_index_t,
+        padded_index=padded_index,
+        attention_mask=attention_mask,
+    )
+
+
+def unpack_token_embeddings(packed: PackedFeatures, hidden_states: "Tensor") -> "Tensor":
+    """[rows, seq, d] hidden states of the packed rows to the [n, seq, d] padded layout"""
+    n, seq = packed.attention_mask.shape
+    d = hidden_states.shape[-1]
+    out = hidden_states.new_zeros((n * seq, d))
+    out[packed.padded_index.to(out.device)] = hidden_states.reshape(-1, d)[
+        packed.packed_index.to(out.device)
+    ]
+    return out.view(n, seq, d)
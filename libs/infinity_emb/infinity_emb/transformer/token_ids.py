@@ -0,0 +1,184 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""Tokenize once and collate fast: token ids are created without padding, e.g. while
+estimating the lengths of a request, and padded into int64 arrays in one step."""
+
+import copy
+import itertools
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from infinity_emb._optional_imports import CHECK_TORCH
+
+if CHECK_TORCH.is_available:
+    import torch
+
+__all__ = [
+    "TokenCollator",
+    "padded_length",
+]
+
+# `PreTrainedTokenizerBase.model_max_length` of tokenizers without a max length
+_LARGE_INTEGER = int(1e20)
+
+
+def padded_length(longest: int, pad_to_multiple_of: int = 1, max_length: Optional[int] = None):
+    """`longest` rounded up to a multiple of `pad_to_multiple_of`, but not beyond
+    `max_length`, as the positional embeddings of the model end there."""
+    length = -(-longest // pad_to_multiple_of) * pad_to_multiple_of
+    if max_length is not None:
+        length = min(length, max(longest, max_length))
+    return length
+
+
+class TokenCollator:
+    """tokenizes text without padding and collates the token ids to a batch.
+
+    Same features as `tokenizer(texts, padding=True, truncation="longest_first")`, but
+    - fast tokenizers are called via `tokenizers.Tokenizer.encode_batch`, without the
+      `BatchEncoding` of transformers. The backend tokenizers are copies that are
+      configured at construction and never changed afterwards, so a collator can be
+      shared across threads.
+    - in query-document pairs, each distinct query is tokenized once per batch.
+    - the batch is padded to a multiple of `pad_to_multiple_of`, to use the same kernels
+      or `torch.compile` graphs for similar lengths.
+    - all features are written into one preallocated int64 array, torch tensors
+      share its memory. A new array per batch: the features of a batch are still queued,
+      while the next batch is collated.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        max_length: Optional[int] = None,
+        pad_to_multiple_of: int = 1,
+        return_token_type_ids: Optional[bool] = None,
+    ):
+        if max_length is None and tokenizer.model_max_length < _LARGE_INTEGER:
+            max_length = tokenizer.model_max_length
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.padding_side = tokenizer.padding_side
+        self.pad_token_id = tokenizer.pad_token_id or 0
+        self.pad_token_type_id = tokenizer.pad_token_type_id
+        self.return_token_type_ids = (
+            "token_type_ids" in tokenizer.model_input_names
+            if return_token_type_ids is None
+            else return_token_type_ids
+        )
+        self.num_special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
+
+        self._backend = None
+        if getattr(tokenizer, "is_fast", False):
+            self._backend = copy.deepcopy(tokenizer.backend_tokenizer)
+            self._backend.no_padding()
+            # encodes the sequences of pairs, which are truncated as pairs afterwards
+            self._backend_untruncated = copy.deepcopy(self._backend)
+            self._backend_untruncated.no_truncation()
+            if max_length is None:
+                self._backend.no_truncation()
+            else:
+                self._backend.enable_truncation(
+                    max_length, strategy="longest_first", direction=tokenizer.truncation_side
+                )
+
+    def tokenize(
+        self, texts: Union[list[str], list[tuple[str, str]]]
+    ) -> tuple[list[list[int]], Optional[list[list[int]]]]:
+        """unpadded and truncated token ids, with special tokens, and the token type ids
+        if texts are pairs and `return_token_type_ids`."""
+        with_type_ids = self.return_token_type_ids and bool(texts) and isinstance(texts[0], tuple)
+        if self._backend is not None:
+            encodings = self._backend.encode_batch(texts, add_special_tokens=True)
+            input_ids = [e.ids for e in encodings]
+            return input_ids, [e.type_ids for e in encodings] if with_type_ids else None
+        encoded = self.tokenizer(
+            texts,
+            padding=False,
+            truncation="longest_first",
+            max_length=self.max_length,
+            return_attention_mask=False,
+            return_token_type_ids=with_type_ids,
+        )
+        return encoded["input_ids"], encoded["token_type_ids"] if with_type_ids else None
+
+    def tokenize_pairs(
+        self, pairs: list[tuple[str, str]]
+    ) -> tuple[list[list[int]], Optional[list[list[int]]]]:
+        """as `tokenize(pairs)`, but each distinct query (first item) is tokenized once.
+
+        The fast tokenizer encodes both sequences of a pair independently and joins them in
+        `post_process` (truncation + special tokens), which is replicated here.
+        """
+        if self._backend is None:
+            return self.tokenize(pairs)
+        queries = [q for q, _ in pairs]
+        unique_queries = list(dict.fromkeys(queries))
+        query_encodings = dict(
+            zip(
+                unique_queries,
+                self._backend_untruncated.encode_batch(unique_queries, add_special_tokens=False),
+            )
+        )
+        doc_encodings = self._backend_untruncated.encode_batch(
+            [d for _, d in pairs], add_special_tokens=False
+        )
+        encodings = [
+            self._backend.post_process(query_encodings[query], doc, add_special_tokens=True)
+            for query, doc in zip(queries, doc_encodings)
+        ]
+        input_ids = [e.ids for e in encodings]
+        return input_ids, [e.type_ids for e in encodings] if self.return_token_type_ids else None
+
+    def tokenize_ids(
+        self, sentences: list[str], count_special_tokens: bool = False
+    ) -> tuple[list[list[int]], list[int]]:
+        """token ids of each sentence and the number of tokens of each sentence"""
+        input_ids = self.tokenize(sentences)[0]
+        n_special = 0 if count_special_tokens else self.num_special_tokens
+        return input_ids, [max(len(ids) - n_special, 0) for ids in input_ids]
+
+    def collate(
+        self,
+        input_ids: list[list[int]],
+        token_type_ids: Optional[list[list[int]]] = None,
+        return_tensors: str = "pt",
+    ) -> dict[str, Any]:
+        """pads the token ids to `input_ids`, `attention_mask` (and `token_type_ids`)
+        of shape [batch, padded_length], as numpy arrays ("np") or torch tensors ("pt")."""
+        lengths = np.fromiter(map(len, input_ids), dtype=np.int64, count=len(input_ids))
+        length = padded_length(
+            int(lengths.max(initial=1)), self.pad_to_multiple_of, self.max_length
+        )
+        positions = np.arange(length)
+        if self.padding_side == "left":
+            attention_mask = positions >= (length - lengths)[:, None]
+        else:
+            attention_mask = positions < lengths[:, None]
+
+        # one allocation for all features
+        buffer = np.empty((2 + self.return_token_type_ids, len(input_ids), length), np.int64)
+        features = {"input_ids": buffer[0], "attention_mask": buffer[1]}
+        features["input_ids"].fill(self.pad_token_id)
+        # row-major order of the mask matches the order of the concatenated ids
+        features["input_ids"][attention_mask] = np.fromiter(
+            itertools.chain.from_iterable(input_ids), dtype=np.int64, count=int(lengths.sum())
+        )
+        features["attention_mask"][:] = attention_mask
+        if self.return_token_type_ids:
+            features["token_type_ids"] = buffer[2]
+            if token_type_ids is None:
+                features["token_type_ids"].fill(0)
+            else:
+                features["token_type_ids"].fill(self.pad_token_type_id)
+                features["token_type_ids"][attention_mask] = np.fromiter(
+                    itertools.chain.from_iterable(token_type_ids),
+                    dtype=np.int64,
+                    count=int(lengths.sum()),
+                )
+        if return_tensors == "pt":
+            return {k: torch.from_numpy(v) for k, v in features.items()}
+        return features
@@ -19,11 +19,13 @@ from infinity_emb.transformer.embedder.optimum import OptimumEmbedder
 from infinity_emb.transformer.embedder.sentence_transformer import (
     SentenceTransformerPatched,
 )
+from infinity_emb.transformer.embedder.transformers_native import TransformersEmbedder
 from infinity_emb.transformer.vision.torch_vision import TIMM
 
 __all__ = [
     "length_tokenizer",
     "get_lengths_with_tokenize",
+    "get_pair_lengths_with_tokenize",
 ]
 
 
@@ -33,6 +35,7 @@ class EmbedderEngine(Enum):
     debugengine = DummyTransformer
     optimum = OptimumEmbedder
     neuron = NeuronOptimumEmbedder
+    transformers = TransformersEmbedder
 
     @staticmethod
     def from_inference_engine(engine: InferenceEngine):
@@ -46,6 +49,8 @@ class EmbedderEngine(Enum):
             return EmbedderEngine.optimum
         elif engine == InferenceEngine.neuron:
             return EmbedderEngine.neuron
+        elif engine == InferenceEngine.transformers:
+            return EmbedderEngine.transformers
         else:
             raise NotImplementedError(f"EmbedderEngine for {engine} not implemented")
 
@@ -111,3 +116,13 @@ def get_lengths_with_tokenize(
 ) -> tuple[list[int], int]:
     _lengths = tokenize(_sentences)
     return _lengths, sum(_lengths)
+
+
+def get_pair_lengths_with_tokenize(
+    _queries: list[str], _documents: list[str], tokenize: Callable = length_tokenizer
+) -> tuple[list[int], int]:
+    """lengths of query-document pairs, tokenizing each distinct query only once."""
+    unique_queries = list(dict.fromkeys(_queries))
+    query_lengths = dict(zip(unique_queries, tokenize(unique_queries)))
+    _lengths = [query_lengths[q] + d for q, d in zip(_queries, tokenize(_documents))]
+    return _lengths, sum(_lengths)
@@ -1,8 +1,11 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2023-now michaelfeil
 
+import os
+import threading
 from pathlib import Path
-from typing import Optional, Union
+from time import perf_counter
+from typing import Callable, Optional, Union
 
 import numpy as np
 from huggingface_hub import HfApi, HfFolder  # type: ignore
@@ -11,7 +14,7 @@ from huggingface_hub.constants import HUGGINGFACE_HUB_CACHE  # type: ignore
 from infinity_emb._optional_imports import CHECK_ONNXRUNTIME, CHECK_OPTIMUM_AMD
 
 from infinity_emb.log_handler import logger
-from infinity_emb.primitives import Device
+from infinity_emb.primitives import Device, OnnxSessionProfile, PoolingMethod
 
 if CHECK_ONNXRUNTIME.is_available:
     try:
@@ -27,18 +30,34 @@ if CHECK_ONNXRUNTIME.is_available:
 
 
 def mean_pooling(last_hidden_states: np.ndarray, attention_mask: np.ndarray):
-    input_mask_expanded = (np.expand_dims(attention_mask, axis=-1)).astype(float)
-
-    sum_embeddings = np.sum(last_hidden_states.astype(float) * input_mask_expanded, axis=1)
-    mask_sum = np.maximum(np.sum(input_mask_expanded, axis=1), 1e-9)
-
-    return sum_embeddings / mask_sum
+    # masked sum as a batched [n, 1, seq] @ [n, seq, d] matmul in float32,
+    # without float64 or [n, seq, d] temporaries
+    hidden = last_hidden_states.astype(np.float32, copy=False)
+    mask = attention_mask.astype(np.float32)
+    pooled = np.matmul(mask[:, None, :], hidden)[:, 0]
+    pooled /= np.maximum(mask.sum(axis=1, keepdims=True), 1e-9)
+    return pooled
 
 
 def cls_token_pooling(model_output, *args):
     return model_output[:, 0]
 
 
+def last_token_pooling(model_output: np.ndarray, attention_mask: np.ndarray):
+    # last non-padding token, for left and right padding
+    last = attention_mask.shape[1] - 1 - np.argmax(attention_mask[:, ::-1], axis=1)
+    return model_output[np.arange(len(last)), last]
+
+
+def pooling_function(pooling_method: PoolingMethod):
+    """numpy pooling of [n, seq, d] token embeddings, cls for PoolingMethod.auto"""
+    if pooling_method == PoolingMethod.mean:
+        return mean_pooling
+    elif pooling_method == PoolingMethod.last_token:
+        return last_token_pooling
+    return cls_token_pooling
+
+
 def normalize(input_array, p=2, dim=1, eps=1e-12):
     # Calculate the Lp norm along the specified dimension
     norm = np.linalg.norm(input_array, ord=p, axis=dim, keepdims=True)
@@ -47,6 +66,98 @@ def normalize(input_array, p=2, dim=1, eps=1e-12):
     return normalized_array
 
 
+def pool_and_normalize(
+    token_embeddings: np.ndarray,
+    attention_mask: np.ndarray,
+    pooling_method: PoolingMethod,
+    eps: float = 1e-12,
+) -> np.ndarray:
+    """[n, seq, d] token embeddings to [n, d] unit-norm float32 sentence embeddings.
+
+    The result is a new array, it never aliases `token_embeddings`,
+    which may be a buffer that is reused for the next batch.
+    """
+    pooled = pooling_function(pooling_method)(token_embeddings, attention_mask)
+    if pooled.dtype != np.float32 or np.may_share_memory(pooled, token_embeddings):
+        pooled = pooled.astype(np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", pooled, pooled))
+    pooled /= np.maximum(norms, eps)[:, None]
+    return pooled
+
+
+_ORT_TO_NUMPY = {
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+}
+
+
+def onnx_input_dtypes(session: "ort.InferenceSession") -> dict[str, type]:
+    """numpy dtypes of the inputs of an onnxruntime session, by input name"""
+    return {i.name: _ORT_TO_NUMPY.get(i.type, np.int64) for i in session.get_inputs()}
+
+
+class OnnxIOBinding:
+    """Runs an onnxruntime session on cpu via io binding.
+
+    Inputs are bound zero-copy, and the output is written into a buffer that is
+    reused (and only grown) across calls, so a forward pass allocates no arrays.
+    Calls are serialized by a lock, e.g. the core thread and a calibration of the
+    quantization ranges. `reduce` runs on the buffer under the lock and must return
+    a new array, e.g. the pooled embeddings. Without it, a copy of the output is returned.
+    """
+
+    def __init__(self, session: "ort.InferenceSession", output_name: str = "last_hidden_state"):
+        output = next(o for o in session.get_outputs() if o.name == output_name)
+        if not isinstance(output.shape[-1], int):
+            raise ValueError(f"{output_name} has no static hidden size: {output.shape}")
+        self._session = session
+        self._io_binding = session.io_binding()
+        self._input_dtypes = onnx_input_dtypes(session)
+        self._output_name = output_name
+        self._hidden_size = output.shape[-1]
+        self._buffer = np.empty(0, dtype=_ORT_TO_NUMPY[output.type])
+        self._lock = threading.Lock()
+
+    def __call__(
+        self,
+        inputs: dict[str, np.ndarray],
+        reduce: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ) -> np.ndarray:
+        with self._lock:
+            output = self._run(inputs)
+            return output.copy() if reduce is None else reduce(output)
+
+    def _run(self, inputs: dict[str, np.ndarray]) -> np.ndarray:
+        batch_size, seq_len = inputs["input_ids"].shape
+        self._io_binding.clear_binding_inputs()
+        self._io_binding.clear_binding_outputs()
+        bound = []  # keep the inputs alive until the run
+        for name, dtype in self._input_dtypes.items():
+            array = inputs.get(name)
+            if array is None:
+                # e.g. token_type_ids of a graph that expects them
+                array = np.zeros((batch_size, seq_len), dtype=dtype)
+            array = np.ascontiguousarray(array, dtype=dtype)
+            bound.append(array)
+            self._io_binding.bind_cpu_input(name, array)
+
+        size = batch_size * seq_len * self._hidden_size
+        if self._buffer.size < size:
+            self._buffer = np.empty(size, dtype=self._buffer.dtype)
+        output = self._buffer[:size].reshape(batch_size, seq_len, self._hidden_size)
+        self._io_binding.bind_output(
+            self._output_name,
+            device_type="cpu",
+            element_type=output.dtype,
+            shape=output.shape,
+            buffer_ptr=output.ctypes.data,
+        )
+        self._session.run_with_iobinding(self._io_binding)
+        return output
+
+
 def device_to_onnx(device: Device) -> str:
     CHECK_ONNXRUNTIME.mark_required()
     available = ort.get_available_providers()
@@ -84,6 +195,87 @@ def device_to_onnx(device: Device) -> str:
         raise ValueError(f"Unknown device {device}")
 
 
+def _available_cpus() -> int:
+    """cpus this process may run on, respects taskset / cgroup cpusets"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def onnx_session_options(
+    profile: OnnxSessionProfile, num_threads: int = 0, cpu_cores: Optional[list[int]] = None
+) -> Optional["ort.SessionOptions"]:
+    """onnxruntime session options of a profile. None keeps the onnxruntime defaults.
+
+    Args:
+        profile (OnnxSessionProfile): `latency` keeps the intra-op threads spinning between
+            runs, for one replica per host. `throughput` does not spin, for several replicas
+            sharing the cores of a host. `auto` starts like `latency`, see `tune_session_threads`.
+        num_threads (int, optional): intra-op threads. Defaults to 0, all available cpus.
+        cpu_cores (Optional[list[int]], optional): cpu ids of a pinned cpu replica. The
+            intra-op threads are pinned to them, at most one thread per cpu. Defaults to None.
+    """
+    if profile == OnnxSessionProfile.default and not num_threads and not cpu_cores:
+        return None
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if cpu_cores:
+        num_threads = min(num_threads or len(cpu_cores), len(cpu_cores))
+        if num_threads > 1:
+            # the calling thread, pinned by its ModelWorker, is the first intra-op thread.
+            # onnxruntime counts processor ids from 1
+            options.add_session_config_entry(
+                "session.intra_op_thread_affinities",
+                ";".join(str(cpu + 1) for cpu in cpu_cores[1:num_threads]),
+            )
+    if profile == OnnxSessionProfile.default:
+        options.intra_op_num_threads = num_threads
+        return options
+    options.intra_op_num_threads = num_threads or _available_cpus()
+    # one run at a time per session, the inter-op pool would only add idle threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.inter_op_num_threads = 1
+    options.enable_cpu_mem_arena = True
+    options.enable_mem_pattern = True
+    options.add_session_config_entry(
+        "session.intra_op.allow_spinning",
+        "0" if profile == OnnxSessionProfile.throughput else "1",
+    )
+    return options
+
+
+def tune_session_threads(
+    model_path: Union[str, Path],
+    inputs: dict[str, np.ndarray],
+    provider: str = "CPUExecutionProvider",
+    repeats: int = 3,
+) -> tuple["ort.InferenceSession", int]:
+    """Creates the session with a few intra-op thread counts,
+    returns the one with the fastest run on `inputs`, and its thread count."""
+    cpus = _available_cpus()
+    candidates = sorted({max(cpus // 2**i, 1) for i in range(4)}, reverse=True)
+    best: Optional[tuple[float, int, "ort.InferenceSession"]] = None
+    for num_threads in candidates:
+        session = ort.InferenceSession(
+            str(model_path),
+            sess_options=onnx_session_options(OnnxSessionProfile.latency, num_threads),
+            providers=[provider],
+        )
+        feed = {i.name: inputs[i.name] for i in session.get_inputs() if i.name in inputs}
+        session.run(None, feed)
+        timings = []
+        for _ in range(repeats):
+            start = perf_counter()
+            session.run(None, feed)
+            timings.append(perf_counter() - start)
+        logger.debug(f"onnx intra_op_num_threads={num_threads}: {min(timings)*1000:.2f} ms")
+        if best is None or min(timings) < best[0]:
+            best = (min(timings), num_threads, session)
+    assert best is not None
+    logger.info(f"onnx session tuned to intra_op_num_threads={best[1]} of {candidates}")
+    return best[2], best[1]
+
+
 def optimize_model(
     model_name_or_path: Union[str, Path],
     model_class: "ORTModel",
@@ -92,6 +284,7 @@ def optimize_model(
     optimize_model=False,
     revision: Optional[str] = None,
     trust_remote_code: bool = True,
+    session_options: Optional["ort.SessionOptions"] = None,
 ) -> "OptimizedModel":
     """
     Optimizes, and then loads the model to work best with the execution provider.
@@ -104,6 +297,8 @@ def optimize_model(
         optimize_model (bool, optional): Whether to optimize the model. Defaults to False.
         revision (Optional[str], optional): The revision to use. Defaults to None.
         trust_remote_code (bool, optional): Whether to trust the remote code. Defaults to True.
+        session_options (Optional[ort.SessionOptions], optional): The onnxruntime session
+            options, e.g. from `onnx_session_options`. Defaults to None.
     """
 
     ## If there is no need for optimization
@@ -113,6 +308,7 @@ def optimize_model(
             revision=revision,
             trust_remote_code=trust_remote_code,
             provider=execution_provider,
+            session_options=session_options,
             file_name=file_name,
             provider_options={
                 "trt_fp16_enable": True,
@@ -132,6 +328,7 @@ def optimize_model(
             revision=revision,
             trust_remote_code=trust_remote_code,
             provider=execution_provider,
+            session_options=session_options,
             file_name=file_name,
         )
 
@@ -152,6 +349,7 @@ def optimize_model(
             revision=revision,
             trust_remote_code=trust_remote_code,
             provider=execution_provider,
+            session_options=session_options,
             file_name=file_optimized.name,
         )
 
@@ -160,6 +358,7 @@ def optimize_model(
         revision=revision,
         trust_remote_code=trust_remote_code,
         provider=execution_provider,
+        session_options=session_options,
         file_name=file_name,
     )
     if not optimize_model or execution_provider == "TensorrtExecutionProvider":
@@ -193,6 +392,7 @@ def optimize_model(
             revision=revision,
             trust_remote_code=trust_remote_code,
             provider=execution_provider,
+            session_options=session_options,
             file_name=Path(file_name).name.replace(".onnx", OPTIMIZED_SUFFIX),
         )
     except Exception as e:
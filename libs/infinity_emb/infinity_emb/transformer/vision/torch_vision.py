@@ -14,6 +14,7 @@ from infinity_emb._optional_imports import (
 from infinity_emb.args import EngineArgs
 from infinity_emb.primitives import Device, Dtype
 from infinity_emb.transformer.abstract import BaseTIMM
+from infinity_emb.transformer.multi_vector import pool_multi_vector
 from infinity_emb.transformer.quantization.interface import (
     quant_embedding_decorator,
     quant_interface,
@@ -220,6 +221,11 @@ class TIMM(BaseTIMM):
         text_embeds, image_embeds, type_is_img = out_features
         text_embeds = self._normalize_cpu(text_embeds, normalize=not self.is_colipali)
         image_embeds = self._normalize_cpu(image_embeds, normalize=not self.is_colipali)
+        if self.is_colipali and self.engine_args.token_pool_factor > 1:
+            # pool the patches of the images (documents), queries keep all their tokens
+            image_embeds = iter(
+                pool_multi_vector(list(image_embeds), self.engine_args.token_pool_factor)
+            )
 
         embeddings = list(next(image_embeds if is_img else text_embeds) for is_img in type_is_img)
         return embeddings
@@ -0,0 +1,463 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2023-now michaelfeil
+
+"""
+Vector collections, searched in the same process as the models that embed them.
+
+Every collection belongs to one served model and is stored in its own folder:
+    - `collection.json`: the model name and its `embedding_dtype`.
+    - `vectors.npy`: a memory-mapped [capacity, ...] array of the embeddings,
+        the first `count` rows are in use.
+    - `journal.jsonl`: one line per upsert or delete of an id, with its metadata.
+        Replaying it restores the row of every id. It is compacted on close.
+
+Deleting an id moves the last row into its place, so the rows stay dense.
+
+Search is exact (chunked matrix products) for small collections and for
+`binary`/`ubinary` embeddings, which are compared with hamming distances.
+Larger collections of float/int8 embeddings are searched with an IVF index:
+spherical k-means centroids, of which the closest `nprobe` per query are scanned.
+The index is kept in memory and retrained when the collection doubles or halves.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from infinity_emb.inference.similarity import similarity_scores, top_k_per_row
+from infinity_emb.inference.threading_asyncio import to_thread
+from infinity_emb.log_handler import logger
+from infinity_emb.primitives import CollectionError, CollectionMatchReturnType, EmbeddingDtype
+
+__all__ = ["CollectionStore", "VectorCollection"]
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]{1,128}$")
+_INITIAL_CAPACITY = 1024
+# collections with at least this many float/int8 vectors are searched with IVF
+_IVF_MIN_SIZE = 65_536
+_KMEANS_ITERATIONS = 10
+# rows scored per matrix product during search and index assignment
+_CHUNK_ROWS = 65_536
+
+
+def _as_float(vectors: np.ndarray, embedding_dtype: EmbeddingDtype) -> np.ndarray:
+    """float32 vectors with the same cosine similarities as the int8/uint8 embeddings"""
+    if embedding_dtype == EmbeddingDtype.uint8:
+        return vectors.astype(np.float32) - 128
+    return vectors.astype(np.float32, copy=False)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class _IVFIndex:
+    """inverted file index: the id of the closest centroid of every row"""
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, trained_size: int):
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_size = trained_size
+        self.nprobe = min(len(centroids), max(4, len(centroids) // 32))
+
+    def assign(self, vectors: np.ndarray, embedding_dtype: EmbeddingDtype) -> np.ndarray:
+        return np.argmax(
+            _normalize(_as_float(vectors, embedding_dtype)) @ self.centroids.T, axis=1
+        ).astype(np.int32)
+
+    def probe(self, query: np.ndarray, embedding_dtype: EmbeddingDtype) -> np.ndarray:
+        """ids of the `nprobe` closest centroids of a single query"""
+        scores = _normalize(_as_float(query[None], embedding_dtype)) @ self.centroids.T
+        return np.argpartition(-scores[0], self.nprobe - 1)[: self.nprobe]
+
+    @classmethod
+    def train(
+        cls, vectors: np.ndarray, embedding_dtype: EmbeddingDtype, seed: int = 0
+    ) -> "_IVFIndex":
+        count = len(vectors)
+        n_lists = max(1, min(count, int(2 * np.sqrt(count))))
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(count, size=min(count, 32 * n_lists), replace=False))
+        points = _normalize(_as_float(vectors[sample], embedding_dtype))
+        centroids = points[rng.choice(len(points), size=n_lists, replace=False)]
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = np.argmax(points @ centroids.T, axis=1)
+            # sum the points of each list, empty lists keep their previous centroid
+            order = np.argsort(labels, kind="stable")
+            filled, starts = np.unique(labels[order], return_index=True)
+            centroids[filled] = _normalize(np.add.reduceat(points[order], starts, axis=0))
+
+        index = cls(centroids, np.empty(0, dtype=np.int32), trained_size=count)
+        index.assignments = np.concatenate(
+            [np.empty(0, dtype=np.int32)]
+            + [
+                index.assign(vectors[start : start + _CHUNK_ROWS], embedding_dtype)
+                for start in range(0, count, _CHUNK_ROWS)
+            ]
+        )
+        return index
+
+
+class VectorCollection:
+    """Vectors of a single served model, with ids and optional metadata.
+
+    Not thread-safe, `CollectionStore` runs all calls on a single thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        model: str,
+        embedding_dtype: EmbeddingDtype,
+        ivf_min_size: int = _IVF_MIN_SIZE,
+    ):
+        self.path = path
+        self.model = model
+        self.embedding_dtype = embedding_dtype
+        self._ivf_min_size = ivf_min_size
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._metadata: list[Optional[dict]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._ivf: Optional[_IVFIndex] = None
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        info_path = self.path / "collection.json"
+        if info_path.exists():
+            info = json.loads(info_path.read_text())
+            if info["model"] != model or info["embedding_dtype"] != embedding_dtype.value:
+                raise CollectionError(
+                    f"collection `{self.name}` belongs to model `{info['model']}` "
+                    f"with embedding_dtype `{info['embedding_dtype']}`"
+                )
+        else:
+            info_path.write_text(
+                json.dumps(dict(model=model, embedding_dtype=embedding_dtype.value))
+            )
+        if (self.path / "vectors.npy").exists():
+            self._vectors = np.load(self.path / "vectors.npy", mmap_mode="r+")
+        self._replay_journal()
+        self._journal = open(self.path / "journal.jsonl", "a", encoding="utf-8")
+
+    @classmethod
+    def open(cls, path: Path, **kwargs) -> "VectorCollection":
+        """opens an existing collection folder"""
+        info = json.loads((path / "collection.json").read_text())
+        return cls(
+            path,
+            model=info["model"],
+            embedding_dtype=EmbeddingDtype(info["embedding_dtype"]),
+            **kwargs,
+        )
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _add_id(self, id: str, metadata: Optional[dict]) -> int:
+        row = self._rows.get(id)
+        if row is None:
+            row = len(self._ids)
+            self._rows[id] = row
+            self._ids.append(id)
+            self._metadata.append(metadata)
+        else:
+            self._metadata[row] = metadata
+        return row
+
+    def _remove_id(self, id: str) -> tuple[int, int]:
+        """removes the id, moving the last row into its place. returns (row, last row)"""
+        row = self._rows.pop(id)
+        last = len(self._ids) - 1
+        if row != last:
+            self._ids[row] = self._ids[last]
+            self._metadata[row] = self._metadata[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        self._metadata.pop()
+        return row, last
+
+    def _replay_journal(self) -> None:
+        journal_path = self.path / "journal.jsonl"
+        if not journal_path.exists():
+            return
+        with open(journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                if not line.endswith("\n"):
+                    # partially written last line, e.g. after a crash
+                    break
+                entry = json.loads(line)
+                if entry["op"] == "upsert":
+                    self._add_id(entry["id"], entry.get("metadata"))
+                elif entry["id"] in self._rows:
+                    self._remove_id(entry["id"])
+
+    def _ensure_capacity(self, count: int, row_shape: tuple[int, ...], dtype: np.dtype) -> None:
+        if self._vectors is not None and count <= len(self._vectors):
+            return
+        capacity = _INITIAL_CAPACITY
+        if self._vectors is not None:
+            capacity = 2 * len(self._vectors)
+        while capacity < count:
+            capacity *= 2
+        tmp_path = self.path / "vectors.tmp.npy"
+        vectors = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=dtype, shape=(capacity, *row_shape)
+        )
+        if self._vectors is not None:
+            vectors[: len(self)] = self._vectors[: len(self)]
+        vectors.flush()
+        del vectors
+        self._vectors = None
+        os.replace(tmp_path, self.path / "vectors.npy")
+        self._vectors = np.load(self.path / "vectors.npy", mmap_mode="r+")
+
+    def _check_vectors(self, vectors: np.ndarray) -> None:
+        if vectors.ndim != 2:
+            raise CollectionError(
+                f"collections hold one vector per input, got embeddings of shape {vectors.shape}"
+            )
+        if self._vectors is not None and (
+            vectors.shape[1:] != self._vectors.shape[1:] or vectors.dtype != self._vectors.dtype
+        ):
+            raise CollectionError(
+                f"collection `{self.name}` holds vectors of shape {self._vectors.shape[1:]} "
+                f"and dtype {self._vectors.dtype}, got {vectors.shape[1:]} and {vectors.dtype}"
+            )
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        metadata: Optional[Sequence[Optional[dict]]] = None,
+    ) -> int:
+        """inserts or replaces the vectors of `ids`. returns the size of the collection"""
+        if metadata is None:
+            metadata = [None] * len(ids)
+        if not len(ids) == len(vectors) == len(metadata):
+            raise CollectionError("ids, inputs and metadata must have the same length")
+        self._check_vectors(vectors)
+        self._ensure_capacity(len(self) + len(ids), vectors.shape[1:], vectors.dtype)
+        assert self._vectors is not None
+
+        rows = np.array([self._add_id(i, m) for i, m in zip(ids, metadata)], dtype=np.intp)
+        # for duplicated ids in one call, the last vector is written last and wins.
+        self._vectors[rows] = vectors
+        if self._ivf is not None:
+            assignments = self._ivf.assign(vectors, self.embedding_dtype)
+            if len(self._ivf.assignments) < len(self):
+                self._ivf.assignments = np.resize(self._ivf.assignments, len(self._vectors))
+            self._ivf.assignments[rows] = assignments
+        self._journal.writelines(
+            json.dumps(dict(op="upsert", id=i, metadata=m)) + "\n" for i, m in zip(ids, metadata)
+        )
+        self._journal.flush()
+        return len(self)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """deletes the vectors of `ids`, unknown ids are ignored. returns the number deleted"""
+        deleted = 0
+        for id in ids:
+            if id not in self._rows:
+                continue
+            row, last = self._remove_id(id)
+            if row != last:
+                assert self._vectors is not None
+                self._vectors[row] = self._vectors[last]
+                if self._ivf is not None:
+                    self._ivf.assignments[row] = self._ivf.assignments[last]
+            self._journal.write(json.dumps(dict(op="delete", id=id)) + "\n")
+            deleted += 1
+        self._journal.flush()
+        return deleted
+
+    def _uses_ivf(self) -> bool:
+        """(re-)trains the IVF index if needed, returns False if searching exhaustively"""
+        if len(self) < self._ivf_min_size or self.embedding_dtype.uses_bitpacking():
+            self._ivf = None
+            return False
+        if self._ivf is None or not (
+            self._ivf.trained_size / 2 <= len(self) <= 2 * self._ivf.trained_size
+        ):
+            assert self._vectors is not None
+            logger.info("training IVF index of collection `%s` on %s vectors", self.name, len(self))
+            self._ivf = _IVFIndex.train(self._vectors[: len(self)], self.embedding_dtype)
+        return True
+
+    def _exact_search(
+        self, queries: np.ndarray, top_k: int, candidates: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """[n, <=top_k] highest scores and rows among all or the `candidates` rows"""
+        assert self._vectors is not None
+        n_rows = len(self) if candidates is None else len(candidates)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.intp)
+        for start in range(0, n_rows, _CHUNK_ROWS):
+            end = min(start + _CHUNK_ROWS, n_rows)
+            if candidates is None:
+                rows = np.arange(start, end)
+                chunk = self._vectors[start:end]
+            else:
+                rows = candidates[start:end]
+                chunk = self._vectors[rows]
+            scores = similarity_scores(queries, chunk, self.embedding_dtype)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(rows, (len(queries), len(rows)))], 1)
+            top = top_k_per_row(scores, top_k)
+            assert top.indices is not None
+            best_scores, best_rows = top.scores, np.take_along_axis(rows, top.indices, axis=1)
+        return best_scores, best_rows
+
+    def search(self, queries: np.ndarray, top_k: int = 10) -> list[list[CollectionMatchReturnType]]:
+        """the top_k most similar vectors of each query, sorted descending"""
+        if not len(self):
+            return [[] for _ in range(len(queries))]
+        self._check_vectors(queries)
+        if not self._uses_ivf():
+            scores, rows = self._exact_search(queries, top_k)
+            matches = list(zip(scores, rows))
+        else:
+            assert self._ivf is not None
+            assignments = self._ivf.assignments[: len(self)]
+            matches = []
+            for query in queries:
+                probes = self._ivf.probe(query, self.embedding_dtype)
+                candidates = np.flatnonzero(np.isin(assignments, probes))
+                scores, rows = self._exact_search(query[None], top_k, candidates)
+                matches.append((scores[0], rows[0]))
+        return [
+            [
+                CollectionMatchReturnType(
+                    id=self._ids[row], score=float(score), metadata=self._metadata[row]
+                )
+                for score, row in zip(query_scores, query_rows)
+            ]
+            for query_scores, query_rows in matches
+        ]
+
+    def close(self) -> None:
+        """flushes the vectors and compacts the journal"""
+        if self._vectors is not None:
+            self._vectors.flush()  # type: ignore[attr-defined]
+        self._journal.close()
+        tmp_path = self.path / "journal.tmp.jsonl"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            journal.writelines(
+                json.dumps(dict(op="upsert", id=i, metadata=m)) + "\n"
+                for i, m in zip(self._ids, self._metadata)
+            )
+        os.replace(tmp_path, self.path / "journal.jsonl")
+
+
+class CollectionStore:
+    """All collections in the folder `path`.
+
+    Collections are created on the first upsert. The async methods run on a
+    single worker thread, which serializes all reads and writes.
+    """
+
+    def __init__(self, path: str, ivf_min_size: int = _IVF_MIN_SIZE):
+        self.path = Path(path)
+        self._ivf_min_size = ivf_min_size
+        self._collections: dict[str, VectorCollection] = {}
+        self._threadpool = ThreadPoolExecutor(max_workers=1)
+
+    def open(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        for folder in sorted(self.path.iterdir()):
+            if (folder / "collection.json").exists():
+                self._collections[folder.name] = VectorCollection.open(
+                    folder, ivf_min_size=self._ivf_min_size
+                )
+        logger.info("loaded %s collections from %s", len(self._collections), self.path)
+
+    def close(self) -> None:
+        self._threadpool.shutdown(wait=True)
+        # threads are started lazily, a fresh pool allows to `open` again
+        self._threadpool = ThreadPoolExecutor(max_workers=1)
+        for collection in self._collections.values():
+            collection.close()
+        self._collections.clear()
+
+    def list_collections(self) -> list[VectorCollection]:
+        return list(self._collections.values())
+
+    def get(self, name: str) -> VectorCollection:
+        if name not in self._collections:
+            raise CollectionError(f"collection `{name}` does not exist")
+        return self._collections[name]
+
+    def _get_or_create(
+        self, name: str, model: str, embedding_dtype: EmbeddingDtype
+    ) -> VectorCollection:
+        if name not in self._collections:
+            if not _NAME_PATTERN.match(name):
+                raise CollectionError(
+                    f"invalid collection name `{name}`, use up to 128 of `A-Za-z0-9_-`"
+                )
+            self._collections[name] = VectorCollection(
+                self.path / name,
+                model=model,
+                embedding_dtype=embedding_dtype,
+                ivf_min_size=self._ivf_min_size,
+            )
+        collection = self._collections[name]
+        if collection.model != model:
+            raise CollectionError(
+                f"collection `{name}` belongs to model `{collection.model}`, not `{model}`"
+            )
+        return collection
+
+    def _upsert(self, name, model, embedding_dtype, ids, embeddings, metadata) -> int:
+        collection = self._get_or_create(name, model, embedding_dtype)
+        return collection.upsert(ids, np.asarray(embeddings), metadata)
+
+    async def upsert(
+        self,
+        name: str,
+        *,
+        model: str,
+        embedding_dtype: EmbeddingDtype,
+        ids: Sequence[str],
+        embeddings: Sequence[np.ndarray],
+        metadata: Optional[Sequence[Optional[dict]]] = None,
+    ) -> int:
+        """upserts the embeddings of `model` into the collection, creating it if needed.
+        returns the size of the collection"""
+        return await to_thread(
+            self._upsert,
+            self._threadpool,
+            name,
+            model,
+            embedding_dtype,
+            ids,
+            embeddings,
+            metadata,
+        )
+
+    def _delete(self, name: str, ids: Sequence[str]) -> tuple[int, int]:
+        collection = self.get(name)
+        return collection.delete(ids), len(collection)
+
+    async def delete(self, name: str, ids: Sequence[str]) -> tuple[int, int]:
+        """deletes `ids` from the collection. returns the number deleted and the new size"""
+        return await to_thread(self._delete, self._threadpool, name, ids)
+
+    def _search(self, name, embeddings, top_k) -> list[list[CollectionMatchReturnType]]:
+        return self.get(name).search(np.asarray(embeddings), top_k)
+
+    async def search(
+        self, name: str, *, embeddings: Sequence[np.ndarray], top_k: int = 10
+    ) -> list[list[CollectionMatchReturnType]]:
+        """the top_k matches in the collection for each query embedding"""
+        return await to_thread(self._search, self._threadpool, name, embeddings, top_k)
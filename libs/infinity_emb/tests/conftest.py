@@ -5,7 +5,15 @@ import socket
 
 import pytest
 import requests
-from sentence_transformers import InputExample, util  # type: ignore
+import torch
+from sentence_transformers import InputExample, SentenceTransformer, models, util  # type: ignore
+from transformers import (  # type: ignore
+    BertConfig,
+    BertModel,
+    BertTokenizerFast,
+    RobertaConfig,
+    RobertaModel,
+)
 
 pytest.DEFAULT_BERT_MODEL = "michaelfeil/bge-small-en-v1.5"
 pytest.DEFAULT_RERANKER_MODEL = "mixedbread-ai/mxbai-rerank-xsmall-v1"
@@ -48,6 +56,41 @@ def image_sample() -> tuple[requests.Response, str]:
     return (_download(pytest.IMAGE_SAMPLE_URL, stream=True)), pytest.IMAGE_SAMPLE_URL  # type: ignore
 
 
+@pytest.fixture
+def tiny_sentence_transformer(tmp_path):
+    """saves a randomly initialized 2-layer model with the sentence-transformers layout,
+    returns its path. Runs without internet."""
+
+    def _tiny_sentence_transformer(model_type: str = "bert", pooling: str = "mean") -> str:
+        path = tmp_path / f"{model_type}-{pooling}"
+        path.mkdir()
+        vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "one", "two", "three"]
+        (path / "vocab.txt").write_text("\n".join(vocab))
+        tokenizer = BertTokenizerFast(str(path / "vocab.txt"))
+        kwargs = dict(
+            vocab_size=len(vocab),
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=4,
+            intermediate_size=64,
+        )
+        torch.manual_seed(0)
+        if model_type == "bert":
+            model = BertModel(BertConfig(max_position_embeddings=64, **kwargs))
+        else:
+            model = RobertaModel(RobertaConfig(max_position_embeddings=66, **kwargs))
+        model.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+        transformer = models.Transformer(str(path))
+        pooling_module = models.Pooling(32, pooling)
+        SentenceTransformer(modules=[transformer, pooling_module, models.Normalize()]).save(
+            str(path)
+        )
+        return str(path)
+
+    return _tiny_sentence_transformer
+
+
 def internet_available():
     try:
         # Attempt to connect to a well-known public DNS server (Google's)
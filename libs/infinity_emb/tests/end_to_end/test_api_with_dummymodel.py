@@ -193,3 +193,57 @@ async def test_matryoshka_embedding(client):
         for embedding, sentence in zip(rdata["data"], inp):
             assert len(sentence) == embedding["embedding"][0]
             assert len(embedding["embedding"]) == matryoshka_dim
+
+
+@pytest.mark.anyio
+async def test_embedding_dtype_per_request(client):
+    inputs = ["hello", "world!"]
+    response = await client.post(f"{PREFIX}/embeddings", json=dict(input=inputs, model=MODEL_NAME))
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    floats = [d["embedding"] for d in response.json()["data"]]
+
+    response = await client.post(
+        f"{PREFIX}/embeddings",
+        json=dict(input=inputs, model=MODEL_NAME, embedding_dtype="float16"),
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    np.testing.assert_allclose([d["embedding"] for d in response.json()["data"]], floats)
+
+    response = await client.post(
+        f"{PREFIX}/embeddings",
+        json=dict(input=inputs, model=MODEL_NAME, embedding_dtype="ubinary", dimensions=8),
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    # dummy embeddings are positive: one byte with 8 set bits per input
+    assert [d["embedding"] for d in response.json()["data"]] == [[255], [255]]
+
+    response = await client.post(
+        f"{PREFIX}/embeddings",
+        json=dict(input=inputs, model=MODEL_NAME, embedding_dtype="float64"),
+    )
+    assert response.status_code == 422, f"{response.status_code}, {response.text}"
+
+
+@pytest.mark.anyio
+async def test_similarity(client):
+    queries = ["query one", "query two"]
+    documents = ["document a", "document b", "document c"]
+    response = await client.post(
+        f"{PREFIX}/similarity",
+        json=dict(queries=queries, documents=documents, model=MODEL_NAME),
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    rdata = response.json()
+    assert rdata["object"] == "similarity"
+    assert rdata["indices"] is None
+    # dummy embeddings all point in the same direction
+    assert np.allclose(rdata["scores"], np.ones((len(queries), len(documents))))
+
+    response = await client.post(
+        f"{PREFIX}/similarity",
+        json=dict(queries=queries, documents=documents, model=MODEL_NAME, top_k=2),
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    rdata = response.json()
+    assert np.array(rdata["scores"]).shape == (len(queries), 2)
+    assert all(set(row) <= set(range(len(documents))) for row in rdata["indices"])
@@ -0,0 +1,85 @@
+import tempfile
+
+import numpy as np
+import pytest
+from asgi_lifespan import LifespanManager
+from httpx import AsyncClient
+
+from infinity_emb import create_server
+from infinity_emb.args import EngineArgs
+from infinity_emb.primitives import InferenceEngine
+
+PREFIX = ""
+MODEL_NAME = "dummy-number-1"
+MODEL_NAME_2 = "dummy-number-2"
+
+app = create_server(
+    url_prefix=PREFIX,
+    engine_args_list=[
+        EngineArgs(model_name_or_path=MODEL_NAME, engine=InferenceEngine.debugengine),
+        EngineArgs(model_name_or_path=MODEL_NAME_2, engine=InferenceEngine.debugengine),
+    ],
+    collections_path=tempfile.mkdtemp(),
+)
+
+
+@pytest.fixture()
+async def client():
+    async with AsyncClient(app=app, base_url="http://test") as client, LifespanManager(app):
+        yield client
+
+
+@pytest.mark.anyio
+async def test_collections(client):
+    ids = ["a", "b", "c"]
+    response = await client.post(
+        f"{PREFIX}/collections/docs/upsert",
+        json=dict(
+            ids=ids,
+            input=["first", "second", "third"],
+            metadata=[dict(n=1), None, dict(n=3)],
+            model=MODEL_NAME,
+        ),
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    rdata = response.json()
+    assert rdata["upserted"] == 3
+    assert rdata["count"] == 3
+
+    # the collection belongs to MODEL_NAME
+    response = await client.post(
+        f"{PREFIX}/collections/docs/upsert",
+        json=dict(ids=["d"], input=["fourth"], model=MODEL_NAME_2),
+    )
+    assert response.status_code == 400, f"{response.status_code}, {response.text}"
+    response = await client.post(
+        f"{PREFIX}/collections/docs/upsert",
+        json=dict(ids=["d", "e"], input=["fourth"], model=MODEL_NAME),
+    )
+    assert response.status_code == 400, f"{response.status_code}, {response.text}"
+
+    response = await client.post(
+        f"{PREFIX}/collections/docs/search", json=dict(input=["query", "query two"], top_k=2)
+    )
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    rdata = response.json()
+    assert rdata["model"] == MODEL_NAME
+    assert len(rdata["results"]) == 2
+    for matches in rdata["results"]:
+        assert len(matches) == 2
+        assert {m["id"] for m in matches} <= set(ids)
+        # dummy embeddings all point in the same direction
+        assert np.allclose([m["score"] for m in matches], 1.0)
+
+    response = await client.post(f"{PREFIX}/collections/missing/search", json=dict(input=["query"]))
+    assert response.status_code == 404, f"{response.status_code}, {response.text}"
+
+    response = await client.post(f"{PREFIX}/collections/docs/delete", json=dict(ids=["a", "x"]))
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    assert response.json()["deleted"] == 1
+    assert response.json()["count"] == 2
+
+    response = await client.get(f"{PREFIX}/collections")
+    assert response.status_code == 200, f"{response.status_code}, {response.text}"
+    rdata = response.json()
+    assert [(c["name"], c["model"], c["count"]) for c in rdata["data"]] == [("docs", MODEL_NAME, 2)]
@@ -1,3 +1,7 @@
+import base64
+import json
+import pathlib
+
 import pytest
 import torch
 from asgi_lifespan import LifespanManager
@@ -73,3 +77,73 @@ async def test_embedding(client):
     np.testing.assert_allclose(
         rdata["data"][1]["embedding"], rdata["data"][2]["embedding"], atol=5e-3
     )
+
+
+@pytest.mark.anyio
+async def test_packed_embedding_round_trip(tiny_sentence_transformer):
+    """`packed=true` returns the same token vectors as the nested lists, in one buffer"""
+    path = tiny_sentence_transformer()
+    config_path = pathlib.Path(path) / "config.json"
+    config = json.loads(config_path.read_text())
+    config["architectures"] = ["HF_ColBERT"]
+    config_path.write_text(json.dumps(config))
+    app = create_server(
+        engine_args_list=[
+            EngineArgs(
+                model_name_or_path=path,
+                served_model_name="tiny-colbert",
+                engine=InferenceEngine.torch,
+                device=Device.cpu,
+                bettertransformer=False,
+            )
+        ],
+    )
+    inputs = ["one two three", "one", "three two one two three"]
+    async with AsyncClient(app=app, base_url="http://test") as client, LifespanManager(app):
+        response = await client.post("/embeddings", json=dict(input=inputs, model="tiny-colbert"))
+        assert response.status_code == 200, response.text
+        nested = [d["embedding"] for d in response.json()["data"]]
+        assert [len(e) for e in nested] == [5, 3, 7]
+
+        for encoding_format in ["float", "base64"]:
+            response = await client.post(
+                "/embeddings",
+                json=dict(
+                    input=inputs,
+                    model="tiny-colbert",
+                    packed=True,
+                    encoding_format=encoding_format,
+                ),
+            )
+            assert response.status_code == 200, response.text
+            (packed,) = response.json()["data"]
+            assert packed["object"] == "packed_embedding"
+            assert packed["offsets"] == [0, 5, 8, 15]
+            if encoding_format == "base64":
+                buffer = np.frombuffer(base64.b64decode(packed["embedding"]), packed["dtype"])
+            else:
+                buffer = np.array(packed["embedding"], dtype=np.float32)
+            buffer = buffer.reshape(-1, packed["dim"])
+            for i, embedding in enumerate(nested):
+                start, end = packed["offsets"][i : i + 2]
+                np.testing.assert_allclose(buffer[start:end], embedding, rtol=1e-6)
+
+        # bit-packed token vectors keep their shape, with `dim` bytes per vector
+        response = await client.post(
+            "/embeddings",
+            json=dict(
+                input=inputs,
+                model="tiny-colbert",
+                packed=True,
+                encoding_format="base64",
+                embedding_dtype="ubinary",
+            ),
+        )
+        assert response.status_code == 200, response.text
+        (packed,) = response.json()["data"]
+        assert (packed["dim"], packed["dtype"]) == (32 // 8, "|u1")
+        buffer = np.frombuffer(base64.b64decode(packed["embedding"]), packed["dtype"])
+        assert buffer.size == packed["offsets"][-1] * packed["dim"]
+        np.testing.assert_array_equal(
+            np.unpackbits(buffer).reshape(-1, 32), np.concatenate(nested) > 0
+        )
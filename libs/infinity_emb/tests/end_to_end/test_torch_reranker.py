@@ -136,6 +136,51 @@ async def test_reranker_top_n(client):
     assert all(results)
 
 
+@pytest.mark.anyio
+async def test_reranker_many(client):
+    groups = [
+        {
+            "query": "Where is the Eiffel Tower located?",
+            "documents": [
+                "The Eiffel Tower is located in the United States.",
+                "The Eiffel Tower is located in Paris, France",
+            ],
+        },
+        {
+            "query": "Where is Munich?",
+            "documents": ["The sky is blue.", "Munich is in Germany.", "Paris is in France."],
+            "top_n": 1,
+        },
+    ]
+    response = await client.post(
+        f"{PREFIX}/rerank_many",
+        json={"model": MODEL, "groups": groups, "return_documents": True},
+    )
+    assert response.status_code == 200
+    rdata = response.json()
+    assert len(rdata["results"]) == 2
+    assert len(rdata["results"][0]) == 2
+    assert rdata["results"][0][0]["index"] == 1
+    assert rdata["results"][1] == [
+        {
+            "relevance_score": rdata["results"][1][0]["relevance_score"],
+            "index": 1,
+            "document": "Munich is in Germany.",
+        }
+    ]
+    # same scores as reranking each query on its own
+    for group, results in zip(groups, rdata["results"]):
+        response_single = await client.post(
+            f"{PREFIX}/rerank",
+            json={"model": MODEL, "query": group["query"], "documents": group["documents"]},
+        )
+        for result, result_single in zip(results, response_single.json()["results"]):
+            assert result["index"] == result_single["index"]
+            assert result["relevance_score"] == pytest.approx(
+                result_single["relevance_score"], abs=1e-3
+            )
+
+
 @pytest.mark.anyio
 async def test_reranker_invalid_top_n(client):
     query = "Where is the Eiffel Tower located?"
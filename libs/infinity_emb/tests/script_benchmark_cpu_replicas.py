@@ -0,0 +1,68 @@
+"""Throughput of one replica using all cpus against several core-pinned cpu replicas,
+fed by the same batch queue, under concurrent requests.
+
+python tests/script_benchmark_cpu_replicas.py --model michaelfeil/bge-small-en-v1.5 --replicas 1 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from infinity_emb import AsyncEmbeddingEngine, EngineArgs
+
+
+async def _throughput(engine_args: EngineArgs, sentences: list[str], request_size: int) -> float:
+    engine = AsyncEmbeddingEngine.from_args(engine_args)
+    async with engine:
+        # warmup all replicas
+        await asyncio.gather(
+            *[engine.embed(sentences[:request_size]) for _ in range(2 * engine_args.cpu_replicas)]
+        )
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                engine.embed(sentences[i : i + request_size])
+                for i in range(0, len(sentences), request_size)
+            ]
+        )
+        return len(sentences) / (time.perf_counter() - start)
+
+
+def benchmark_cpu_replicas(
+    model: str, engine: str, replicas: list[int], n: int, batch_size: int, words: int
+):
+    sentences = [f"{i} " + " ".join(["embedding"] * words) for i in range(n)]
+    cpus = len(os.sched_getaffinity(0))
+    print(f"{n} inputs of {words} words, batch size {batch_size}, {cpus} cpus, engine {engine}")
+    print(f"{'replicas':<10}{'cpus/replica':>14}{'emb/s':>10}{'speedup':>10}")
+    baseline = None
+    for cpu_replicas in replicas:
+        engine_args = EngineArgs(
+            model_name_or_path=model,
+            engine=engine,
+            device="cpu",
+            batch_size=batch_size,
+            cpu_replicas=cpu_replicas,
+            model_warmup=False,
+        )
+        throughput = asyncio.run(_throughput(engine_args, sentences, request_size=batch_size))
+        baseline = baseline or throughput
+        print(
+            f"{cpu_replicas:<10}{cpus // cpu_replicas:>14}{throughput:>10.1f}"
+            f"{throughput / baseline:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="michaelfeil/bge-small-en-v1.5")
+    parser.add_argument("--engine", default="torch")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--n", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--words", type=int, default=48)
+    args = parser.parse_args()
+    benchmark_cpu_replicas(
+        args.model, args.engine, args.replicas, args.n, args.batch_size, args.words
+    )
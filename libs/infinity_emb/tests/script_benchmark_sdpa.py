@@ -0,0 +1,58 @@
+"""Forward pass time of eager attention against sdpa
+(torch.nn.functional.scaled_dot_product_attention), for padded batches.
+
+python tests/script_benchmark_sdpa.py --model michaelfeil/bge-small-en-v1.5
+"""
+
+import argparse
+import time
+
+import torch
+from transformers import AutoModel  # type: ignore
+
+
+def _forward_time(model, inputs, repeats: int) -> float:
+    best = float("inf")
+    with torch.inference_mode():
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model(**inputs)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_sdpa(model: str, batch_size: int, seq_len: int, repeats: int):
+    torch.manual_seed(0)
+    models = {
+        attn: AutoModel.from_pretrained(model, attn_implementation=attn).eval()
+        for attn in ["eager", "sdpa"]
+    }
+    vocab_size = models["eager"].config.vocab_size
+    inputs = dict(
+        input_ids=torch.randint(5, vocab_size, (batch_size, seq_len)),
+        # lengths between 1 and seq_len, right padded
+        attention_mask=(
+            torch.arange(seq_len)[None] < torch.randint(1, seq_len + 1, (batch_size, 1))
+        ).long(),
+    )
+    print(f"batch size {batch_size}, {seq_len} tokens, best of {repeats}")
+    print(f"{'attention':<10}{'ms':>10}{'speedup':>10}")
+    baseline = None
+    for attn, m in models.items():
+        _forward_time(m, inputs, 2)  # warmup
+        ms = 1000 * _forward_time(m, inputs, repeats)
+        baseline = baseline or ms
+        print(f"{attn:<10}{ms:>10.1f}{baseline / ms:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="michaelfeil/bge-small-en-v1.5")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seq-len", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    benchmark_sdpa(args.model, args.batch_size, args.seq_len, args.repeats)
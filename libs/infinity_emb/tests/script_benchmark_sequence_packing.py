@@ -0,0 +1,80 @@
+"""Throughput of the torch embedder with padded batches against sequence packing,
+for inputs with a long-tailed (log-normal) length distribution.
+
+python tests/script_benchmark_sequence_packing.py --model michaelfeil/bge-small-en-v1.5
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.transformer.embedder.sentence_transformer import (
+    SentenceTransformerPatched,
+)
+from infinity_emb.transformer.sequence_packing import PackedFeatures
+
+
+def benchmark_sequence_packing(
+    model: str, n: int, batch_size: int, median_words: int, max_words: int, repeats: int
+):
+    rng = np.random.default_rng(0)
+    n_words = np.clip(rng.lognormal(np.log(median_words), 0.8, size=n), 1, max_words)
+    sentences = [" ".join(["embedding"] * int(k)) for k in n_words]
+
+    print(f"{n} inputs, {median_words} median words, batch size {batch_size}, best of {repeats}")
+    print(f"{'mode':<10}{'rows/batch':>12}{'tokens/s':>12}{'speedup':>10}")
+    baseline = None
+    results = {}
+    for sequence_packing in [False, True]:
+        embedder = SentenceTransformerPatched(
+            engine_args=EngineArgs(
+                model_name_or_path=model,
+                sequence_packing=sequence_packing,
+                bettertransformer=False,
+                model_warmup=False,
+            )
+        )
+        batches = [
+            embedder.encode_pre(sentences[i : i + batch_size]) for i in range(0, n, batch_size)
+        ]
+        tokens = sum(embedder.tokenize_lengths(sentences)) + 2 * n
+        rows = np.mean(
+            [
+                len(
+                    b.model_inputs["input_ids"] if isinstance(b, PackedFeatures) else b["input_ids"]
+                )
+                for b in batches
+            ]
+        )
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results[sequence_packing] = np.concatenate(
+                [embedder.encode_post(embedder.encode_core(b)) for b in batches]
+            )
+            best = min(best, time.perf_counter() - start)
+        throughput = tokens / best
+        baseline = baseline or throughput
+        mode = "packed" if sequence_packing else "padded"
+        print(f"{mode:<10}{rows:>12.1f}{throughput:>12.0f}{throughput / baseline:>9.2f}x")
+    print(f"max abs difference: {np.abs(results[True] - results[False]).max():.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="michaelfeil/bge-small-en-v1.5")
+    parser.add_argument("--n", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--median-words", type=int, default=24)
+    parser.add_argument("--max-words", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    benchmark_sequence_packing(
+        args.model, args.n, args.batch_size, args.median_words, args.max_words, args.repeats
+    )
@@ -0,0 +1,61 @@
+"""Throughput of the similarity kernels of `infinity_emb.inference.similarity`
+for every embedding dtype, against float32 cosine similarity.
+
+python tests/script_benchmark_similarity.py --n 1000000 --dim 1024
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sentence_transformers.quantization import quantize_embeddings  # type: ignore
+
+from infinity_emb.inference.similarity import similarity_scores, top_k_per_row
+from infinity_emb.primitives import EmbeddingDtype
+
+
+def benchmark_similarity(n: int, dim: int, n_queries: int, repeats: int):
+    rng = np.random.default_rng(0)
+    # float32 corpus in chunks, to quantize without a second full-size float copy
+    corpus = {dtype: [] for dtype in EmbeddingDtype}
+    queries = rng.standard_normal((n_queries, dim), dtype=np.float32)
+    ranges = np.stack([np.full(dim, -3.0), np.full(dim, 3.0)]).astype(np.float32)
+    for start in range(0, n, 100_000):
+        chunk = rng.standard_normal((min(100_000, n - start), dim), dtype=np.float32)
+        for dtype in EmbeddingDtype:
+            if dtype == EmbeddingDtype.float32:
+                corpus[dtype].append(chunk)
+            else:
+                corpus[dtype].append(quantize_embeddings(chunk, dtype.value, ranges=ranges))
+
+    print(f"{n} vectors of dim {dim}, {n_queries} queries, best of {repeats}")
+    print(f"{'dtype':<10}{'MB':>10}{'vectors/s':>16}{'speedup':>10}")
+    baseline = None
+    for dtype in EmbeddingDtype:
+        vectors = np.concatenate(corpus.pop(dtype))
+        if dtype == EmbeddingDtype.float32:
+            query = queries
+        else:
+            query = quantize_embeddings(queries, dtype.value, ranges=ranges)
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            top_k_per_row(similarity_scores(query, vectors, dtype), 10)
+            best = min(best, time.perf_counter() - start)
+        throughput = n_queries * n / best
+        baseline = baseline or throughput
+        print(
+            f"{dtype.value:<10}{vectors.nbytes / 2**20:>10.0f}"
+            f"{throughput:>16.3e}{throughput / baseline:>9.2f}x"
+        )
+        del vectors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--n-queries", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    benchmark_similarity(args.n, args.dim, args.n_queries, args.repeats)
@@ -0,0 +1,103 @@
+"""Load test of the gRPC API against the REST API of a running server.
+
+infinity_emb v2 --port 7997 --grpc-port 7998
+python tests/script_grpc_load.py
+"""
+
+import asyncio
+import logging
+import time
+
+import grpc  # type: ignore[import-untyped]
+import httpx
+import numpy as np
+
+from infinity_emb.grpc_service import infinity_pb2, infinity_pb2_grpc
+from infinity_emb.grpc_service.server import unpack_tensor
+
+LIVE_URL = "http://localhost:7997"
+GRPC_ADDRESS = "localhost:7998"
+CONCURRENCY = 64
+REQUESTS = 2048
+BATCH = 8
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _sample(i: int) -> list[str]:
+    return [f"Test count {i} {j} {list(range((i + j) % 64))}" for j in range(BATCH)]
+
+
+async def _run_concurrent(fn) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with semaphore:
+            await fn(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(REQUESTS)])
+    return time.perf_counter() - start
+
+
+async def rest(model: str) -> float:
+    async with httpx.AsyncClient(base_url=LIVE_URL, timeout=60) as client:
+
+        async def post(i):
+            response = await client.post("/embeddings", json={"input": _sample(i), "model": model})
+            assert response.status_code == 200, response.text
+
+        return await _run_concurrent(post)
+
+
+async def grpc_unary(stub, model: str) -> float:
+    async def call(i):
+        response = await stub.Embed(infinity_pb2.EmbedRequest(model=model, input=_sample(i)))
+        assert unpack_tensor(response.embeddings).shape[0] == BATCH
+
+    return await _run_concurrent(call)
+
+
+async def grpc_stream(stub, model: str) -> float:
+    requests = (
+        infinity_pb2.EmbedRequest(model=model, input=_sample(i), request_id=str(i))
+        for i in range(REQUESTS)
+    )
+    start = time.perf_counter()
+    received = 0
+    async for response in stub.EmbedStream(requests):
+        assert not response.error.code, response.error.message
+        received += 1
+    assert received == REQUESTS
+    return time.perf_counter() - start
+
+
+async def main():
+    async with grpc.aio.insecure_channel(GRPC_ADDRESS) as channel:
+        stub = infinity_pb2_grpc.InfinityStub(channel)
+        model = (await stub.Models(infinity_pb2.ModelsRequest())).models[0].id
+
+        # same output over both apis
+        async with httpx.AsyncClient(base_url=LIVE_URL) as client:
+            rest_embedding = (
+                await client.post("/embeddings", json={"input": _sample(0), "model": model})
+            ).json()["data"][0]["embedding"]
+        grpc_embedding = unpack_tensor(
+            (await stub.Embed(infinity_pb2.EmbedRequest(model=model, input=_sample(0)))).embeddings
+        )[0]
+        np.testing.assert_almost_equal(rest_embedding, grpc_embedding, 5)
+
+        for name, coro in [
+            ("REST /embeddings", rest(model)),
+            ("gRPC Embed", grpc_unary(stub, model)),
+            ("gRPC EmbedStream", grpc_stream(stub, model)),
+        ]:
+            duration = await coro
+            print(
+                f"{name:<20} {REQUESTS / duration:8.1f} requests/s "
+                f"{REQUESTS * BATCH / duration:8.1f} embeddings/s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
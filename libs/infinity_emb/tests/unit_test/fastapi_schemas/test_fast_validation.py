@@ -0,0 +1,61 @@
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from infinity_emb.fastapi_schemas.fast_validation import TextEmbeddingFastValidator
+from infinity_emb.fastapi_schemas.pymodels import MultiModalOpenAIEmbedding
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        dict(input="hello"),
+        dict(input="  hello world  ", model="my-model"),
+        dict(input=["a ", " b", "c"], encoding_format="base64", dimensions=8),
+        dict(input=["a"], modality="text", user="user-1", unknown_key=1),
+        dict(input=["a"], user=None),
+        dict(input=["a"], embedding_dtype="ubinary"),
+        dict(input=["a"], embedding_dtype=None),
+        dict(input=["a"], packed=True, encoding_format="base64"),
+    ],
+)
+def test_fast_validation_same_as_pydantic(body):
+    validator = TextEmbeddingFastValidator()
+    fast = validator(orjson.dumps(body))
+    assert fast is not None
+    slow = MultiModalOpenAIEmbedding.model_validate(body).root
+    assert fast.model_dump() == slow.model_dump()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        dict(input=["http://example.com/image.png"], modality="image"),
+        dict(input=["http://example.com/audio.wav"], modality="audio"),
+        dict(input=[]),
+        dict(input=[1, 2, 3]),
+        dict(input="a", model=5),
+        dict(input="a", encoding_format="int8"),
+        dict(input="a", dimensions="8"),
+        dict(input="a", dimensions=True),
+        dict(input="a", embedding_dtype="float64"),
+        dict(input="a", embedding_dtype=["int8"]),
+        dict(input="a", packed="true"),
+        dict(model="missing-input"),
+        ["not", "a", "dict"],
+    ],
+)
+def test_fast_validation_falls_back(body):
+    validator = TextEmbeddingFastValidator()
+    assert validator(orjson.dumps(body)) is None
+
+
+def test_fast_validation_limits():
+    validator = TextEmbeddingFastValidator(max_string_length=4, max_items=2)
+    assert validator(b'{"input": "abcd"}') is not None
+    assert validator(b'{"input": "  abcd  "}') is not None
+    assert validator(b'{"input": "abcde"}') is None
+    assert validator(b'{"input": ["a", "b", "c"]}') is None
+    assert validator(b"not json") is None
+    with pytest.raises(ValidationError):
+        MultiModalOpenAIEmbedding.model_validate(dict(input=[]))
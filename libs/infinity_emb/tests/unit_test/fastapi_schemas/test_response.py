@@ -1,6 +1,48 @@
+import base64
+
+import numpy as np
+import pytest
+
+from infinity_emb.args import EngineArgs
 from infinity_emb.fastapi_schemas.pymodels import OpenAIEmbeddingResult
+from infinity_emb.primitives import EmbeddingEncodingFormat
+from infinity_emb.transformer.multi_vector import unpack_multi_vector
 
 
 def test_embedding_response():
     res = OpenAIEmbeddingResult(data=[], model="hi", usage={"prompt_tokens": 5, "total_tokens": 10})
     assert res.model_dump()["object"] == "list"
+
+
+@pytest.mark.parametrize("encoding_format", list(EmbeddingEncodingFormat))
+@pytest.mark.parametrize("dtype", [np.float32, np.int8])
+def test_packed_embedding_response(encoding_format, dtype):
+    tokens = np.arange(6 * 4).reshape(6, 4).astype(dtype)
+    embeddings = unpack_multi_vector(tokens, np.array([2, 1, 3]))
+    response = OpenAIEmbeddingResult.to_embeddings_response(
+        embeddings,
+        engine_args=EngineArgs(engine="debugengine", served_model_name="dummy"),
+        usage=6,
+        encoding_format=encoding_format,
+        packed=True,
+    )
+    (packed,) = response["data"]
+    assert packed["offsets"] == [0, 2, 3, 6]
+    assert packed["dim"] == 4
+    if encoding_format == EmbeddingEncodingFormat.base64:
+        buffer = np.frombuffer(base64.b64decode(packed["embedding"]), dtype=packed["dtype"])
+    else:
+        buffer = np.array(packed["embedding"])
+    np.testing.assert_array_equal(buffer.reshape(-1, packed["dim"]), tokens)
+    # validates as the response model
+    result = OpenAIEmbeddingResult(**OpenAIEmbeddingResult.with_defaults(response))
+    assert result.data[0].object == "packed_embedding"
+
+    # single-vector models, one row per input
+    response = OpenAIEmbeddingResult.to_embeddings_response(
+        list(tokens),
+        engine_args=EngineArgs(engine="debugengine", served_model_name="dummy"),
+        usage=6,
+        packed=True,
+    )
+    assert response["data"][0]["offsets"] == list(range(7))
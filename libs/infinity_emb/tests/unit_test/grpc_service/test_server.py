@@ -0,0 +1,97 @@
+import socket
+
+import numpy as np
+import pytest
+
+from infinity_emb._optional_imports import CHECK_GRPC
+from infinity_emb.args import EngineArgs
+from infinity_emb.engine import AsyncEngineArray
+
+pytestmark = pytest.mark.skipif(not CHECK_GRPC.is_available, reason="grpc is not installed")
+
+if CHECK_GRPC.is_available:
+    import grpc
+
+    from infinity_emb.grpc_service import infinity_pb2, infinity_pb2_grpc
+    from infinity_emb.grpc_service.server import start_grpc_server, unpack_tensor
+
+MODEL = "dummy"
+
+
+def _free_address() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{s.getsockname()[1]}"
+
+
+@pytest.fixture
+async def grpc_engine_array():
+    array = AsyncEngineArray.from_args([EngineArgs(engine="debugengine", served_model_name=MODEL)])
+    await array.astart()
+    yield array
+    await array.astop()
+
+
+@pytest.mark.anyio
+async def test_grpc_embed_unary_and_stream(grpc_engine_array):
+    address = _free_address()
+    server = await start_grpc_server(grpc_engine_array, address=address)
+    try:
+        async with grpc.aio.insecure_channel(address) as channel:
+            stub = infinity_pb2_grpc.InfinityStub(channel)
+            models = await stub.Models(infinity_pb2.ModelsRequest())
+            assert [m.id for m in models.models] == [MODEL]
+            assert "embed" in models.models[0].capabilities
+
+            sentences = ["hello", "world!"]
+            expected, expected_usage = await grpc_engine_array.embed(
+                model=MODEL, sentences=sentences
+            )
+            response = await stub.Embed(
+                infinity_pb2.EmbedRequest(model=MODEL, input=sentences, request_id="a")
+            )
+            assert response.request_id == "a"
+            assert response.usage == expected_usage
+            np.testing.assert_array_equal(unpack_tensor(response.embeddings), np.stack(expected))
+
+            requests = [
+                infinity_pb2.EmbedRequest(model=MODEL, input=sentences, request_id=str(i))
+                for i in range(10)
+            ] + [infinity_pb2.EmbedRequest(model=MODEL, input=[], request_id="empty")]
+            responses = [r async for r in stub.EmbedStream(iter(requests))]
+            by_id = {r.request_id: r for r in responses}
+            assert len(by_id) == 11
+            assert by_id["empty"].error.code == grpc.StatusCode.INVALID_ARGUMENT.value[0]
+            for i in range(10):
+                np.testing.assert_array_equal(
+                    unpack_tensor(by_id[str(i)].embeddings), np.stack(expected)
+                )
+
+            with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+                await stub.Embed(infinity_pb2.EmbedRequest(model=MODEL, input=[]))
+            assert exc_info.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+            with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+                await stub.Rerank(
+                    infinity_pb2.RerankRequest(model=MODEL, query="q", documents=["a"])
+                )
+            assert exc_info.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+    finally:
+        await server.stop(None)
+
+
+@pytest.mark.anyio
+async def test_grpc_api_key(grpc_engine_array):
+    address = _free_address()
+    server = await start_grpc_server(grpc_engine_array, address=address, api_key="secret")
+    try:
+        async with grpc.aio.insecure_channel(address) as channel:
+            stub = infinity_pb2_grpc.InfinityStub(channel)
+            with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+                await stub.Models(infinity_pb2.ModelsRequest())
+            assert exc_info.value.code() == grpc.StatusCode.UNAUTHENTICATED
+            models = await stub.Models(
+                infinity_pb2.ModelsRequest(), metadata=[("authorization", "Bearer secret")]
+            )
+            assert len(models.models) == 1
+    finally:
+        await server.stop(None)
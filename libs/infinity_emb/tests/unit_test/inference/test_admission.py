@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.engine import AsyncEmbeddingEngine
+from infinity_emb.inference.admission import TokenAdmission
+
+
+def test_token_admission_budget():
+    admission = TokenAdmission(max_queued_tokens=100)
+    assert admission.estimated_drain_time() is None
+    assert admission.retry_after() == 1
+
+    admission.add(60)
+    assert not admission.is_overloaded()
+    admission.add(60)
+    assert admission.is_overloaded()
+    assert admission.queue_fraction() == pytest.approx(1.2)
+
+    admission.complete(60)
+    admission.complete(60)
+    assert admission.queued_tokens == 0
+    assert not admission.is_overloaded()
+
+
+def test_token_admission_throughput():
+    admission = TokenAdmission(max_queued_tokens=100, min_window=0.05)
+    admission.add(1000)
+    time.sleep(0.1)
+    admission.complete(500)
+    tokens_per_second = admission.tokens_per_second
+    assert tokens_per_second is not None and 0 < tokens_per_second <= 500 / 0.1
+
+    drain_time = admission.estimated_drain_time()
+    assert drain_time == pytest.approx(500 / tokens_per_second)
+    # 400 tokens above the budget
+    assert admission.retry_after() >= int(400 / tokens_per_second)
+
+
+@pytest.mark.anyio
+async def test_engine_queue_tokens_released():
+    engine = AsyncEmbeddingEngine.from_args(EngineArgs(engine="debugengine"))
+    async with engine:
+        _, usage = await engine.embed(sentences=["hello", "world!"])
+        status = engine.overload_status()
+        assert usage == 11
+        assert status.queue_tokens == 0
+        assert status.tokens_per_second is not None
+        assert status.estimated_drain_time == 0
@@ -1,8 +1,12 @@
 import asyncio
 import copy
+import queue
 import random
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 import numpy as np
 import pytest
@@ -10,9 +14,16 @@ import torch
 
 from infinity_emb.args import EngineArgs
 from infinity_emb.inference import BatchHandler
+from infinity_emb.inference.batch_handler import (
+    ModelWorker,
+    ShutdownReadOnly,
+    ThreadPoolExecutorReadOnly,
+)
+from infinity_emb.primitives import EmbeddingDtype
 from infinity_emb.transformer.embedder.sentence_transformer import (
     SentenceTransformerPatched,
 )
+from infinity_emb.transformer.quantization import interface
 
 BATCH_SIZE = 32
 N_TIMINGS = 3
@@ -123,3 +134,110 @@ async def test_batch_performance_raw(get_sts_bechmark_dataset, load_patched_bh):
 
     finally:
         await bh.shutdown()
+
+
+class _SlowPreprocessing:
+    capabilities = {"embed"}
+    encode_pre_threadsafe = True
+
+    def encode_pre(self, items: list[int]) -> list[int]:
+        time.sleep(random.random() * 0.01)
+        return [i * 10 for i in items]
+
+
+@pytest.mark.parametrize("preprocessing_workers", [1, 4])
+def test_preprocessing_workers_keep_order(preprocessing_workers):
+    shutdown = threading.Event()
+    input_q: queue.Queue = queue.Queue()
+    pool = ThreadPoolExecutor()
+    worker = ModelWorker(
+        shutdown=ShutdownReadOnly(shutdown),
+        model=_SlowPreprocessing(),  # type: ignore[arg-type]
+        threadpool=ThreadPoolExecutorReadOnly(pool),
+        input_q=input_q,
+        output_q=queue.Queue(),
+        preprocessing_workers=preprocessing_workers,
+    )
+    batches = [
+        [SimpleNamespace(content=SimpleNamespace(to_input=lambda i=i: i)) for i in range(k, k + 3)]
+        for k in range(0, 60, 3)
+    ]
+    for batch in batches:
+        input_q.put(batch)
+    pool.submit(worker._preprocess_batch)
+    try:
+        for batch in batches:
+            feat, batch_out = worker._feature_queue.get(timeout=5)
+            assert batch_out is batch
+            assert feat == [item.content.to_input() * 10 for item in batch]
+    finally:
+        shutdown.set()
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_lengths_via_tokenize_keeps_token_ids(tiny_sentence_transformer):
+    model = SentenceTransformerPatched(
+        engine_args=EngineArgs(model_name_or_path=tiny_sentence_transformer("bert", "mean"))
+    )
+    sentences = ["one two three " * k for k in [1, 12, 2]]
+    expected = model.encode_post(model.encode_core(model.encode_pre(sentences)))
+    bh = BatchHandler(model_replicas=[model], max_batch_size=BATCH_SIZE, lengths_via_tokenize=True)
+    await bh.spawn()
+    try:
+        embeddings, usage = await bh.embed(sentences)
+    finally:
+        await bh.shutdown()
+    assert usage == 3 + 36 + 6
+    np.testing.assert_allclose(np.stack(embeddings), expected, atol=1e-6)
+
+
+def test_preprocessing_workers_need_threadsafe_encode_pre():
+    model = SimpleNamespace(capabilities={"embed"})
+    kwargs = dict(
+        shutdown=ShutdownReadOnly(threading.Event()),
+        threadpool=ThreadPoolExecutorReadOnly(ThreadPoolExecutor()),
+        input_q=queue.Queue(),
+        output_q=queue.Queue(),
+        preprocessing_workers=4,
+    )
+    assert ModelWorker(model=model, **kwargs)._preprocessing_workers == 1  # type: ignore
+    assert ModelWorker(model=_SlowPreprocessing(), **kwargs)._preprocessing_workers == 4  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_calibration_once_on_core_thread(tiny_sentence_transformer, monkeypatch):
+    model = SentenceTransformerPatched(
+        engine_args=EngineArgs(
+            model_name_or_path=tiny_sentence_transformer("bert", "mean"),
+            embedding_dtype=EmbeddingDtype.int8,
+        )
+    )
+    calibration_threads = []
+
+    def _calibration_embeddings(model):
+        calibration_threads.append(threading.current_thread())
+        return np.random.default_rng(0).standard_normal((100, 32)).astype(np.float32)
+
+    monkeypatch.setattr(interface, "_calibration_embeddings", _calibration_embeddings)
+    interface._create_statistics_embedding.cache_clear()
+    core_threads = set()
+    encode_core = model.encode_core
+    model.encode_core = lambda f: core_threads.add(threading.current_thread()) or encode_core(f)
+
+    bh = BatchHandler(model_replicas=[model], max_batch_size=BATCH_SIZE)
+    await bh.spawn()
+    try:
+        results = await asyncio.gather(
+            *[
+                bh.embed(["one two"], matryoshka_dim=dim, embedding_dtype=EmbeddingDtype.uint8)
+                for dim in [None, 16, 16, None]
+            ]
+        )
+    finally:
+        await bh.shutdown()
+        interface._create_statistics_embedding.cache_clear()
+    assert [r[0][0].shape for r in results] == [(32,), (16,), (16,), (32,)]
+    # at startup for the default dtype, and once for matryoshka_dim=16
+    assert len(calibration_threads) == 2
+    assert set(calibration_threads) == core_threads
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from infinity_emb.inference.cascade import cascade_rerank
+from infinity_emb.primitives import EmbeddingDtype, RerankReturnType
+
+
+class FakeEmbedder:
+    """2d embeddings, the query is [1, 0], documents point towards it by their digit"""
+
+    engine_args = SimpleNamespace(embedding_dtype=EmbeddingDtype.float32)
+
+    async def embed(self, sentences: list[str]):
+        embeddings = [np.array([1.0, 0.0])]
+        for doc in sentences[1:]:
+            angle = int(doc[-1]) / 10
+            embeddings.append(np.array([np.cos(angle), np.sin(angle)]) * 3)
+        return embeddings, len(sentences)
+
+
+class FakeBinaryEmbedder:
+    """ubinary embeddings, documents differ from the query in as many bits as their digit"""
+
+    engine_args = SimpleNamespace(embedding_dtype=EmbeddingDtype.ubinary)
+
+    async def embed(self, sentences: list[str]):
+        embeddings = [np.zeros(2, dtype=np.uint8)]
+        for doc in sentences[1:]:
+            bits = np.arange(16) < int(doc[-1])
+            embeddings.append(np.packbits(bits))
+        return embeddings, len(sentences)
+
+
+class FakeReranker:
+    def __init__(self) -> None:
+        self.docs: list[str] = []
+
+    async def rerank(self, *, query, docs, raw_scores=False, top_n=None):
+        self.docs.extend(docs)
+        # prefers the opposite order of the embedder
+        results = [
+            RerankReturnType(relevance_score=int(doc[-1]) / 10, document=doc, index=i)
+            for i, doc in enumerate(docs)
+        ]
+        results = sorted(results, key=lambda x: x.relevance_score, reverse=True)
+        return results[:top_n] if top_n else results, 10 * len(docs)
+
+
+@pytest.mark.anyio
+async def test_cascade_rerank():
+    docs = ["doc 5", "doc 1", "doc 9", "doc 0", "doc 3"]
+    reranker = FakeReranker()
+    results, usage = await cascade_rerank(
+        reranker=reranker,  # type: ignore
+        embedder=FakeEmbedder(),  # type: ignore
+        query="query",
+        docs=docs,
+        top_m=3,
+    )
+    # only the 3 docs closest to the query are reranked
+    assert sorted(reranker.docs) == ["doc 0", "doc 1", "doc 3"]
+    assert [r.index for r in results] == [4, 1, 3, 0, 2]
+    assert [r.prefilter_only for r in results] == [False, False, False, True, True]
+    assert results[3].relevance_score == pytest.approx(np.cos(0.5))
+    assert all(docs[r.index] == r.document for r in results)
+    assert usage == 6 + 30
+
+    results, _ = await cascade_rerank(
+        reranker=reranker,  # type: ignore
+        embedder=FakeEmbedder(),  # type: ignore
+        query="query",
+        docs=docs,
+        top_m=3,
+        top_n=4,
+    )
+    assert [r.index for r in results] == [4, 1, 3, 0]
+
+    # top_m covers all documents -> no prefilter
+    results, usage = await cascade_rerank(
+        reranker=reranker,  # type: ignore
+        embedder=FakeEmbedder(),  # type: ignore
+        query="query",
+        docs=docs,
+        top_m=5,
+    )
+    assert not any(r.prefilter_only for r in results)
+    assert usage == 50
+
+
+@pytest.mark.anyio
+async def test_cascade_rerank_binary_prefilter():
+    docs = ["doc 5", "doc 1", "doc 9", "doc 0", "doc 3"]
+    reranker = FakeReranker()
+    results, _ = await cascade_rerank(
+        reranker=reranker,  # type: ignore
+        embedder=FakeBinaryEmbedder(),  # type: ignore
+        query="query",
+        docs=docs,
+        top_m=3,
+    )
+    # the 3 docs with the smallest hamming distance to the query are reranked
+    assert sorted(reranker.docs) == ["doc 0", "doc 1", "doc 3"]
+    assert [r.index for r in results] == [4, 1, 3, 0, 2]
+    assert results[3].relevance_score == pytest.approx(1 - 2 * 5 / 16)
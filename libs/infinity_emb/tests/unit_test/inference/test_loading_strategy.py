@@ -0,0 +1,88 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.inference import BatchHandler, loading_strategy
+from infinity_emb.inference.loading_strategy import (
+    _parse_cpulist,
+    cpu_core_sets,
+    pin_current_thread,
+)
+from infinity_emb.transformer.embedder.sentence_transformer import (
+    SentenceTransformerPatched,
+)
+
+
+@pytest.fixture
+def eight_cpus_two_nodes(monkeypatch):
+    # cpus 0-3 on node 0, 4-7 on node 1, this process may use all but cpu 7
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(7)))
+    monkeypatch.setattr(
+        loading_strategy, "_numa_node_of_cpu", lambda: {cpu: cpu // 4 for cpu in range(8)}
+    )
+
+
+def test_parse_cpulist():
+    assert _parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+
+
+def test_cpu_core_sets(eight_cpus_two_nodes):
+    assert cpu_core_sets(1) == [list(range(7))]
+    assert cpu_core_sets(2) == [[0, 1, 2], [3, 4, 5]]
+    assert cpu_core_sets(3) == [[0, 1], [2, 3], [4, 5]]
+    with pytest.raises(ValueError):
+        cpu_core_sets(8)
+
+
+def test_cpu_replicas_loading_strategy(eight_cpus_two_nodes):
+    ls = EngineArgs(device="cpu", cpu_replicas=2)._loading_strategy
+    assert ls.device_mapping == ["cpu", "cpu"]
+    assert ls.cpu_core_mapping == [[0, 1, 2], [3, 4, 5]]
+    assert EngineArgs(device="cpu")._loading_strategy.cpu_core_mapping is None
+    with pytest.raises(ValueError):
+        EngineArgs(device="cpu", cpu_replicas=0)
+
+
+def test_pin_current_thread():
+    main_affinity = os.sched_getaffinity(0)
+    cpu = sorted(main_affinity)[0]
+    num_threads = torch.get_num_threads()
+    affinity = {}
+
+    def pinned():
+        pin_current_thread([cpu])
+        affinity["thread"] = os.sched_getaffinity(0)
+
+    thread = threading.Thread(target=pinned)
+    thread.start()
+    thread.join()
+    torch.set_num_threads(num_threads)
+    assert affinity["thread"] == {cpu}
+    # only the calling thread is pinned
+    assert os.sched_getaffinity(0) == main_affinity
+
+
+@pytest.mark.anyio
+async def test_batch_handler_cpu_replicas(tiny_sentence_transformer):
+    path = tiny_sentence_transformer("bert", "mean")
+    cpu = sorted(os.sched_getaffinity(0))[0]
+    replicas = [
+        SentenceTransformerPatched(engine_args=EngineArgs(model_name_or_path=path))
+        for _ in range(2)
+    ]
+    bh = BatchHandler(model_replicas=replicas, max_batch_size=4, cpu_core_mapping=[[cpu], [cpu]])
+    assert [w._cpu_cores for w in bh.model_worker] == [[cpu], [cpu]]
+    await bh.spawn()
+    try:
+        sentences = ["one two three " * k for k in range(1, 33)]
+        embeddings, _ = await bh.embed(sentences)
+        expected = replicas[0].encode_post(
+            replicas[0].encode_core(replicas[0].encode_pre(sentences))
+        )
+        np.testing.assert_allclose(np.stack(embeddings), expected, atol=1e-5)
+    finally:
+        await bh.shutdown()
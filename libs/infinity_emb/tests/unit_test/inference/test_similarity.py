@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from sentence_transformers.quantization import quantize_embeddings  # type: ignore
+
+from infinity_emb.inference import similarity
+from infinity_emb.inference.similarity import (
+    cosine_scores,
+    hamming_distances,
+    int8_dot_products,
+    maxsim_scores,
+    score_embeddings,
+    similarity_scores,
+)
+from infinity_emb.primitives import EmbeddingDtype
+
+
+@pytest.fixture
+def embeddings() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((5, 64), dtype=np.float32), rng.standard_normal(
+        (7, 64), dtype=np.float32
+    )
+
+
+def test_cosine_scores(embeddings):
+    a, b = embeddings
+    expected = np.array([[x @ y / np.linalg.norm(x) / np.linalg.norm(y) for y in b] for x in a])
+    np.testing.assert_allclose(cosine_scores(a, b), expected, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("precision", ["binary", "ubinary"])
+def test_binary_scores(embeddings, precision):
+    a, b = embeddings
+    a_q, b_q = quantize_embeddings(a, precision), quantize_embeddings(b, precision)
+    # cosine similarity of the {-1, 1} vectors
+    expected = cosine_scores(np.where(a > 0, 1, -1), np.where(b > 0, 1, -1))
+    scores = similarity_scores(a_q, b_q, EmbeddingDtype(precision))
+    np.testing.assert_allclose(scores, expected, atol=1e-6)
+
+    expected_hamming = [[np.sum((x > 0) != (y > 0)) for y in b] for x in a]
+    assert (
+        hamming_distances(
+            quantize_embeddings(a, "ubinary"), quantize_embeddings(b, "ubinary")
+        ).tolist()
+        == expected_hamming
+    )
+
+
+@pytest.mark.parametrize("precision", ["int8", "uint8"])
+def test_int_scores(embeddings, precision):
+    a, b = embeddings
+    ranges = np.stack([np.minimum(a.min(0), b.min(0)), np.maximum(a.max(0), b.max(0))])
+    a_q = quantize_embeddings(a, precision, ranges=ranges)
+    b_q = quantize_embeddings(b, precision, ranges=ranges)
+    # uint8 is scored as int8, i.e. centered by -128
+    offset = 128 if precision == "uint8" else 0
+    expected = cosine_scores(a_q.astype(np.float64) - offset, b_q.astype(np.float64) - offset)
+    np.testing.assert_allclose(
+        similarity_scores(a_q, b_q, EmbeddingDtype(precision)), expected, rtol=1e-5, atol=1e-6
+    )
+
+
+@pytest.mark.parametrize("n_bytes", [1, 8, 13, 300])
+def test_hamming_distances_chunked(monkeypatch, n_bytes):
+    rng = np.random.default_rng(0)
+    a = rng.integers(0, 256, size=(3, n_bytes), dtype=np.uint8)
+    b = rng.integers(0, 256, size=(50, n_bytes), dtype=np.uint8)
+    expected = np.unpackbits(a[:, None] ^ b[None], axis=-1).sum(axis=-1)
+    # chunks of a few rows of b
+    monkeypatch.setattr(similarity, "_CHUNK_BYTES", 100)
+    np.testing.assert_array_equal(hamming_distances(a, b), expected)
+
+
+@pytest.mark.parametrize("dim", [64, 2048])
+def test_int8_dot_products(monkeypatch, dim):
+    rng = np.random.default_rng(0)
+    a = rng.integers(-128, 128, size=(4, dim), dtype=np.int8)
+    b = rng.integers(-128, 128, size=(30, dim), dtype=np.int8)
+    b[0] = -128
+    a[0] = -128
+    monkeypatch.setattr(similarity, "_CHUNK_BYTES", 4 * dim * 7)
+    dots = int8_dot_products(a, b)
+    assert dots.dtype == np.int32
+    # exact, also beyond the float32 mantissa for dim=2048
+    np.testing.assert_array_equal(dots, a.astype(np.int64) @ b.astype(np.int64).T)
+
+
+def test_score_embeddings_top_k(embeddings):
+    a, b = embeddings
+    full = score_embeddings(a, b)
+    assert full.indices is None
+    assert full.scores.shape == (5, 7)
+
+    top = score_embeddings(a, b, top_k=3)
+    assert top.scores.shape == top.indices.shape == (5, 3)  # type: ignore
+    expected_indices = np.argsort(-full.scores, axis=1)[:, :3]
+    np.testing.assert_array_equal(top.indices, expected_indices)
+    np.testing.assert_array_equal(
+        top.scores, np.take_along_axis(full.scores, expected_indices, axis=1)
+    )
+    assert score_embeddings(a, b, top_k=100).scores.shape == (5, 7)
+
+
+@pytest.fixture
+def multi_vector_embeddings() -> tuple[list[np.ndarray], list[np.ndarray]]:
+    rng = np.random.default_rng(0)
+    queries = [rng.standard_normal((n, 16), dtype=np.float32) for n in (3, 8)]
+    documents = [rng.standard_normal((n, 16), dtype=np.float32) for n in (5, 1, 12, 7)]
+    return queries, documents
+
+
+@pytest.mark.parametrize("chunk_bytes", [64 * 1024 * 1024, 1])
+def test_maxsim_scores(multi_vector_embeddings, monkeypatch, chunk_bytes):
+    monkeypatch.setattr(similarity, "_MAXSIM_CHUNK_BYTES", chunk_bytes)
+    queries, documents = multi_vector_embeddings
+    expected = [[(q @ d.T).max(axis=1).sum() for d in documents] for q in queries]
+    np.testing.assert_allclose(maxsim_scores(queries, documents), expected, rtol=1e-5)
+
+
+def test_score_embeddings_multi_vector(multi_vector_embeddings):
+    queries, documents = multi_vector_embeddings
+    full = score_embeddings(queries, documents)
+    np.testing.assert_array_equal(full.scores, maxsim_scores(queries, documents))
+    top = score_embeddings(queries, documents, top_k=2)
+    np.testing.assert_array_equal(top.indices, np.argsort(-full.scores, axis=1)[:, :2])
+
+    with pytest.raises(ValueError):
+        maxsim_scores(queries, [np.zeros((0, 16), dtype=np.float32)])
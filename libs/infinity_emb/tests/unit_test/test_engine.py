@@ -154,6 +154,40 @@ async def test_engine_reranker_top_n(engine_name):
                 assert len(rankings) == min(top_k, len(documents))
 
 
+@pytest.mark.anyio
+async def test_engine_reranker_many():
+    queries = ["Where is Paris?", "Where is Berlin?"]
+    documents = [
+        "Paris is the capital of France.",
+        "Berlin is the capital of Germany.",
+        "You can now purchase my favorite dish",
+    ]
+    engine = AsyncEmbeddingEngine.from_args(
+        EngineArgs(
+            model_name_or_path="mixedbread-ai/mxbai-rerank-xsmall-v1",
+            engine=InferenceEngine.torch,
+            model_warmup=False,
+        )
+    )
+
+    async with engine:
+        rankings_many, usage = await engine.rerank_many(
+            queries=queries, docs=[documents, documents[:2]], top_n=[None, 1]
+        )
+        rankings_single = [await engine.rerank(query=query, docs=documents) for query in queries]
+        with pytest.raises(ValueError):
+            await engine.rerank_many(queries=queries, docs=[documents])
+
+    assert [len(r) for r in rankings_many] == [3, 1]
+    assert rankings_many[0][0].index == 0
+    assert rankings_many[1][0].index == 1
+    assert usage == sum(u for _, u in rankings_single) - len(queries[1]) - len(documents[2])
+    for ranking, (ranking_single, _) in zip(rankings_many, rankings_single):
+        for r, r_single in zip(ranking, ranking_single):
+            assert r.index == r_single.index
+            np.testing.assert_allclose(r.relevance_score, r_single.relevance_score, atol=1e-3)
+
+
 @pytest.mark.anyio
 async def test_async_api_torch_CLASSIFY():
     sentences = ["This is awesome.", "I am depressed."]
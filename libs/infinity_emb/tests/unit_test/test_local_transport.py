@@ -0,0 +1,219 @@
+import asyncio
+import importlib.util
+import os
+import stat
+from pathlib import Path
+
+import numpy as np
+import pytest
+from asgi_lifespan import LifespanManager
+from httpx import AsyncClient
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast  # type: ignore
+
+from infinity_emb import create_server
+from infinity_emb.args import EngineArgs
+from infinity_emb.engine import AsyncEngineArray
+from infinity_emb.local_transport import (
+    AsyncLocalTransportClient,
+    LocalTransportServer,
+    RemoteEngineArray,
+    read_texts,
+    write_texts,
+)
+
+# the standalone local client of `infinity_client`, copied into the generated client
+LOCAL_CLIENT_PATH = Path(__file__).parents[3] / "client_infinity" / "template" / "local_client.py"
+
+
+def _load_local_client():
+    spec = importlib.util.spec_from_file_location("local_client", LOCAL_CLIENT_PATH)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def _tiny_sequence_classifier(path: Path, labels: list[str]) -> str:
+    """randomly initialized reranker (1 label) or classifier (>1 labels)"""
+    path.mkdir()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "one", "two", "three"]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(path / "vocab.txt"), model_max_length=32).save_pretrained(path)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=1,
+        num_attention_heads=4,
+        intermediate_size=64,
+        id2label=dict(enumerate(labels)),
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+    return str(path)
+
+
+def test_texts_roundtrip_and_wrap():
+    buf = memoryview(bytearray(256))
+    texts = ["hello", "", "wörld 🚀"]
+    offset, nbytes = write_texts(buf, 0, texts)
+    assert offset == 0
+    assert read_texts(buf, offset, len(texts)) == (texts, nbytes)
+    # does not fit behind the first payload -> wraps to the start
+    offset, _ = write_texts(buf, 200, ["a" * 100])
+    assert offset == 0
+    with pytest.raises(ValueError):
+        write_texts(buf, 0, ["a" * 300])
+
+
+@pytest.mark.anyio
+async def test_local_transport_embed(tmp_path):
+    path = str(tmp_path / "infinity.sock")
+    array = AsyncEngineArray.from_args(
+        [EngineArgs(engine="debugengine", served_model_name="dummy")]
+    )
+    await array.astart()
+    server = LocalTransportServer(array, path)
+    await server.astart()
+    try:
+        async with AsyncLocalTransportClient(path, ring_size=4096) as client:
+            assert client.models == ["dummy"]
+            sentences = ["hello", "world!", "ä" * 20]
+            expected, expected_usage = await array.embed(model="dummy", sentences=sentences)
+            # more requests than fit into the ring at once
+            for _ in range(20):
+                embeddings, usage = await client.embed(model="dummy", sentences=sentences)
+                assert usage == expected_usage
+                np.testing.assert_array_equal(np.stack(embeddings), np.stack(expected))
+            views, _ = await client.embed(model="dummy", sentences=sentences, copy=False)
+            np.testing.assert_array_equal(np.stack(views), np.stack(expected))
+            del views
+            with pytest.raises(RuntimeError, match="TypeError"):
+                await client.embed(model="dummy", sentences=sentences, unknown_kwarg=1)
+            # the connection stays usable after an error
+            embeddings, _ = await client.embed(model="dummy", sentences=sentences)
+            assert len(embeddings) == len(sentences)
+    finally:
+        await server.astop()
+        await array.astop()
+
+
+@pytest.mark.anyio
+async def test_local_transport_api_key(tmp_path):
+    path = str(tmp_path / "infinity.sock")
+    engine_args_list = [EngineArgs(engine="debugengine", served_model_name="dummy")]
+    array = AsyncEngineArray.from_args(engine_args_list)
+    await array.astart()
+    server = LocalTransportServer(array, path, api_key="secret")
+    await server.astart()
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        for api_key in ["", "wrong"]:
+            client = AsyncLocalTransportClient(path, ring_size=4096, api_key=api_key)
+            with pytest.raises(PermissionError):
+                await client.connect()
+            # the shared memory of a rejected client is released
+            assert client._shm is None
+        client = AsyncLocalTransportClient(str(tmp_path / "missing.sock"), ring_size=4096)
+        with pytest.raises(FileNotFoundError):
+            await client.connect()
+        assert client._shm is None
+        async with AsyncLocalTransportClient(path, ring_size=4096, api_key="secret") as client:
+            embeddings, _ = await client.embed(model="dummy", sentences=["hello"])
+            assert len(embeddings) == 1
+
+        remote = RemoteEngineArray(engine_args_list, path, connections=2, api_key="secret")
+        await remote.astart()
+        embeddings, _ = await remote["dummy"].embed(["hello", "world"])
+        assert len(embeddings) == 2
+        await remote.astop()
+    finally:
+        await server.astop()
+        await array.astop()
+
+
+@pytest.mark.anyio
+async def test_remote_engine_array_frontend(tmp_path):
+    path = str(tmp_path / "engine.sock")
+    engine_args_list = [EngineArgs(engine="debugengine", served_model_name="dummy")]
+    array = AsyncEngineArray.from_args(engine_args_list)
+    await array.astart()
+    server = LocalTransportServer(array, path)
+    await server.astart()
+    try:
+        remote = RemoteEngineArray(engine_args_list, path, connections=2, ring_size=4096)
+        await remote.astart()
+        assert remote["dummy"].capabilities == array["dummy"].capabilities
+        assert not remote["dummy"].is_overloaded()
+        with pytest.raises(IndexError):
+            RemoteEngineArray(engine_args_list * 2, path)["unknown"]
+        await remote.astop()
+
+        # REST front-end without models, forwarding to the engine process
+        app = create_server(engine_args_list=engine_args_list, engine_process_path=path)
+        async with AsyncClient(app=app, base_url="http://test") as client, LifespanManager(app):
+            response = await client.get("/models")
+            assert response.status_code == 200
+            assert response.json()["data"][0]["id"] == "dummy"
+            response = await client.post(
+                "/embeddings", json=dict(model="dummy", input=["hello", "world"])
+            )
+            assert response.status_code == 200, response.text
+            expected, _ = await array.embed(model="dummy", sentences=["hello", "world"])
+            np.testing.assert_allclose(
+                [d["embedding"] for d in response.json()["data"]], np.stack(expected), rtol=1e-6
+            )
+            response = await client.post(
+                "/embeddings", json=dict(model="dummy", input=["hello"], dimensions=100000)
+            )
+            assert response.status_code == 400
+    finally:
+        await server.astop()
+        await array.astop()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("api_key", ["", "secret"])
+async def test_infinity_local_client(tmp_path, api_key):
+    local_client = _load_local_client()
+    path = str(tmp_path / "infinity.sock")
+    array = AsyncEngineArray.from_args(
+        [
+            EngineArgs(engine="debugengine", served_model_name="dummy"),
+            EngineArgs(
+                model_name_or_path=_tiny_sequence_classifier(tmp_path / "reranker", ["score"]),
+                served_model_name="reranker",
+                bettertransformer=False,
+            ),
+            EngineArgs(
+                model_name_or_path=_tiny_sequence_classifier(
+                    tmp_path / "classifier", ["negative", "positive"]
+                ),
+                served_model_name="classifier",
+                bettertransformer=False,
+            ),
+        ]
+    )
+    await array.astart()
+    server = LocalTransportServer(array, path, api_key=api_key)
+    await server.astart()
+
+    def _run_client() -> None:
+        if api_key:
+            with pytest.raises(PermissionError):
+                local_client.InfinityLocalClient(path, ring_size=4096)
+        with local_client.InfinityLocalClient(path, ring_size=4096, api_key=api_key) as client:
+            assert client.models == ["dummy", "reranker", "classifier"]
+            embeddings, usage = client.embed("dummy", ["hello", "world"])
+            assert len(embeddings) == 2 and usage > 0
+            results, _ = client.rerank("reranker", "one two", ["three", "one", "two three"])
+            assert sorted(r["index"] for r in results) == [0, 1, 2]
+            labels, _ = client.classify("classifier", ["one two", "three"])
+            assert len(labels) == 2 and all(len(classes) == 2 for classes in labels)
+            # errors of the server keep their type
+            with pytest.raises(local_client.ModelNotDeployedError):
+                client.rerank("dummy", "one", ["two"])
+
+    try:
+        # the client is blocking, the server runs on this event loop
+        await asyncio.to_thread(_run_client)
+    finally:
+        await server.astop()
+        await array.astop()
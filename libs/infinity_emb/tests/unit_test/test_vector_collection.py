@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+
+from infinity_emb.primitives import CollectionError, EmbeddingDtype
+from infinity_emb.vector_collection import CollectionStore, VectorCollection
+
+
+def _clustered(n: int, dim: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    return centers[labels] + 0.1 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def test_upsert_delete_search(tmp_path):
+    collection = VectorCollection(
+        tmp_path / "docs", model="dummy", embedding_dtype=EmbeddingDtype.float32
+    )
+    vectors = np.eye(4, dtype=np.float32)
+    ids = ["a", "b", "c", "d"]
+    assert collection.upsert(ids, vectors, [dict(i=i) for i in range(4)]) == 4
+
+    matches = collection.search(vectors[[2, 0]], top_k=2)
+    assert matches[0][0].id == "c"
+    assert matches[0][0].score == pytest.approx(1.0)
+    assert matches[0][0].metadata == dict(i=2)
+    assert matches[1][0].id == "a"
+
+    # update replaces the vector and metadata of an existing id
+    assert collection.upsert(["a"], vectors[[1]], [None]) == 4
+    top = collection.search(vectors[[1]], top_k=2)[0]
+    assert {m.id for m in top} == {"a", "b"}
+    assert all(m.score == pytest.approx(1.0) for m in top)
+
+    # deleting moves the last row into the deleted one
+    assert collection.delete(["b", "unknown"]) == 1
+    assert len(collection) == 3
+    assert collection.search(vectors[[3]], top_k=1)[0][0].id == "d"
+    assert {m.id for m in collection.search(vectors[[1]], top_k=3)[0]} == {"a", "c", "d"}
+
+
+def test_persistence(tmp_path):
+    vectors = np.random.default_rng(0).standard_normal((2000, 16)).astype(np.float32)
+    ids = [f"id-{i}" for i in range(len(vectors))]
+    collection = VectorCollection(
+        tmp_path / "docs", model="dummy", embedding_dtype=EmbeddingDtype.float32
+    )
+    # grows past the initial capacity
+    collection.upsert(ids, vectors)
+    collection.delete(ids[:10])
+    expected = collection.search(vectors[10:20], top_k=5)
+    collection.close()
+
+    reopened = VectorCollection.open(tmp_path / "docs")
+    assert reopened.model == "dummy"
+    assert len(reopened) == len(vectors) - 10
+    assert reopened.search(vectors[10:20], top_k=5) == expected
+    reopened.close()
+
+    with pytest.raises(CollectionError):
+        VectorCollection(tmp_path / "docs", model="other", embedding_dtype=EmbeddingDtype.float32)
+
+
+@pytest.mark.parametrize("embedding_dtype", [EmbeddingDtype.float32, EmbeddingDtype.int8])
+def test_ivf_search(tmp_path, embedding_dtype):
+    vectors = _clustered(8000, 32, n_clusters=50)
+    if embedding_dtype == EmbeddingDtype.int8:
+        vectors = np.clip(np.round(vectors * 40), -128, 127).astype(np.int8)
+    ids = [str(i) for i in range(len(vectors))]
+    collection = VectorCollection(
+        tmp_path / "docs", model="dummy", embedding_dtype=embedding_dtype, ivf_min_size=1000
+    )
+    collection.upsert(ids, vectors)
+    queries = vectors[:50]
+    approximate = collection.search(queries, top_k=10)
+    assert collection._ivf is not None
+    # every query finds itself
+    assert [m[0].id for m in approximate] == ids[:50]
+
+    exact_scores, exact_rows = collection._exact_search(queries, 10)
+    recall = np.mean(
+        [
+            len({m.id for m in matches} & {ids[r] for r in rows}) / 10
+            for matches, rows in zip(approximate, exact_rows)
+        ]
+    )
+    assert recall > 0.9
+
+    # vectors upserted after training are assigned to a list and found
+    collection.upsert(["new"], vectors[[0]])
+    assert "new" in {m.id for m in collection.search(vectors[[0]], top_k=2)[0]}
+
+
+def test_binary_search(tmp_path):
+    rng = np.random.default_rng(0)
+    bits = rng.integers(0, 2, size=(100, 64)).astype(np.uint8)
+    ubinary = np.packbits(bits, axis=1)
+    binary = (ubinary.astype(np.int16) - 128).astype(np.int8)
+    collection = VectorCollection(
+        tmp_path / "docs",
+        model="dummy",
+        embedding_dtype=EmbeddingDtype.binary,
+        ivf_min_size=10,
+    )
+    collection.upsert([str(i) for i in range(100)], binary)
+    matches = collection.search(binary[[5]], top_k=3)[0]
+    assert collection._ivf is None
+    assert matches[0].id == "5"
+    assert matches[0].score == pytest.approx(1.0)
+    expected = 1 - 2 * np.count_nonzero(bits[5] != bits[int(matches[1].id)]) / 64
+    assert matches[1].score == pytest.approx(expected)
+
+
+def test_invalid_inputs(tmp_path):
+    collection = VectorCollection(
+        tmp_path / "docs", model="dummy", embedding_dtype=EmbeddingDtype.float32
+    )
+    collection.upsert(["a"], np.ones((1, 4), dtype=np.float32))
+    with pytest.raises(CollectionError):
+        collection.upsert(["b"], np.ones((1, 8), dtype=np.float32))
+    with pytest.raises(CollectionError):
+        collection.upsert(["b", "c"], np.ones((1, 4), dtype=np.float32))
+    with pytest.raises(CollectionError):
+        collection.upsert(["b"], np.ones((1, 3, 4), dtype=np.float32))
+
+
+@pytest.mark.anyio
+async def test_collection_store(tmp_path):
+    store = CollectionStore(str(tmp_path))
+    store.open()
+    vectors = np.eye(3, dtype=np.float32)
+    count = await store.upsert(
+        "docs",
+        model="dummy",
+        embedding_dtype=EmbeddingDtype.float32,
+        ids=["a", "b", "c"],
+        embeddings=list(vectors),
+    )
+    assert count == 3
+    with pytest.raises(CollectionError):
+        await store.upsert(
+            "docs",
+            model="other",
+            embedding_dtype=EmbeddingDtype.float32,
+            ids=["d"],
+            embeddings=list(vectors[:1]),
+        )
+    with pytest.raises(CollectionError):
+        await store.upsert(
+            "../escape",
+            model="dummy",
+            embedding_dtype=EmbeddingDtype.float32,
+            ids=["d"],
+            embeddings=list(vectors[:1]),
+        )
+    with pytest.raises(CollectionError):
+        await store.search("missing", embeddings=list(vectors), top_k=1)
+
+    assert await store.delete("docs", ["a"]) == (1, 2)
+    matches = await store.search("docs", embeddings=list(vectors[1:]), top_k=1)
+    assert [m[0].id for m in matches] == ["b", "c"]
+    store.close()
+
+    reopened = CollectionStore(str(tmp_path))
+    reopened.open()
+    assert [c.name for c in reopened.list_collections()] == ["docs"]
+    assert len(reopened.get("docs")) == 2
+    reopened.close()
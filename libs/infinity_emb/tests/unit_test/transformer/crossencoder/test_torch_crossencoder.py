@@ -1,7 +1,13 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from sentence_transformers import CrossEncoder  # type: ignore
+from transformers import (  # type: ignore
+    BertConfig,
+    BertForSequenceClassification,
+    BertTokenizerFast,
+)
 
 from infinity_emb.args import EngineArgs
 from infinity_emb.transformer.crossencoder.torch import CrossEncoderPatched
@@ -69,3 +75,70 @@ def test_patched_crossencoder_vs_sentence_transformers():
     rankings_unpatched = model_unpatched.predict(query_docs)
 
     np.testing.assert_allclose(rankings_sigmoid, rankings_unpatched, rtol=1e-2, atol=1e-2)
+
+
+def test_crossencoder_query_tokens_reused():
+    model = CrossEncoderPatched(
+        engine_args=EngineArgs(
+            model_name_or_path="mixedbread-ai/mxbai-rerank-xsmall-v1",
+            device=device,
+        )
+    )
+    assert model._collator._backend is not None
+
+    query_docs = [
+        ("Where is Paris?", "Paris is the capital of France."),
+        ("  Where is Paris?", "Berlin is the capital of Germany.  "),
+        ("Where is Berlin?", "You can now purchase my favorite dish"),
+        # truncated to model_max_length
+        ("Where is Berlin? " * 200, "Berlin is the capital of Germany. " * 300),
+        ("Where is Berlin?", "Berlin is the capital of Germany. " * 300),
+    ]
+    expected = model.tokenizer(
+        [[q.strip(), d.strip()] for q, d in query_docs],
+        padding=True,
+        truncation="longest_first",
+        return_tensors="pt",
+    )
+
+    encode_pre = model.encode_pre(query_docs)
+    assert encode_pre.keys() == expected.keys()
+    for key in expected.keys():
+        torch.testing.assert_close(encode_pre[key], expected[key])
+
+
+def test_crossencoder_encode_pre_threadsafe(tmp_path):
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "one", "two", "three"]
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(tmp_path / "vocab.txt"), model_max_length=24).save_pretrained(tmp_path)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=1,
+        num_attention_heads=4,
+        intermediate_size=64,
+        num_labels=1,
+    )
+    BertForSequenceClassification(config).save_pretrained(tmp_path)
+    model = CrossEncoderPatched(
+        engine_args=EngineArgs(model_name_or_path=str(tmp_path), bettertransformer=False)
+    )
+    assert model._collator._backend is not None
+
+    batches = [
+        [(f"one {'two ' * q}", "three " * d) for d in range(0, 40, 7)] for q in range(0, 30, 3)
+    ] * 10
+
+    def _check(pairs):
+        expected = model.tokenizer(
+            [[q.strip(), d.strip()] for q, d in pairs],
+            padding=True,
+            truncation="longest_first",
+            return_tensors="pt",
+        )
+        encode_pre = model.encode_pre(pairs)
+        for key in expected.keys():
+            torch.testing.assert_close(encode_pre[key], expected[key])
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(_check, batches))
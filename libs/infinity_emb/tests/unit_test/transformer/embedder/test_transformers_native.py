@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import torch
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.primitives import PoolingMethod
+from infinity_emb.transformer.embedder.sentence_transformer import (
+    SentenceTransformerPatched,
+)
+from infinity_emb.transformer.embedder.transformers_native import (
+    TransformersEmbedder,
+    pool_and_normalize,
+)
+
+SENTENCES = ["one two three " * k for k in [1, 12, 2, 3, 0, 5, 1]]
+
+
+def _embed(model, sentences=SENTENCES) -> np.ndarray:
+    return model.encode_post(model.encode_core(model.encode_pre(sentences)))
+
+
+def test_transformers_equals_sentence_transformer(model_name=pytest.DEFAULT_BERT_MODEL):
+    engine_args = EngineArgs(model_name_or_path=model_name, bettertransformer=False)
+    embeddings_st = _embed(SentenceTransformerPatched(engine_args=engine_args))
+    embeddings = _embed(TransformersEmbedder(engine_args=engine_args))
+    np.testing.assert_allclose(embeddings, embeddings_st, atol=1e-5)
+
+
+@pytest.mark.parametrize("model_type,pooling", [("bert", "mean"), ("roberta", "cls")])
+@pytest.mark.parametrize("sequence_packing", [False, True])
+def test_matches_sentence_transformer(
+    tiny_sentence_transformer, model_type, pooling, sequence_packing
+):
+    path = tiny_sentence_transformer(model_type, pooling)
+    engine_args = EngineArgs(
+        model_name_or_path=path, bettertransformer=False, sequence_packing=sequence_packing
+    )
+    model = TransformersEmbedder(engine_args=engine_args)
+    assert model.pooling_method == PoolingMethod[pooling]
+    embeddings = _embed(model)
+    assert embeddings.dtype == np.float32
+    embeddings_st = _embed(SentenceTransformerPatched(engine_args=engine_args))
+    np.testing.assert_allclose(embeddings, embeddings_st, atol=1e-5)
+    assert model.tokenize_lengths(SENTENCES[:2]) == [3, 36]
+
+    # tokenize once: the ids of `tokenize_ids` collate to the features of the tokenizer
+    input_ids, lengths = model.tokenize_ids(SENTENCES)
+    assert lengths == model.tokenize_lengths(SENTENCES)
+    features = model.tokenizer(
+        [s.strip() for s in SENTENCES], padding=True, truncation=True, return_tensors="pt"
+    )
+    encoded = model.encode_pre_ids(input_ids)
+    if not sequence_packing:
+        for key, value in features.items():
+            torch.testing.assert_close(encoded[key], value)
+
+
+def test_pooling_method_override(tiny_sentence_transformer):
+    path = tiny_sentence_transformer("bert", "mean")
+    model = TransformersEmbedder(
+        engine_args=EngineArgs(model_name_or_path=path, pooling_method=PoolingMethod.cls)
+    )
+    assert model.pooling_method == PoolingMethod.cls
+
+
+def test_pool_and_normalize():
+    token_embeddings = torch.arange(24, dtype=torch.float32).view(2, 4, 3)
+    right_padded = torch.tensor([[1, 1, 1, 1], [1, 1, 0, 0]])
+    left_padded = torch.tensor([[1, 1, 1, 1], [0, 0, 1, 1]])
+
+    def normalized(x):
+        return torch.nn.functional.normalize(torch.stack(x), dim=1)
+
+    mean = pool_and_normalize(token_embeddings, right_padded, PoolingMethod.mean)
+    expected = normalized([token_embeddings[0].mean(0), token_embeddings[1, :2].mean(0)])
+    torch.testing.assert_close(mean, expected)
+
+    cls = pool_and_normalize(token_embeddings, right_padded, PoolingMethod.cls)
+    torch.testing.assert_close(cls, normalized([token_embeddings[0, 0], token_embeddings[1, 0]]))
+
+    for mask, last in [(right_padded, 1), (left_padded, 3)]:
+        last_token = pool_and_normalize(token_embeddings, mask, PoolingMethod.last_token)
+        expected = normalized([token_embeddings[0, 3], token_embeddings[1, last]])
+        torch.testing.assert_close(last_token, expected)
@@ -1,11 +1,17 @@
 from typing import Optional
 
+import numpy as np
 import pytest
 import torch
+from sentence_transformers.quantization import quantize_embeddings  # type: ignore
 from transformers import AutoTokenizer, BertModel  # type: ignore
 
-from infinity_emb.primitives import Device, Dtype
-from infinity_emb.transformer.quantization.interface import quant_interface
+from infinity_emb.primitives import Device, Dtype, EmbeddingDtype, MatryoshkaDimError
+from infinity_emb.transformer.quantization import interface
+from infinity_emb.transformer.quantization.interface import (
+    quant_interface,
+    quantize_embeddings_to,
+)
 
 devices = [Device.cpu]
 if torch.cuda.is_available():
@@ -46,3 +52,74 @@ def test_quantize_bert(device: Device, dtype: Dtype):
         out_quant = model.forward(**tokens_encoded)["last_hidden_state"].mean(dim=1)
 
     assert torch.cosine_similarity(out_default, out_quant) > 0.95
+
+
+@pytest.mark.parametrize(
+    "embedding_dtype",
+    [
+        EmbeddingDtype.float16,
+        EmbeddingDtype.int8,
+        EmbeddingDtype.uint8,
+        EmbeddingDtype.binary,
+        EmbeddingDtype.ubinary,
+    ],
+)
+def test_quantize_embeddings_to(monkeypatch, embedding_dtype: EmbeddingDtype):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((10, 64)).astype(np.float32)
+    ranges = np.stack([embeddings.min(0), embeddings.max(0)])
+    monkeypatch.setattr(interface, "_create_statistics_embedding", lambda model, **kwargs: ranges)
+
+    quantized = quantize_embeddings_to(None, list(embeddings), embedding_dtype)  # type: ignore
+    if embedding_dtype == EmbeddingDtype.float16:
+        expected = embeddings.astype(np.float16)
+    else:
+        expected = quantize_embeddings(embeddings, embedding_dtype.value, ranges=ranges)
+    assert quantized.dtype == expected.dtype  # type: ignore
+    np.testing.assert_array_equal(quantized, expected)
+
+    if embedding_dtype in (EmbeddingDtype.int8, EmbeddingDtype.uint8):
+        # values outside the calibration ranges are clipped, truncated to 32 matryoshka dims
+        outside = quantize_embeddings_to(
+            None, [ranges[0, :32] - 1, ranges[1, :32] + 1], embedding_dtype
+        )  # type: ignore
+        info = np.iinfo(expected.dtype)
+        assert (outside[0] == info.min).all() and (outside[1] == info.max).all()
+
+
+def test_quantize_embeddings_to_matryoshka(monkeypatch):
+    rng = np.random.default_rng(0)
+    calibration = rng.standard_normal((100, 64)).astype(np.float32)
+    calibration /= np.linalg.norm(calibration, axis=1, keepdims=True)
+    monkeypatch.setattr(interface, "_calibration_embeddings", lambda model: calibration)
+    interface._create_statistics_embedding.cache_clear()
+    model = object()
+
+    embeddings = calibration[:10]
+    truncated = quantize_embeddings_to(
+        model, list(embeddings), EmbeddingDtype.float32, matryoshka_dim=16
+    )  # type: ignore
+    assert truncated.shape == (10, 16)  # type: ignore
+    np.testing.assert_allclose(np.linalg.norm(truncated, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_allclose(
+        truncated,
+        embeddings[:, :16] / np.linalg.norm(embeddings[:, :16], axis=1, keepdims=True),
+        rtol=1e-6,
+    )
+
+    # int8 buckets are calibrated on the truncated, renormalized calibration embeddings
+    quantized = quantize_embeddings_to(model, list(embeddings), EmbeddingDtype.int8, 16)
+    ranges = interface._create_statistics_embedding(model, matryoshka_dim=16)
+    assert ranges.shape == (2, 16)
+    expected = quantize_embeddings(truncated, "int8", ranges=ranges)
+    np.testing.assert_array_equal(quantized, expected)
+
+    # multi-vector embeddings are truncated along the embedding, not the token axis
+    multi_vector = [calibration[:3], calibration[3:8]]
+    truncated_mv = quantize_embeddings_to(model, multi_vector, EmbeddingDtype.float32, 16)
+    assert [e.shape for e in truncated_mv] == [(3, 16), (5, 16)]
+
+    for matryoshka_dim in [-1, 65]:
+        with pytest.raises(MatryoshkaDimError):
+            quantize_embeddings_to(model, list(embeddings), EmbeddingDtype.binary, matryoshka_dim)
+    interface._create_statistics_embedding.cache_clear()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import torch
+from transformers import AutoModel, AutoModelForSequenceClassification, BertModel  # type: ignore
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.transformer import acceleration
+from infinity_emb.transformer.acceleration import select_attn_implementation
+from infinity_emb.transformer.embedder.sentence_transformer import (
+    SentenceTransformerPatched,
+)
+
+
+def test_select_attn_implementation(tiny_sentence_transformer, monkeypatch):
+    path = tiny_sentence_transformer("bert", "mean")
+    engine_args = EngineArgs(model_name_or_path=path)
+    assert select_attn_implementation(engine_args) == "sdpa"
+    assert select_attn_implementation(engine_args, AutoModelForSequenceClassification) == "sdpa"
+
+    # models without sdpa support fall back to BetterTransformer, if enabled
+    monkeypatch.setattr(BertModel, "_supports_sdpa", False)
+    assert select_attn_implementation(engine_args) == "eager"
+    assert select_attn_implementation(engine_args, allow_bettertransformer=False) is None
+    no_bt = EngineArgs(model_name_or_path=path, bettertransformer=False)
+    assert select_attn_implementation(no_bt) is None
+    packing = EngineArgs(model_name_or_path=path, sequence_packing=True)
+    assert select_attn_implementation(packing) is None
+
+    # flash-attention-2 needs a cuda device and half precision
+    monkeypatch.setattr(BertModel, "_supports_flash_attn_2", True)
+    monkeypatch.setattr(acceleration, "is_flash_attn_2_available", lambda: True)
+    assert select_attn_implementation(engine_args) == "eager"
+
+
+@pytest.mark.parametrize("model_type,pooling", [("bert", "mean"), ("roberta", "cls")])
+def test_sdpa_matches_eager(tiny_sentence_transformer, model_type, pooling):
+    path = tiny_sentence_transformer(model_type, pooling)
+    sentences = ["one two three " * k for k in [1, 12, 2, 0]]
+    embeddings = {}
+    for bettertransformer in [False, True]:
+        model = SentenceTransformerPatched(
+            engine_args=EngineArgs(model_name_or_path=path, bettertransformer=bettertransformer)
+        )
+        assert model._first_module().auto_model.config._attn_implementation == "sdpa"
+        embeddings[bettertransformer] = model.encode_post(
+            model.encode_core(model.encode_pre(sentences))
+        )
+    np.testing.assert_allclose(embeddings[True], embeddings[False], atol=1e-6)
+
+    eager = AutoModel.from_pretrained(path, attn_implementation="eager").eval()
+    sdpa = AutoModel.from_pretrained(path, attn_implementation="sdpa").eval()
+    inputs = dict(
+        input_ids=torch.randint(5, 8, (8, 64)),
+        attention_mask=(torch.arange(64)[None] < torch.randint(1, 65, (8, 1))).long(),
+    )
+    with torch.inference_mode():
+        out_eager = eager(**inputs).last_hidden_state
+        out_sdpa = sdpa(**inputs).last_hidden_state
+    mask = inputs["attention_mask"].bool()
+    torch.testing.assert_close(out_sdpa[mask], out_eager[mask], atol=1e-5, rtol=1e-5)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from infinity_emb.primitives import EmbeddingDtype
+from infinity_emb.transformer.multi_vector import (
+    pack_multi_vector,
+    pool_multi_vector,
+    pool_tokens,
+    unpack_multi_vector,
+)
+from infinity_emb.transformer.quantization.interface import quant_embedding_decorator
+
+
+@pytest.fixture
+def multi_vector() -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    return [rng.standard_normal((n, 32), dtype=np.float32) for n in (4, 1, 17, 9)]
+
+
+def test_pack_unpack(multi_vector):
+    tokens, lengths = pack_multi_vector(multi_vector)
+    assert tokens.shape == (31, 32)
+    assert lengths.tolist() == [4, 1, 17, 9]
+    unpacked = unpack_multi_vector(tokens, lengths)
+    for original, view in zip(multi_vector, unpacked):
+        np.testing.assert_array_equal(original, view)
+        assert view.base is tokens
+    # packing the views again does not copy
+    repacked, _ = pack_multi_vector(unpacked[1:3])
+    assert np.shares_memory(repacked, tokens)
+    np.testing.assert_array_equal(repacked, tokens[4:22])
+    repacked, _ = pack_multi_vector(unpacked[::-1])
+    assert not np.shares_memory(repacked, tokens)
+
+
+def test_pool_tokens():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((3, 32), dtype=np.float32)
+    # 3 groups of 4 near-identical tokens each
+    tokens = np.repeat(centers, 4, axis=0) + 1e-3 * rng.standard_normal((12, 32))
+    pooled = pool_tokens(tokens.astype(np.float32), pool_factor=4)
+    assert pooled.shape == (3, 32)
+    assert pooled.dtype == np.float32
+    np.testing.assert_allclose(
+        pooled[np.argsort(pooled[:, 0])], centers[np.argsort(centers[:, 0])], atol=5e-3
+    )
+
+
+@pytest.mark.parametrize("pool_factor", [1, 2, 3])
+def test_pool_multi_vector(multi_vector, pool_factor):
+    pooled = pool_multi_vector(multi_vector, pool_factor)
+    assert [len(p) for p in pooled] == [max(len(e) // pool_factor, 1) for e in multi_vector]
+    if pool_factor > 1:
+        assert all(p.base is pooled[0].base for p in pooled)
+
+
+@pytest.mark.parametrize("embedding_dtype", [EmbeddingDtype.binary, EmbeddingDtype.ubinary])
+def test_quantize_multi_vector(multi_vector, embedding_dtype):
+    class MultiVectorModel:
+        def __init__(self, embedding_dtype: EmbeddingDtype):
+            self.embedding_dtype = embedding_dtype
+
+        @quant_embedding_decorator()
+        def encode_post(self, embeddings):
+            return embeddings
+
+    quantized = MultiVectorModel(embedding_dtype).encode_post(multi_vector)
+    assert [q.shape for q in quantized] == [(len(e), 4) for e in multi_vector]
+    for original, q in zip(multi_vector, quantized):
+        if embedding_dtype == EmbeddingDtype.binary:
+            # binary is ubinary shifted by -128
+            q = (q.astype(np.int16) + 128).astype(np.uint8)
+        bits = np.unpackbits(q, axis=1).astype(bool)
+        np.testing.assert_array_equal(bits, original > 0)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import torch
+from transformers import BertConfig  # type: ignore
+
+from infinity_emb.args import EngineArgs
+from infinity_emb.transformer.embedder.sentence_transformer import (
+    SentenceTransformerPatched,
+)
+from infinity_emb.transformer.sequence_packing import (
+    PackedFeatures,
+    pack_features,
+    unpack_token_embeddings,
+)
+
+SENTENCES = ["one two three " * k for k in [1, 12, 2, 3, 0, 5, 1]]
+
+
+def test_pack_features():
+    attention_mask = torch.tensor([[1, 1, 1, 1, 1], [1, 1, 0, 0, 0], [1, 1, 1, 0, 0]])
+    input_ids = torch.arange(15).view(3, 5) * attention_mask
+    config = BertConfig()
+    packed = pack_features(dict(input_ids=input_ids, attention_mask=attention_mask), config)
+    assert isinstance(packed, PackedFeatures)
+    assert packed.model_inputs["input_ids"].shape == (2, 5)
+    assert packed.model_inputs["input_ids"][1].tolist() == [10, 11, 12, 5, 6]
+    assert packed.model_inputs["position_ids"][1].tolist() == [0, 1, 2, 0, 1]
+    mask = packed.model_inputs["attention_mask"][1]
+    assert mask[0].tolist() == [1, 1, 1, 0, 0] and mask[4].tolist() == [0, 0, 0, 1, 1]
+
+    hidden_states = packed.model_inputs["input_ids"].float()[:, :, None]
+    unpacked = unpack_token_embeddings(packed, hidden_states)
+    assert torch.equal(unpacked[:, :, 0], input_ids.float())
+
+    # nothing to pack
+    full = torch.ones((2, 3), dtype=torch.long)
+    assert pack_features(dict(input_ids=full, attention_mask=full), config) is None
+
+
+@pytest.mark.parametrize("model_type,pooling", [("bert", "mean"), ("roberta", "cls")])
+def test_sequence_packing_matches_padded(tiny_sentence_transformer, model_type, pooling):
+    path = tiny_sentence_transformer(model_type, pooling)
+    embeddings = {}
+    for sequence_packing in [False, True]:
+        model = SentenceTransformerPatched(
+            engine_args=EngineArgs(
+                model_name_or_path=path,
+                sequence_packing=sequence_packing,
+                bettertransformer=False,
+            )
+        )
+        features = model.encode_pre(SENTENCES)
+        assert isinstance(features, PackedFeatures) == sequence_packing
+        embeddings[sequence_packing] = model.encode_post(model.encode_core(features))
+    np.testing.assert_allclose(embeddings[True], embeddings[False], atol=1e-5)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import torch
+from transformers import BertTokenizer, BertTokenizerFast  # type: ignore
+
+from infinity_emb.transformer.token_ids import TokenCollator, padded_length
+
+SENTENCES = ["one two three " * k for k in [1, 12, 2, 0, 5]]
+PAIRS = [("one two", "three " * k) for k in [1, 30, 4]]
+
+
+@pytest.fixture(params=[BertTokenizerFast, BertTokenizer])
+def tokenizer(request, tmp_path):
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "one", "two", "three"]
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab))
+    return request.param(str(tmp_path / "vocab.txt"), model_max_length=16)
+
+
+def _assert_equal(features, expected):
+    assert features.keys() == expected.keys()
+    for key, value in expected.items():
+        np.testing.assert_array_equal(np.asarray(features[key]), value)
+
+
+@pytest.mark.parametrize("padding_side", ["right", "left"])
+def test_collate_matches_tokenizer(tokenizer, padding_side):
+    tokenizer.padding_side = padding_side
+    collator = TokenCollator(tokenizer)
+    expected = tokenizer(SENTENCES, padding=True, truncation="longest_first", return_tensors="np")
+    input_ids, lengths = collator.tokenize_ids(SENTENCES)
+    assert lengths == [3, 14, 6, 0, 14]
+    _assert_equal(collator.collate(input_ids, return_tensors="np"), expected)
+
+    expected_pairs = tokenizer(PAIRS, padding=True, truncation="longest_first", return_tensors="np")
+    _assert_equal(collator.collate(*collator.tokenize(PAIRS), return_tensors="np"), expected_pairs)
+    # each distinct query tokenized once, the same features
+    assert collator.tokenize_pairs(PAIRS) == collator.tokenize(PAIRS)
+
+
+def test_collate_pad_to_multiple(tokenizer):
+    collator = TokenCollator(tokenizer, max_length=12, pad_to_multiple_of=8)
+    features = collator.collate(collator.tokenize(SENTENCES[:1])[0])
+    assert features["input_ids"].shape == (1, 8)
+    np.testing.assert_array_equal(features["attention_mask"][0], [1] * 5 + [0] * 3)
+    # not beyond max_length
+    assert collator.collate(collator.tokenize(SENTENCES)[0])["input_ids"].shape == (5, 12)
+
+    # torch tensors are views of one int64 array
+    assert all(v.dtype == torch.int64 for v in features.values())
+    input_ids, attention_mask = features["input_ids"], features["attention_mask"]
+    assert input_ids.data_ptr() + input_ids.nbytes == attention_mask.data_ptr()
+
+
+def test_padded_length():
+    assert padded_length(5) == 5
+    assert padded_length(5, 8) == 8
+    assert padded_length(17, 8, max_length=20) == 20
+    assert padded_length(30, 8, max_length=20) == 30
@@ -1,5 +1,21 @@
-from infinity_emb.transformer.utils import get_lengths_with_tokenize
+from infinity_emb.transformer.utils import (
+    get_lengths_with_tokenize,
+    get_pair_lengths_with_tokenize,
+)
 
 
 def test_get_lengths_with_tokenize():
     assert get_lengths_with_tokenize(["hi", "you"]) == ([2, 3], 5)
+
+
+def test_get_pair_lengths_with_tokenize():
+    calls = []
+
+    def tokenize(sentences):
+        calls.append(sentences)
+        return [len(s) for s in sentences]
+
+    assert get_pair_lengths_with_tokenize(
+        ["hi", "hi", "you"], ["a", "bb", "ccc"], tokenize=tokenize
+    ) == ([3, 4, 6], 13)
+    assert calls[0] == ["hi", "you"]
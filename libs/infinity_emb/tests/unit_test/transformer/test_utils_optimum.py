@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import torch
+from transformers import AutoModel  # type: ignore
+
+from infinity_emb.primitives import OnnxSessionProfile, PoolingMethod
+from infinity_emb.transformer import utils_optimum
+from infinity_emb.transformer.utils_optimum import (
+    OnnxIOBinding,
+    last_token_pooling,
+    onnx_input_dtypes,
+    onnx_session_options,
+    pool_and_normalize,
+    tune_session_threads,
+)
+
+ort = pytest.importorskip("onnxruntime")
+
+
+@pytest.fixture
+def onnx_model_path(tiny_sentence_transformer, tmp_path):
+    """tiny bert, exported with input_ids, attention_mask, token_type_ids"""
+    model = AutoModel.from_pretrained(tiny_sentence_transformer("bert", "mean")).eval()
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dummy = tuple(torch.ones((2, 4), dtype=torch.long) for _ in names)
+    torch.onnx.export(
+        model,
+        dummy,
+        str(tmp_path / "model.onnx"),
+        input_names=names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            n: {0: "batch_size", 1: "sequence_length"} for n in names + ["last_hidden_state"]
+        },
+        dynamo=False,
+    )
+    return tmp_path / "model.onnx"
+
+
+@pytest.fixture
+def onnx_session(onnx_model_path):
+    return ort.InferenceSession(str(onnx_model_path), providers=["CPUExecutionProvider"])
+
+
+def _inputs(batch_size: int, seq_len: int, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, seq_len + 1, size=batch_size)
+    return dict(
+        input_ids=rng.integers(5, 8, size=(batch_size, seq_len)),
+        attention_mask=(np.arange(seq_len)[None] < lengths[:, None]).astype(np.int64),
+    )
+
+
+def test_onnx_io_binding(onnx_session):
+    assert onnx_input_dtypes(onnx_session) == dict(
+        input_ids=np.int64, attention_mask=np.int64, token_type_ids=np.int64
+    )
+    io_binding = OnnxIOBinding(onnx_session)
+    buffer_ptrs = set()
+    for batch_size, seq_len in [(8, 16), (3, 5), (8, 16), (2, 9)]:
+        inputs = _inputs(batch_size, seq_len)
+        out = io_binding(inputs)
+        expected = onnx_session.run(
+            ["last_hidden_state"],
+            dict(token_type_ids=np.zeros_like(inputs["input_ids"]), **inputs),
+        )[0]
+        np.testing.assert_allclose(out, expected, atol=1e-6)
+        buffer_ptrs.add(io_binding._buffer.ctypes.data)
+        assert not np.shares_memory(out, io_binding._buffer)
+        pooled = io_binding(inputs, reduce=lambda h: h[:, 0].copy())
+        np.testing.assert_allclose(pooled, expected[:, 0], atol=1e-6)
+    # the first batch allocates the buffer, smaller batches reuse it
+    assert len(buffer_ptrs) == 1
+
+
+def test_onnx_io_binding_threads(onnx_session):
+    io_binding = OnnxIOBinding(onnx_session)
+    batches = [
+        _inputs(batch_size, seq_len, seed)
+        for seed, (batch_size, seq_len) in enumerate([(8, 16), (3, 5), (4, 32), (2, 9)] * 10)
+    ]
+
+    def _check(inputs):
+        expected = onnx_session.run(
+            ["last_hidden_state"],
+            dict(token_type_ids=np.zeros_like(inputs["input_ids"]), **inputs),
+        )[0]
+        np.testing.assert_allclose(io_binding(inputs), expected, atol=1e-6)
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(_check, batches))
+
+
+def test_last_token_pooling():
+    hidden = np.arange(24, dtype=np.float32).reshape(2, 4, 3)
+    right_padded = np.array([[1, 1, 1, 1], [1, 1, 0, 0]])
+    left_padded = np.array([[1, 1, 1, 1], [0, 0, 1, 1]])
+    np.testing.assert_array_equal(last_token_pooling(hidden, right_padded), hidden[[0, 1], [3, 1]])
+    np.testing.assert_array_equal(last_token_pooling(hidden, left_padded), hidden[[0, 1], [3, 3]])
+
+
+@pytest.mark.parametrize("pooling_method", [PoolingMethod.mean, PoolingMethod.cls])
+def test_pool_and_normalize(pooling_method):
+    rng = np.random.default_rng(0)
+    hidden = rng.standard_normal((5, 7, 16)).astype(np.float32)
+    attention_mask = _inputs(5, 7)["attention_mask"]
+
+    reference = hidden.astype(np.float64)
+    if pooling_method == PoolingMethod.mean:
+        mask = attention_mask[:, :, None].astype(np.float64)
+        reference = (reference * mask).sum(1) / mask.sum(1)
+    else:
+        reference = reference[:, 0]
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+    pooled = pool_and_normalize(hidden, attention_mask, pooling_method)
+    assert pooled.dtype == np.float32 and pooled.shape == (5, 16)
+    np.testing.assert_allclose(pooled, reference, atol=1e-6)
+    # a new array, the input may be a reused io binding buffer
+    assert not np.shares_memory(pooled, hidden)
+
+    pooled_last = pool_and_normalize(hidden, attention_mask, PoolingMethod.last_token)
+    np.testing.assert_allclose(np.linalg.norm(pooled_last, axis=1), 1.0, rtol=1e-6)
+
+
+def test_onnx_session_options(monkeypatch):
+    monkeypatch.setattr(utils_optimum, "_available_cpus", lambda: 6)
+    assert onnx_session_options(OnnxSessionProfile.default) is None
+    assert onnx_session_options(OnnxSessionProfile.default, 3).intra_op_num_threads == 3
+
+    latency = onnx_session_options(OnnxSessionProfile.latency)
+    assert latency.intra_op_num_threads == 6 and latency.inter_op_num_threads == 1
+    assert latency.execution_mode == ort.ExecutionMode.ORT_SEQUENTIAL
+    assert latency.get_session_config_entry("session.intra_op.allow_spinning") == "1"
+
+    throughput = onnx_session_options(OnnxSessionProfile.throughput, 2)
+    assert throughput.intra_op_num_threads == 2
+    assert throughput.get_session_config_entry("session.intra_op.allow_spinning") == "0"
+
+    # pinned cpu replica: one intra-op thread per cpu, 1-based processor ids
+    pinned = onnx_session_options(OnnxSessionProfile.default, cpu_cores=[4, 5, 6])
+    assert pinned.intra_op_num_threads == 3
+    assert pinned.get_session_config_entry("session.intra_op_thread_affinities") == "6;7"
+
+
+def test_tune_session_threads(onnx_model_path, monkeypatch):
+    monkeypatch.setattr(utils_optimum, "_available_cpus", lambda: 4)
+    inputs = _inputs(4, 16)
+    inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+    session, num_threads = tune_session_threads(onnx_model_path, inputs, repeats=1)
+    assert num_threads in [4, 2, 1]
+    assert session.get_session_options().intra_op_num_threads == num_threads
+    assert session.run(None, inputs)[0].shape == (4, 16, 32)